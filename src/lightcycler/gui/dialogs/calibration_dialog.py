@@ -0,0 +1,112 @@
+import logging
+
+from PyQt5 import QtCore, QtWidgets
+
+from lightcycler.gui.views.copy_pastable_tableview import CopyPastableTableView
+from lightcycler.kernel.models.pandas_data_model import PandasDataModel
+from lightcycler.kernel.utils.calibration import estimate_run_offsets
+
+
+class CalibrationDialog(QtWidgets.QDialog):
+
+    def __init__(self, rawdata_model, *args, **kwargs):
+
+        super(CalibrationDialog, self).__init__(*args, **kwargs)
+
+        self._rawdata_model = rawdata_model
+
+        self._init_ui()
+
+    def _build_events(self):
+        """Build the events related with the widget.
+        """
+
+        self._estimate_pushbutton.clicked.connect(self.on_estimate)
+        self._button_box.accepted.connect(self.accept)
+        self._button_box.rejected.connect(self.reject)
+
+    def _build_layout(self):
+        """Build the layout of the widget.
+        """
+
+        main_layout = QtWidgets.QVBoxLayout()
+
+        hlayout = QtWidgets.QHBoxLayout()
+
+        vlayout = QtWidgets.QVBoxLayout()
+        vlayout.addWidget(QtWidgets.QLabel('Calibrators'))
+        vlayout.addWidget(self._calibrators_listwidget)
+        hlayout.addLayout(vlayout, stretch=1)
+
+        vlayout = QtWidgets.QVBoxLayout()
+        vlayout.addWidget(QtWidgets.QLabel('Run offsets'))
+        vlayout.addWidget(self._offsets_tableview)
+        hlayout.addLayout(vlayout, stretch=3)
+
+        main_layout.addLayout(hlayout)
+
+        main_layout.addWidget(self._estimate_pushbutton)
+
+        main_layout.addWidget(self._button_box)
+
+        self.setGeometry(0, 0, 800, 500)
+
+        self.setLayout(main_layout)
+
+    def _build_widgets(self):
+        """Build the widgets of the widget.
+        """
+
+        self._calibrators_listwidget = QtWidgets.QListWidget()
+        calibrators = set(self._rawdata_model.calibrators)
+        for sample in sorted(self._rawdata_model.samples):
+            item = QtWidgets.QListWidgetItem(sample)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked if sample in calibrators else QtCore.Qt.Unchecked)
+            self._calibrators_listwidget.addItem(item)
+
+        self._offsets_tableview = CopyPastableTableView(delimiter=',')
+
+        self._estimate_pushbutton = QtWidgets.QPushButton('Estimate')
+
+        self._button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+
+        self.setWindowTitle('Inter-run calibration')
+
+    def _init_ui(self):
+
+        self._build_widgets()
+        self._build_layout()
+        self._build_events()
+
+    @property
+    def calibrators(self):
+        """Return the checked calibrators.
+
+        Returns:
+            list of str: the calibrators
+        """
+
+        calibrators = []
+        for i in range(self._calibrators_listwidget.count()):
+            item = self._calibrators_listwidget.item(i)
+            if item.checkState() == QtCore.Qt.Checked:
+                calibrators.append(item.text())
+
+        return calibrators
+
+    def on_estimate(self):
+        """Estimate the run offsets from the checked calibrators.
+        """
+
+        calibrators = self.calibrators
+        if not calibrators:
+            logging.error('No calibrator selected')
+            return
+
+        offsets = estimate_run_offsets(self._rawdata_model.rawdata, calibrators, self._rawdata_model.cp_column)
+
+        offsets = offsets.rename('Offset').reset_index()
+        offsets['Date'] = offsets['Date'].astype(str)
+
+        self._offsets_tableview.setModel(PandasDataModel(offsets.round(3), self))
@@ -0,0 +1,122 @@
+from PyQt5 import QtWidgets
+
+from lightcycler.kernel.utils.cq_calling import CQ_METHODS
+
+
+class CqCallingDialog(QtWidgets.QDialog):
+
+    def __init__(self, n_cycles, *args, **kwargs):
+
+        super(CqCallingDialog, self).__init__(*args, **kwargs)
+
+        self._n_cycles = n_cycles
+
+        self._init_ui()
+
+    def _build_events(self):
+        """Build the events related with the widget.
+        """
+
+        self._method_combobox.currentTextChanged.connect(self.on_select_method)
+        self._button_box.accepted.connect(self.accept)
+        self._button_box.rejected.connect(self.reject)
+
+    def _build_layout(self):
+        """Build the layout of the widget.
+        """
+
+        main_layout = QtWidgets.QVBoxLayout()
+
+        form_layout = QtWidgets.QFormLayout()
+        form_layout.addRow(QtWidgets.QLabel('Method'), self._method_combobox)
+        form_layout.addRow(QtWidgets.QLabel('First baseline cycle'), self._baseline_start_spinbox)
+        form_layout.addRow(QtWidgets.QLabel('Last baseline cycle'), self._baseline_end_spinbox)
+        form_layout.addRow(QtWidgets.QLabel('Threshold (0 = auto)'), self._threshold_spinbox)
+        form_layout.addRow(QtWidgets.QLabel('Fit points'), self._n_points_spinbox)
+        main_layout.addLayout(form_layout)
+
+        main_layout.addWidget(self._use_cq_checkbox)
+
+        main_layout.addWidget(self._button_box)
+
+        self.setLayout(main_layout)
+
+    def _build_widgets(self):
+        """Build the widgets of the widget.
+        """
+
+        self._method_combobox = QtWidgets.QComboBox()
+        self._method_combobox.addItems(CQ_METHODS)
+
+        self._baseline_start_spinbox = QtWidgets.QSpinBox()
+        self._baseline_start_spinbox.setMinimum(1)
+        self._baseline_start_spinbox.setMaximum(self._n_cycles)
+        self._baseline_start_spinbox.setValue(3)
+
+        self._baseline_end_spinbox = QtWidgets.QSpinBox()
+        self._baseline_end_spinbox.setMinimum(1)
+        self._baseline_end_spinbox.setMaximum(self._n_cycles)
+        self._baseline_end_spinbox.setValue(min(15, self._n_cycles))
+
+        self._threshold_spinbox = QtWidgets.QDoubleSpinBox()
+        self._threshold_spinbox.setMinimum(0.0)
+        self._threshold_spinbox.setMaximum(1.0e6)
+        self._threshold_spinbox.setDecimals(3)
+        self._threshold_spinbox.setValue(0.0)
+
+        self._n_points_spinbox = QtWidgets.QSpinBox()
+        self._n_points_spinbox.setMinimum(2)
+        self._n_points_spinbox.setMaximum(10)
+        self._n_points_spinbox.setValue(2)
+
+        self._use_cq_checkbox = QtWidgets.QCheckBox('Use the called Cq instead of the instrument CP')
+        self._use_cq_checkbox.setChecked(True)
+
+        self._button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+
+        self.setWindowTitle('Cq calling')
+
+        self.on_select_method(self._method_combobox.currentText())
+
+    def _init_ui(self):
+
+        self._build_widgets()
+        self._build_layout()
+        self._build_events()
+
+    def on_select_method(self, method):
+        """Enable the settings of the selected method.
+
+        Args:
+            method (str): the selected method
+        """
+
+        fit_points = method == 'fit points'
+
+        self._threshold_spinbox.setEnabled(fit_points)
+        self._n_points_spinbox.setEnabled(fit_points)
+
+    @property
+    def settings(self):
+        """Return the settings of the Cq calling.
+
+        Returns:
+            dict: the keyword arguments of lightcycler.kernel.utils.cq_calling.call_cq
+        """
+
+        threshold = self._threshold_spinbox.value()
+
+        return {'method': self._method_combobox.currentText(),
+                'baseline_cycles': (self._baseline_start_spinbox.value(), self._baseline_end_spinbox.value()),
+                'threshold': threshold if threshold > 0.0 else None,
+                'n_points': self._n_points_spinbox.value()}
+
+    @property
+    def use_cq(self):
+        """Return whether the called Cq should be used instead of the instrument CP.
+
+        Returns:
+            bool: True if the called Cq should be used
+        """
+
+        return self._use_cq_checkbox.isChecked()
@@ -3,12 +3,15 @@ from PyQt5 import QtWidgets
 
 class CTPowerDialog(QtWidgets.QDialog):
 
-    def __init__(self, genes, *args, **kwargs):
+    def __init__(self, genes, ct_powers=None, *args, **kwargs):
 
         super(CTPowerDialog, self).__init__(*args, **kwargs)
 
         self._genes = genes
 
+        # The initial value of the ct power per gene. Defaults to 2.
+        self._initial_ct_powers = ct_powers if ct_powers is not None else {}
+
         self._init_ui()
 
     def _build_layout(self):
@@ -37,11 +40,11 @@ class CTPowerDialog(QtWidgets.QDialog):
         for gene in self._genes:
             gene_label = QtWidgets.QLabel(gene)
             gene_spinbox = QtWidgets.QDoubleSpinBox()
-            gene_spinbox.setValue(2.000)
             gene_spinbox.setMinimum(0.001)
             gene_spinbox.setMaximum(4.000)
             gene_spinbox.setSingleStep(0.001)
             gene_spinbox.setDecimals(3)
+            gene_spinbox.setValue(self._initial_ct_powers.get(gene, 2.000))
             self._gene_widgets.append([gene_label, gene_spinbox])
 
         self._button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
@@ -1,6 +1,6 @@
 from PyQt5 import QtWidgets
 
-from pylab import Figure
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
 
 from lightcycler.kernel.models.groups_model import GroupsModel
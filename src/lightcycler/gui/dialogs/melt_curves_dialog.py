@@ -0,0 +1,144 @@
+import logging
+
+import pandas as pd
+
+from PyQt5 import QtWidgets
+
+from lightcycler.gui.views.copy_pastable_tableview import CopyPastableTableView
+from lightcycler.kernel.models.pandas_data_model import PandasDataModel
+from lightcycler.kernel.utils.melt_curves import analyze_melt_curves
+
+
+class MeltCurvesDialog(QtWidgets.QDialog):
+
+    def __init__(self, melt_curves_store, *args, **kwargs):
+
+        super(MeltCurvesDialog, self).__init__(*args, **kwargs)
+
+        self._melt_curves_store = melt_curves_store
+
+        self._results = None
+
+        self._init_ui()
+
+    def _build_events(self):
+        """Build the events related with the widget.
+        """
+
+        self._analyze_pushbutton.clicked.connect(self.on_analyze)
+        self._button_box.accepted.connect(self.accept)
+        self._button_box.rejected.connect(self.reject)
+
+    def _build_layout(self):
+        """Build the layout of the widget.
+        """
+
+        main_layout = QtWidgets.QVBoxLayout()
+
+        form_layout = QtWidgets.QFormLayout()
+        form_layout.addRow(QtWidgets.QLabel('Smoothing window'), self._smoothing_window_spinbox)
+        form_layout.addRow(QtWidgets.QLabel('Secondary peak ratio'), self._secondary_ratio_spinbox)
+        form_layout.addRow(QtWidgets.QLabel('Min. peaks separation (C)'), self._min_separation_spinbox)
+        form_layout.addRow(QtWidgets.QLabel('Tm tolerance (C)'), self._tm_tolerance_spinbox)
+        main_layout.addLayout(form_layout)
+
+        main_layout.addWidget(self._analyze_pushbutton)
+
+        main_layout.addWidget(self._results_tableview)
+
+        main_layout.addWidget(self._exclude_checkbox)
+
+        main_layout.addWidget(self._button_box)
+
+        self.setGeometry(0, 0, 800, 500)
+
+        self.setLayout(main_layout)
+
+    def _build_widgets(self):
+        """Build the widgets of the widget.
+        """
+
+        self._smoothing_window_spinbox = QtWidgets.QSpinBox()
+        self._smoothing_window_spinbox.setMinimum(3)
+        self._smoothing_window_spinbox.setMaximum(51)
+        self._smoothing_window_spinbox.setSingleStep(2)
+        self._smoothing_window_spinbox.setValue(7)
+
+        self._secondary_ratio_spinbox = QtWidgets.QDoubleSpinBox()
+        self._secondary_ratio_spinbox.setMinimum(0.01)
+        self._secondary_ratio_spinbox.setMaximum(1.0)
+        self._secondary_ratio_spinbox.setSingleStep(0.05)
+        self._secondary_ratio_spinbox.setValue(0.2)
+
+        self._min_separation_spinbox = QtWidgets.QDoubleSpinBox()
+        self._min_separation_spinbox.setMinimum(0.1)
+        self._min_separation_spinbox.setMaximum(20.0)
+        self._min_separation_spinbox.setSingleStep(0.5)
+        self._min_separation_spinbox.setValue(2.0)
+
+        self._tm_tolerance_spinbox = QtWidgets.QDoubleSpinBox()
+        self._tm_tolerance_spinbox.setMinimum(0.1)
+        self._tm_tolerance_spinbox.setMaximum(20.0)
+        self._tm_tolerance_spinbox.setSingleStep(0.5)
+        self._tm_tolerance_spinbox.setValue(1.5)
+
+        self._analyze_pushbutton = QtWidgets.QPushButton('Analyze')
+
+        self._results_tableview = CopyPastableTableView(delimiter=',')
+
+        self._exclude_checkbox = QtWidgets.QCheckBox('Exclude the wells failing the QC from the dynamic matrices')
+        self._exclude_checkbox.setChecked(True)
+
+        self._button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+
+        self.setWindowTitle('Melt curves QC')
+
+    def _init_ui(self):
+
+        self._build_widgets()
+        self._build_layout()
+        self._build_events()
+
+    @property
+    def exclude_failed_wells(self):
+        """Return whether the wells failing the QC should be excluded from the dynamic matrices.
+
+        Returns:
+            bool: True if the wells should be excluded
+        """
+
+        return self._exclude_checkbox.isChecked()
+
+    def on_analyze(self):
+        """Analyze all the melt curves of the store.
+        """
+
+        index = self._melt_curves_store.index
+
+        try:
+            results = analyze_melt_curves(self._melt_curves_store.fluorescence,
+                                          self._melt_curves_store.temperatures,
+                                          genes=index['Gene'].tolist(),
+                                          smoothing_window=self._smoothing_window_spinbox.value(),
+                                          secondary_ratio=self._secondary_ratio_spinbox.value(),
+                                          min_separation=self._min_separation_spinbox.value(),
+                                          tm_tolerance=self._tm_tolerance_spinbox.value())
+        except Exception as error:
+            logging.error(str(error))
+            return
+
+        self._results = pd.concat([index.reset_index(drop=True), results], axis=1)
+
+        self._results_tableview.setModel(PandasDataModel(self._results.round(2), self))
+
+        logging.info('{} melt curves out of {} failed the QC'.format((~results['QC passed']).sum(), len(results.index)))
+
+    @property
+    def results(self):
+        """Return the results of the melt curves analysis.
+
+        Returns:
+            pandas.DataFrame: the index of the melt curves and their Tm, peaks and QC status. None if no analysis has been run.
+        """
+
+        return self._results
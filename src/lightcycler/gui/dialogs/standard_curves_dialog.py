@@ -0,0 +1,150 @@
+import logging
+
+import numpy as np
+
+from PyQt5 import QtWidgets
+
+from lightcycler.gui.views.copy_pastable_tableview import CopyPastableTableView
+from lightcycler.kernel.models.pandas_data_model import PandasDataModel
+from lightcycler.kernel.utils.standard_curves import DEFAULT_NAMING_RULE, fit_standard_curves, get_concentrations_from_names, read_concentrations
+
+
+class StandardCurvesDialog(QtWidgets.QDialog):
+
+    def __init__(self, rawdata_model, *args, **kwargs):
+
+        super(StandardCurvesDialog, self).__init__(*args, **kwargs)
+
+        self._rawdata_model = rawdata_model
+
+        # The concentrations read from a mapping table. If None, the concentrations are deduced from the naming rule.
+        self._concentrations = None
+
+        self._standard_curves = None
+
+        # The concentrations used for the last fit
+        self._fitted_concentrations = {}
+
+        self._init_ui()
+
+    def _build_events(self):
+        """Build the events related with the widget.
+        """
+
+        self._load_mapping_table_pushbutton.clicked.connect(self.on_load_mapping_table)
+        self._fit_pushbutton.clicked.connect(self.on_fit)
+        self._button_box.accepted.connect(self.accept)
+        self._button_box.rejected.connect(self.reject)
+
+    def _build_layout(self):
+        """Build the layout of the widget.
+        """
+
+        main_layout = QtWidgets.QVBoxLayout()
+
+        form_layout = QtWidgets.QFormLayout()
+        form_layout.addRow(QtWidgets.QLabel('Naming rule'), self._naming_rule_lineedit)
+        main_layout.addLayout(form_layout)
+
+        hlayout = QtWidgets.QHBoxLayout()
+        hlayout.addWidget(self._load_mapping_table_pushbutton)
+        hlayout.addWidget(self._fit_pushbutton)
+        main_layout.addLayout(hlayout)
+
+        main_layout.addWidget(self._standard_curves_tableview)
+
+        main_layout.addWidget(self._button_box)
+
+        self.setGeometry(0, 0, 600, 400)
+
+        self.setLayout(main_layout)
+
+    def _build_widgets(self):
+        """Build the widgets of the widget.
+        """
+
+        self._naming_rule_lineedit = QtWidgets.QLineEdit(DEFAULT_NAMING_RULE)
+
+        self._load_mapping_table_pushbutton = QtWidgets.QPushButton('Load mapping table')
+
+        self._fit_pushbutton = QtWidgets.QPushButton('Fit')
+
+        self._standard_curves_tableview = CopyPastableTableView(delimiter=',')
+
+        self._button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+
+        self.setWindowTitle('Standard curves')
+
+    def _init_ui(self):
+
+        self._build_widgets()
+        self._build_layout()
+        self._build_events()
+
+    @property
+    def concentrations(self):
+        """Return the concentrations of the samples of the dilution series used for the last fit.
+
+        Returns:
+            dict: the concentration of each sample
+        """
+
+        return self._fitted_concentrations
+
+    @property
+    def ct_powers(self):
+        """Return the ct power per gene estimated from the standard curves.
+
+        Returns:
+            dict: the ct power of each gene with a valid standard curve
+        """
+
+        if self._standard_curves is None:
+            return {}
+
+        ct_powers = self._standard_curves['ct power'].dropna()
+
+        return dict([(gene, power) for gene, power in ct_powers.items() if np.isfinite(power)])
+
+    def on_fit(self):
+        """Fit the standard curves of all the genes.
+        """
+
+        if self._concentrations is not None:
+            concentrations = self._concentrations
+        else:
+            try:
+                concentrations = get_concentrations_from_names(self._rawdata_model.samples, self._naming_rule_lineedit.text())
+            except Exception as error:
+                logging.error(str(error))
+                return
+
+        if not concentrations:
+            logging.error('No sample of a dilution series found')
+            return
+
+        self._fitted_concentrations = concentrations
+
+        rawdata = self._rawdata_model.rawdata[self._rawdata_model.qc_mask]
+
+        self._standard_curves = fit_standard_curves(rawdata, concentrations, cp_column=self._rawdata_model.cp_column)
+
+        self._standard_curves_tableview.setModel(PandasDataModel(self._standard_curves.round(3), self))
+
+    def on_load_mapping_table(self):
+        """Load a table which maps the samples of the dilution series to their concentration.
+        """
+
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open mapping table', '', 'Table files (*.csv *.txt *.xls *.xlsx)')
+        if not filename:
+            return
+
+        try:
+            self._concentrations = read_concentrations(filename)
+        except Exception as error:
+            logging.error(str(error))
+            return
+
+        self._naming_rule_lineedit.setEnabled(False)
+
+        logging.info('Loaded concentrations of {} samples from {} file'.format(len(self._concentrations), filename))
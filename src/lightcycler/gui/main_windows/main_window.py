@@ -2,27 +2,39 @@
     _ MainWindow
 """
 
-import copy
+import collections
+import functools
 import logging
 import os
+import shutil
 import sys
+import tempfile
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 
-import openpyxl
-import xlrd
-
 import pandas as pd
 
 import lightcycler
 from lightcycler.__pkginfo__ import __version__
+from lightcycler.gui.dialogs.calibration_dialog import CalibrationDialog
+from lightcycler.gui.dialogs.cq_calling_dialog import CqCallingDialog
+from lightcycler.gui.dialogs.melt_curves_dialog import MeltCurvesDialog
+from lightcycler.gui.threads.export_thread import ExportThread
 from lightcycler.gui.widgets.logger_widget import QTextEditLogger
 from lightcycler.gui.widgets.dynamic_matrix_widget import DynamicMatrixWidget
 from lightcycler.gui.widgets.genes_widget import GenesWidget
 from lightcycler.gui.widgets.groups_widget import GroupsWidget
 from lightcycler.gui.widgets.rawdata_widget import RawDataWidget
-from lightcycler.kernel.models.rawdata_model import RawDataError, RawDataModel
+from lightcycler.kernel.models.rawdata_model import RawDataError
+from lightcycler.kernel.readers.registry import get_extensions
+from lightcycler.kernel.utils.amplification_curves import AmplificationCurvesStore
+from lightcycler.kernel.utils.cq_calling import call_cq
+from lightcycler.kernel.utils.excel_reader import read_sheets
+from lightcycler.kernel.utils.excel_writer import create_workbook, save_workbook
+from lightcycler.kernel.utils.melt_curves import MeltCurvesStore
 from lightcycler.kernel.utils.progress_bar import progress_bar
+from lightcycler.kernel.utils.project import ProjectError, load_project, save_project
+from lightcycler.kernel.utils.tidy_export import TidyBundle, save_bundle
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -53,6 +65,15 @@ class MainWindow(QtWidgets.QMainWindow):
 
         super(MainWindow, self).__init__(parent)
 
+        # The store of the amplification curves. Created on the first opening of amplification curves files.
+        self._amplification_curves_store = None
+
+        # The store of the melt curves. Created on the first opening of melt curves files.
+        self._melt_curves_store = None
+
+        # The thread of the running export. None if no export has been run yet.
+        self._export_thread = None
+
         self._init_ui()
 
     def _build_events(self):
@@ -101,6 +122,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
         menubar = self.menuBar()
 
+        # The actions which read or modify the data. They are disabled while an export is running.
+        self._data_actions = []
+
         file_menu = menubar.addMenu('&File')
 
         file_action = QtWidgets.QAction('&Open lightcycler files', self)
@@ -108,6 +132,35 @@ class MainWindow(QtWidgets.QMainWindow):
         file_action.setStatusTip('Open lightcycler (pdf) files')
         file_action.triggered.connect(self.on_open_lightcycler_files)
         file_menu.addAction(file_action)
+        self._data_actions.append(file_action)
+
+        curves_action = QtWidgets.QAction('Open &amplification curves files', self)
+        curves_action.setStatusTip('Open lightcycler amplification curves export files')
+        curves_action.triggered.connect(self.on_open_amplification_curves_files)
+        file_menu.addAction(curves_action)
+        self._data_actions.append(curves_action)
+
+        melt_curves_action = QtWidgets.QAction('Open &melt curves files', self)
+        melt_curves_action.setStatusTip('Open lightcycler melt curves export files')
+        melt_curves_action.triggered.connect(self.on_open_melt_curves_files)
+        file_menu.addAction(melt_curves_action)
+        self._data_actions.append(melt_curves_action)
+
+        file_menu.addSeparator()
+
+        open_project_action = QtWidgets.QAction('Open &project', self)
+        open_project_action.setShortcut('Ctrl+Shift+O')
+        open_project_action.setStatusTip('Open a lightcycler project file')
+        open_project_action.triggered.connect(self.on_open_project)
+        file_menu.addAction(open_project_action)
+        self._data_actions.append(open_project_action)
+
+        save_project_action = QtWidgets.QAction('&Save project', self)
+        save_project_action.setShortcut('Ctrl+S')
+        save_project_action.setStatusTip('Save the session to a lightcycler project file')
+        save_project_action.triggered.connect(self.on_save_project)
+        file_menu.addAction(save_project_action)
+        self._data_actions.append(save_project_action)
 
         file_menu.addSeparator()
 
@@ -116,12 +169,21 @@ class MainWindow(QtWidgets.QMainWindow):
         import_action.setStatusTip('Import Excel spreadsheet')
         import_action.triggered.connect(self.on_import_excel_spreadsheet)
         file_menu.addAction(import_action)
+        self._data_actions.append(import_action)
 
         export_action = QtWidgets.QAction('&Export workbook', self)
         export_action.setShortcut('Ctrl+E')
         export_action.setStatusTip('Export data to an Excel spreadsheet')
         export_action.triggered.connect(self.on_export_data)
         file_menu.addAction(export_action)
+        self._data_actions.append(export_action)
+
+        export_tables_action = QtWidgets.QAction('Export &tables', self)
+        export_tables_action.setShortcut('Ctrl+Shift+E')
+        export_tables_action.setStatusTip('Export data to a zip bundle of long-form CSV or Parquet tables')
+        export_tables_action.triggered.connect(self.on_export_tables)
+        file_menu.addAction(export_tables_action)
+        self._data_actions.append(export_tables_action)
 
         file_menu.addSeparator()
 
@@ -138,6 +200,7 @@ class MainWindow(QtWidgets.QMainWindow):
         clear_action.setStatusTip('Clear data')
         clear_action.triggered.connect(self.on_clear_data)
         data_menu.addAction(clear_action)
+        self._data_actions.append(clear_action)
 
         data_menu.addSeparator()
 
@@ -146,6 +209,27 @@ class MainWindow(QtWidgets.QMainWindow):
         reset_action.setStatusTip('Reset data')
         reset_action.triggered.connect(self.on_reset_data)
         data_menu.addAction(reset_action)
+        self._data_actions.append(reset_action)
+
+        data_menu.addSeparator()
+
+        call_cq_action = QtWidgets.QAction('Call &Cq from amplification curves', self)
+        call_cq_action.setStatusTip('Call the Cq from the amplification curves')
+        call_cq_action.triggered.connect(self.on_call_cq)
+        data_menu.addAction(call_cq_action)
+        self._data_actions.append(call_cq_action)
+
+        melt_qc_action = QtWidgets.QAction('&Melt curves QC', self)
+        melt_qc_action.setStatusTip('Detect the Tm peaks of the melt curves and flag the wells failing the QC')
+        melt_qc_action.triggered.connect(self.on_melt_curves_qc)
+        data_menu.addAction(melt_qc_action)
+        self._data_actions.append(melt_qc_action)
+
+        calibration_action = QtWidgets.QAction('&Inter-run calibration', self)
+        calibration_action.setStatusTip('Calibrate the CP values across runs using calibrator samples')
+        calibration_action.triggered.connect(self.on_calibrate_runs)
+        data_menu.addAction(calibration_action)
+        self._data_actions.append(calibration_action)
 
     def _build_widgets(self):
         """Build the widgets.
@@ -183,11 +267,28 @@ class MainWindow(QtWidgets.QMainWindow):
         self.statusBar().addPermanentWidget(self._progress_label)
         self.statusBar().addPermanentWidget(self._progress_bar)
 
+        self._cancel_export_button = QtWidgets.QPushButton('Cancel export')
+        self._cancel_export_button.setEnabled(False)
+        self._cancel_export_button.clicked.connect(self.on_cancel_export)
+        self.statusBar().addPermanentWidget(self._cancel_export_button)
+
         icon_path = os.path.join(lightcycler.__path__[0], "icons", "lightcycler.png")
         self.setWindowIcon(QtGui.QIcon(icon_path))
 
         self.show()
 
+    def _enable_data_edition(self, enabled):
+        """Enable or disable the widgets and the actions which read or modify the data.
+
+        Args:
+            enabled (bool): True for enabling the data edition
+        """
+
+        self._tabs.setEnabled(enabled)
+
+        for action in self._data_actions:
+            action.setEnabled(enabled)
+
     def _init_ui(self):
         """Initializes the ui.
         """
@@ -200,6 +301,91 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self._build_events()
 
+    def _load_session(self, rawdata, groups, group_control=None, genes_per_group=None, cp_column=None, calibrators=None):
+        """Load a session into the models.
+
+        The raw data, their CP column and their calibrators are set in a single batched update so that the dynamic matrices
+        and the models depending on them are updated only once.
+
+        Args:
+            rawdata (pandas.DataFrame): the raw data
+            groups (pandas.DataFrame): the samples of each group, one group per column
+            group_control (str): the group control
+            genes_per_group (pandas.DataFrame): the reference and interest genes
+            cp_column (str): the column from which the CP values are read
+            calibrators (list of str): the calibrator samples used for the inter-run calibration
+        """
+
+        rawdata_model = self._rawdata_widget.model()
+
+        with rawdata_model.batch_update():
+            rawdata_model.rawdata = rawdata
+
+            if cp_column is not None:
+                try:
+                    rawdata_model.cp_column = cp_column
+                except RawDataError as error:
+                    logging.error(str(error))
+
+            if calibrators is not None:
+                rawdata_model.calibrators = calibrators
+
+        self.groups_loaded.emit(rawdata_model.samples, groups)
+
+        if group_control is not None:
+            self.group_control_loaded.emit(group_control)
+
+        if genes_per_group is not None:
+            self._genes_widget.on_clear()
+            self.genes_loaded.emit(rawdata_model.genes, genes_per_group)
+
+    def _remove_curves_stores(self):
+        """Remove the amplification and melt curves stores and their temporary directories.
+
+        The stores are created again on the next opening of curves files.
+        """
+
+        for store in [self._amplification_curves_store, self._melt_curves_store]:
+            if store is None:
+                continue
+            # Clearing the store drops its memory map before its directory is removed
+            store.clear()
+            shutil.rmtree(store.directory, ignore_errors=True)
+
+        self._amplification_curves_store = None
+
+        self._melt_curves_store = None
+
+    def _start_export(self, workbook, filename, steps, save):
+        """Start an export in a background thread.
+
+        Args:
+            workbook (object): the cancellable export target (workbook or tidy bundle)
+            filename (str): the exported file
+            steps (list of callable): the export steps
+            save (callable): the function which saves the export target to the exported file
+        """
+
+        self._export_thread = ExportThread(workbook, filename, steps, self, save=save)
+        self._export_thread.step_exported.connect(self.on_export_step)
+        self._export_thread.export_finished.connect(self.on_export_finished)
+        self._export_thread.export_cancelled.connect(self.on_export_cancelled)
+        self._export_thread.export_failed.connect(self.on_export_failed)
+        self._export_thread.finished.connect(self.on_export_thread_finished)
+
+        progress_bar.reset(self._export_thread.n_steps)
+        progress_bar.update(0)
+
+        # The export steps read the models and their caches from the export thread hence the data can not be modified
+        # until the export is finished
+        self._enable_data_edition(False)
+
+        self._cancel_export_button.setEnabled(True)
+
+        self.statusBar().showMessage('Exporting data to {} file ...'.format(filename))
+
+        self._export_thread.start()
+
     @ property
     def dynamic_matrix_widget(self):
         """Returns the dynamic matrix widget.
@@ -220,16 +406,100 @@ class MainWindow(QtWidgets.QMainWindow):
 
         return self._groups_widget
 
+    @property
+    def amplification_curves_store(self):
+        """Returns the store of the amplification curves.
+
+        Returns:
+            lightcycler.kernel.utils.amplification_curves.AmplificationCurvesStore: the store. None if no amplification
+                curves file has been opened.
+        """
+
+        return self._amplification_curves_store
+
+    def on_call_cq(self):
+        """Call the Cq from the amplification curves and set them as an alternative CP column of the raw data.
+        """
+
+        rawdata_model = self._rawdata_widget.model()
+        if rawdata_model.rowCount() == 0:
+            logging.error('No data loaded yet')
+            return
+
+        store = self._amplification_curves_store
+        if store is None or len(store) == 0:
+            logging.error('No amplification curves loaded yet')
+            return
+
+        dialog = CqCallingDialog(store.n_cycles, self)
+        if not dialog.exec_():
+            return
+
+        try:
+            cq = call_cq(store.fluorescence, **dialog.settings)
+        except Exception as error:
+            logging.error(str(error))
+            return
+
+        rawdata_model.set_called_cq(store.index, cq)
+
+        rawdata_model.cp_column = 'Cq' if dialog.use_cq else 'CP'
+
+        logging.info('Called the Cq of {} wells'.format(len(cq)))
+
+    def on_calibrate_runs(self):
+        """Select the calibrator samples used for calibrating the CP values across runs.
+        """
+
+        rawdata_model = self._rawdata_widget.model()
+        if rawdata_model.rowCount() == 0:
+            logging.error('No data loaded yet')
+            return
+
+        dialog = CalibrationDialog(rawdata_model, self)
+        if not dialog.exec_():
+            return
+
+        rawdata_model.calibrators = dialog.calibrators
+
+        if rawdata_model.calibrators:
+            logging.info('Calibrated {} runs using {} calibrator(s)'.format(len(rawdata_model.run_offsets), len(rawdata_model.calibrators)))
+
+    def on_cancel_export(self):
+        """Event handler which cancels the running export.
+        """
+
+        if self._export_thread is None or not self._export_thread.isRunning():
+            return
+
+        self._cancel_export_button.setEnabled(False)
+
+        self._export_thread.cancel()
+
     def on_clear_data(self):
         """Clear the data.
         """
 
+        self._remove_curves_stores()
+
         self.clear_data.emit()
 
+    def on_export_cancelled(self):
+        """Event handler called when the export has been cancelled.
+        """
+
+        logging.info('Export cancelled')
+
     def on_export_data(self):
         """Event handler which export the raw data to an excel spreadsheet.
+
+        The export runs in a background thread and can be cancelled.
         """
 
+        if self._export_thread is not None and self._export_thread.isRunning():
+            logging.warning('An export is already running')
+            return
+
         filename, _ = QtWidgets.QFileDialog.getSaveFileName(self, caption='Export data as ...', filter="Excel files (*.xls *.xlsx)")
         if not filename:
             return
@@ -238,57 +508,112 @@ class MainWindow(QtWidgets.QMainWindow):
         if ext not in ['.xls', '.xlsx']:
             filename = basename + '.xlsx'
 
-        workbook = openpyxl.Workbook()
+        # The sheets are streamed row by row to a write-only workbook
+        workbook = create_workbook()
 
-        # Remove the first empty sheet created by default
-        workbook.remove_sheet(workbook.get_sheet_by_name('Sheet'))
+        # The dynamic matrices are exported one gene at a time for a finer progress report
+        steps = [self._rawdata_widget.export]
+        steps.extend([functools.partial(self._dynamic_matrix_widget.export, genes=[gene]) for gene in self._dynamic_matrix_widget.genes])
+        steps.extend([self._groups_widget.export, self._genes_widget.export])
 
-        self._rawdata_widget.export(workbook)
-        self._dynamic_matrix_widget.export(workbook)
-        self._groups_widget.export(workbook)
-        self._genes_widget.export(workbook)
+        self._start_export(workbook, filename, steps, save_workbook)
 
-        try:
-            workbook.save(filename)
-        except PermissionError as error:
-            logging.error(str(error))
-        else:
-            logging.info('Exported successfully raw data to {} file'.format(filename))
+    def on_export_tables(self):
+        """Event handler which export the data to a zip bundle of long-form tables.
+
+        The export runs in a background thread and can be cancelled.
+        """
+
+        if self._export_thread is not None and self._export_thread.isRunning():
+            logging.warning('An export is already running')
+            return
+
+        filename, selected_filter = QtWidgets.QFileDialog.getSaveFileName(self,
+                                                                          caption='Export tables as ...',
+                                                                          filter='CSV bundle (*.zip);;Parquet bundle (*.zip)')
+        if not filename:
+            return
+
+        basename, ext = os.path.splitext(filename)
+        if ext != '.zip':
+            filename = basename + '.zip'
+
+        # The tables are streamed chunk by chunk to the bundle
+        bundle = TidyBundle('parquet' if selected_filter.startswith('Parquet') else 'csv')
+
+        steps = [self._rawdata_widget.export_tidy, self._dynamic_matrix_widget.export_tidy]
+        steps.extend([self._groups_widget.export_tidy, self._genes_widget.export_tidy])
+
+        self._start_export(bundle, filename, steps, save_bundle)
+
+    def on_export_failed(self, error):
+        """Event handler called when the export has failed.
+
+        Args:
+            error (str): the error message
+        """
+
+        logging.error('The export failed: {}'.format(error))
+
+    def on_export_finished(self, filename):
+        """Event handler called when the export has been saved.
+
+        Args:
+            filename (str): the exported file
+        """
+
+        logging.info('Exported successfully raw data to {} file'.format(filename))
+
+    def on_export_step(self, step):
+        """Event handler called when an export step has been exported.
+
+        Args:
+            step (int): the number of steps exported so far
+        """
+
+        progress_bar.update(step)
+
+    def on_export_thread_finished(self):
+        """Event handler called when the export thread has finished, whatever its outcome.
+        """
+
+        self._cancel_export_button.setEnabled(False)
+
+        self._enable_data_edition(True)
+
+        self.statusBar().showMessage('')
 
     def on_import_excel_spreadsheet(self):
         """Event handler which import excel spread sheets which contains the raw data and the dynamic matrix.
         """
 
         # Pop up a file browser for selecting the workbooks
-        excel_file = QtWidgets.QFileDialog.getOpenFileName(self, 'Open excel files', '', 'Excel Files (*.xls *.xlsx)')[0]
+        excel_file = QtWidgets.QFileDialog.getOpenFileName(self, 'Open excel files', '', 'Excel Files (*.xlsx)')[0]
         if not excel_file:
             return
 
-        workbook = xlrd.open_workbook(excel_file)
-        sheet_names = workbook.sheet_names()
-        if 'Raw data' not in sheet_names or 'Groups' not in sheet_names:
-            logging.error('Invalid excel file: missing "Raw data" and/or "Groups" sheets')
-            return
-
         logging.info('Importing {} file. Please wait ...'.format(excel_file))
 
-        rawdata = pd.read_excel(excel_file, sheet_name='Raw data')
+        # The workbook is read once and only the sheets needed for restoring the session are streamed
+        sheets = collections.OrderedDict([('Raw data', True), ('Groups', True), ('Group control', False), ('Genes', True)])
+        try:
+            sheets = read_sheets(excel_file, sheets)
+        except Exception as error:
+            logging.error('Invalid excel file: {}'.format(error))
+            return
 
-        rawdata_model = self._rawdata_widget.model()
-        rawdata_model.rawdata = rawdata
+        if 'Raw data' not in sheets or 'Groups' not in sheets:
+            logging.error('Invalid excel file: missing "Raw data" and/or "Groups" sheets')
+            return
 
-        groups = pd.read_excel(excel_file, sheet_name='Groups')
+        groups = sheets['Groups']
         groups = groups.reindex(sorted(groups.columns), axis=1)
         groups = groups.astype(str)
-        self.groups_loaded.emit(rawdata_model.samples, groups)
 
-        group_control = pd.read_excel(excel_file, sheet_name='Group control', header=None)
-        group_control = group_control.astype(str)
-        if not group_control.empty:
-            self.group_control_loaded.emit(group_control.loc[0, 0])
+        group_control = sheets.get('Group control', pd.DataFrame()).astype(str)
+        group_control = group_control.loc[0, 0] if not group_control.empty else None
 
-        genes_per_group = pd.read_excel(excel_file, sheet_name='Genes')
-        self.genes_loaded.emit(rawdata_model.genes, genes_per_group)
+        self._load_session(sheets['Raw data'], groups, group_control=group_control, genes_per_group=sheets.get('Genes'))
 
         logging.info('... successfully imported {} file'.format(excel_file))
 
@@ -297,7 +622,8 @@ class MainWindow(QtWidgets.QMainWindow):
         """
 
         # Pop up a file browser for selecting the workbooks
-        data_files = QtWidgets.QFileDialog.getOpenFileNames(self, 'Open data files', '', 'Data Files (*.pdf *.PDF *.csv *.txt)')[0]
+        patterns = ' '.join(['*{} *{}'.format(extension, extension.upper()) for extension in get_extensions()])
+        data_files = QtWidgets.QFileDialog.getOpenFileNames(self, 'Open data files', '', 'Data Files ({})'.format(patterns))[0]
         if not data_files:
             return
 
@@ -337,12 +663,189 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.set_available_genes.emit(rawdata_model.genes)
 
+    def _add_curves_files(self, store, curves_files):
+        """Add a set of curves files to a curves store.
+
+        Args:
+            store (lightcycler.kernel.utils.amplification_curves.AmplificationCurvesStore): the store
+            curves_files (list of str): the curves files
+
+        Returns:
+            int: the number of files successfully added
+        """
+
+        n_curves_files = len(curves_files)
+        progress_bar.reset(n_curves_files)
+
+        n_loaded_files = 0
+
+        for progress, curves_file in enumerate(curves_files):
+
+            # Any kind of error must be caught here.
+            try:
+                self.statusBar().showMessage('Reading {} file ...'.format(curves_file))
+                store.add_file(curves_file)
+
+            except Exception as error:
+                logging.error(str(error))
+            else:
+                n_loaded_files += 1
+
+            progress_bar.update(progress+1)
+
+        self.statusBar().showMessage('')
+
+        return n_loaded_files
+
+    def on_open_amplification_curves_files(self):
+        """Opens and stores lightcycler amplification curves files.
+        """
+
+        # Pop up a file browser for selecting the amplification curves files
+        curves_files = QtWidgets.QFileDialog.getOpenFileNames(self, 'Open amplification curves files', '', 'Data Files (*.txt *.csv)')[0]
+        if not curves_files:
+            return
+
+        if self._amplification_curves_store is None:
+            self._amplification_curves_store = AmplificationCurvesStore(tempfile.mkdtemp(prefix='lightcycler_curves_'))
+
+        n_loaded_files = self._add_curves_files(self._amplification_curves_store, curves_files)
+
+        logging.info('Loaded successfully {} amplification curves file(s) out of {}'.format(n_loaded_files, len(curves_files)))
+
+    def on_open_melt_curves_files(self):
+        """Opens and stores lightcycler melt curves files.
+        """
+
+        # Pop up a file browser for selecting the melt curves files
+        curves_files = QtWidgets.QFileDialog.getOpenFileNames(self, 'Open melt curves files', '', 'Data Files (*.txt *.csv)')[0]
+        if not curves_files:
+            return
+
+        if self._melt_curves_store is None:
+            self._melt_curves_store = MeltCurvesStore(tempfile.mkdtemp(prefix='lightcycler_melt_curves_'))
+
+        n_loaded_files = self._add_curves_files(self._melt_curves_store, curves_files)
+
+        logging.info('Loaded successfully {} melt curves file(s) out of {}'.format(n_loaded_files, len(curves_files)))
+
+    def on_open_project(self):
+        """Event handler which opens a lightcycler project file.
+        """
+
+        filename = QtWidgets.QFileDialog.getOpenFileName(self, 'Open project file', '', 'Project files (*.lcp)')[0]
+        if not filename:
+            return
+
+        try:
+            rawdata, settings = load_project(filename)
+        except (OSError, ProjectError) as error:
+            logging.error(str(error))
+            return
+
+        groups = collections.OrderedDict([(group['name'], pd.Series(group['samples'], dtype=object)) for group in settings.get('groups', [])])
+
+        genes_per_group = pd.DataFrame({'reference': pd.Series(settings.get('reference genes', []), dtype=object),
+                                        'interest': pd.Series(settings.get('interest genes', []), dtype=object)})
+
+        self._load_session(rawdata,
+                           pd.DataFrame(groups),
+                           group_control=settings.get('group control'),
+                           genes_per_group=genes_per_group,
+                           cp_column=settings.get('cp column'),
+                           calibrators=settings.get('calibrators'))
+
+        # The groups are loaded as selected
+        groups_model = self._groups_widget.model()
+        for row, group in enumerate(settings.get('groups', [])):
+            if not group.get('selected', True):
+                groups_model.setData(groups_model.index(row), QtCore.Qt.Unchecked, QtCore.Qt.CheckStateRole)
+
+        # The ct powers are restored for initializing the ct power dialog of the next RQ matrix computation
+        if settings.get('ct powers') is not None:
+            self._genes_widget.model().set_ct_power_per_gene(settings['ct powers'])
+
+        logging.info('Opened successfully {} project file'.format(filename))
+
+    def on_save_project(self):
+        """Event handler which saves the session to a lightcycler project file.
+        """
+
+        rawdata_model = self._rawdata_widget.model()
+        if rawdata_model.rawdata.empty:
+            logging.error('No data loaded yet')
+            return
+
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(self, caption='Save project as ...', filter='Project files (*.lcp)')
+        if not filename:
+            return
+
+        basename, ext = os.path.splitext(filename)
+        if ext != '.lcp':
+            filename = basename + '.lcp'
+
+        groups_model = self._groups_widget.model()
+        genes_model = self._genes_widget.model()
+        genes_per_group = self._genes_widget.genes_per_group
+
+        settings = {'cp column': rawdata_model.cp_column,
+                    'calibrators': rawdata_model.calibrators,
+                    'groups': [{'name': group, 'samples': model.items, 'selected': selected} for group, model, selected in groups_model.groups],
+                    'group control': groups_model.group_control,
+                    'reference genes': genes_per_group['reference'].dropna().tolist(),
+                    'interest genes': genes_per_group['interest'].dropna().tolist(),
+                    'ct powers': genes_model.ct_power_per_gene}
+
+        try:
+            save_project(filename, rawdata_model.rawdata, settings)
+        except (OSError, ValueError) as error:
+            logging.error(str(error))
+        else:
+            logging.info('Saved successfully project to {} file'.format(filename))
+
+    def on_melt_curves_qc(self):
+        """Run the melt curves QC and exclude the wells which failed it from the dynamic matrices.
+        """
+
+        store = self._melt_curves_store
+        if store is None or len(store) == 0:
+            logging.error('No melt curves loaded yet')
+            return
+
+        dialog = MeltCurvesDialog(store, self)
+        if not dialog.exec_():
+            return
+
+        results = dialog.results
+        if results is None or not dialog.exclude_failed_wells:
+            return
+
+        rawdata_model = self._rawdata_widget.model()
+        rawdata_model.set_melt_qc(results, results['QC passed'].to_numpy())
+
+    def closeEvent(self, event):
+        """Event handler called when the main window is closed.
+
+        Args:
+            event (PyQt5.QtGui.QCloseEvent): the close event
+        """
+
+        # A running export is cancelled (its destination file is left untouched) before closing
+        if self._export_thread is not None and self._export_thread.isRunning():
+            self._export_thread.cancel()
+            self._export_thread.wait()
+
+        self._remove_curves_stores()
+
+        super(MainWindow, self).closeEvent(event)
+
     def on_quit_application(self):
         """Quit the application.
         """
 
         choice = QtWidgets.QMessageBox.question(self, 'Quit', "Do you really want to quit?", QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
         if choice == QtWidgets.QMessageBox.Yes:
+            self.close()
             sys.exit()
 
     def on_reset_data(self):
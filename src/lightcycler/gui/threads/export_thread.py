@@ -0,0 +1,89 @@
+"""This module implements the following classes:
+    - ExportThread
+"""
+
+from PyQt5 import QtCore
+
+from lightcycler.kernel.utils.excel_writer import ExportCancelledError, save_workbook
+
+
+class ExportThread(QtCore.QThread):
+    """This class implements a thread which exports a workbook in the background.
+
+    The export is made of a sequence of steps, each one writing one or more sheets to the workbook. The workbook is then
+    saved atomically so that a cancelled or failed export never leaves a partially written file. Any cancellable export
+    target (e.g. a tidy bundle) can be used in place of the workbook provided that the matching save function is given.
+    """
+
+    # Signal emitted when a step has been exported. The argument is the number of steps exported so far.
+    step_exported = QtCore.pyqtSignal(int)
+
+    # Signal emitted when the workbook has been saved. The argument is the filename.
+    export_finished = QtCore.pyqtSignal(str)
+
+    # Signal emitted when the export has been cancelled.
+    export_cancelled = QtCore.pyqtSignal()
+
+    # Signal emitted when the export has failed. The argument is the error message.
+    export_failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, workbook, filename, steps, parent=None, save=save_workbook):
+        """Constructor.
+
+        Args:
+            workbook (lightcycler.kernel.utils.excel_writer.ExportWorkbook): the write-only workbook
+            filename (str): the exported file
+            steps (list of callable): the export steps. Each step is called with the workbook as single argument.
+            parent (PyQt5.QtCore.QObject): the parent
+            save (callable): the function called with the workbook and the filename for saving the workbook
+        """
+
+        super(ExportThread, self).__init__(parent)
+
+        self._workbook = workbook
+
+        self._filename = filename
+
+        self._steps = steps
+
+        self._save = save
+
+    def cancel(self):
+        """Request the cancellation of the export.
+
+        The export stops at the next row written.
+        """
+
+        self._workbook.cancel()
+
+    @property
+    def n_steps(self):
+        """Return the number of export steps.
+
+        Returns:
+            int: the number of steps
+        """
+
+        return len(self._steps)
+
+    def run(self):
+        """Run the export.
+        """
+
+        try:
+            for i, step in enumerate(self._steps):
+                self._workbook.check_cancelled()
+                step(self._workbook)
+                self.step_exported.emit(i + 1)
+
+            self._workbook.check_cancelled()
+            self._save(self._workbook, self._filename)
+
+        except ExportCancelledError:
+            self.export_cancelled.emit()
+
+        except Exception as error:
+            self.export_failed.emit(str(error))
+
+        else:
+            self.export_finished.emit(self._filename)
@@ -45,13 +45,8 @@ class DroppableListView(QtWidgets.QListView):
 
         source_model.remove_items(dragged_items)
 
-        # # Drop only those items which are not present in this widget
-        current_items = [target_model.data(target_model.index(i), QtCore.Qt.DisplayRole) for i in range(target_model.rowCount())]
-        for name in dragged_items:
-            if name in current_items:
-                continue
-
-            target_model.add_item(name)
+        # Drop all the items in one go. The items already present in this widget are skipped by the model.
+        target_model.add_items(dragged_items)
 
     def keyPressEvent(self, event):
         """Event handler for keyboard interaction.
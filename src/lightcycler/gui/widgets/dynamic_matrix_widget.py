@@ -1,6 +1,8 @@
 import collections
 import logging
 
+import numpy as np
+
 import pandas as pd
 
 from PyQt5 import QtCore, QtWidgets
@@ -11,6 +13,8 @@ from lightcycler.kernel.models.dynamic_matrix_model import DynamicMatrixModel
 from lightcycler.kernel.models.n_values_data_model import NValuesDataModel
 from lightcycler.kernel.models.pandas_data_model import PandasDataModel
 from lightcycler.kernel.models.stds_data_model import StdsDataModel
+from lightcycler.kernel.utils.results_cache import ResultsCache
+from lightcycler.kernel.utils.tidy_export import to_long_form
 from lightcycler.gui.widgets.checkable_combobox import CheckableComboBox
 
 
@@ -30,6 +34,11 @@ class DynamicMatrixWidget(QtWidgets.QWidget):
         # The values stored by the pandas dataframe are lists of CP values computed from the raw data.
         self._dynamic_matrices = collections.OrderedDict()
 
+        # The statistics tables of the dynamic matrices computed so far. The keys are the genes. It is shared between the
+        # display and the export and cleared each time the dynamic matrices are rebuilt. The statistics of the least recently
+        # used genes are dropped beyond 128 genes and recomputed on demand.
+        self._statistics = ResultsCache(max_size=128)
+
         self._init_ui()
 
     def _build_events(self):
@@ -93,6 +102,18 @@ class DynamicMatrixWidget(QtWidgets.QWidget):
         self._selected_zones_combobox = CheckableComboBox()
         self._selected_zones_combobox.addItems([''.join(z) for z in DynamicMatrixModel.zones])
 
+    def _get_statistics(self, gene):
+        """Return the statistics tables of the dynamic matrix of a gene, computing them if they are not cached yet.
+
+        Args:
+            gene (str): the gene
+
+        Returns:
+            collections.OrderedDict: the statistics tables
+        """
+
+        return self._statistics.get(gene, DynamicMatrixModel.compute_statistics, self._dynamic_matrices[gene])
+
     def _init_ui(self):
         """Initialize the ui.
         """
@@ -101,23 +122,65 @@ class DynamicMatrixWidget(QtWidgets.QWidget):
         self._build_layout()
         self._build_events()
 
-    def export(self, workbook):
+    def _iter_cell_statistics(self):
+        """Iterate over the long-form statistics tables of the dynamic matrix of each gene.
+
+        Returns:
+            generator: the (pandas.DataFrame) statistics table of each gene
+        """
+
+        for gene in self._dynamic_matrices.keys():
+            statistics = self._get_statistics(gene)
+            averages = statistics['Averages']
+            yield to_long_form([('gene', [gene]), ('zone', averages.index), ('sample', averages.columns)],
+                               [('mean', averages.to_numpy(dtype=np.float64)),
+                                ('stddev', statistics['Std Devs'].to_numpy(dtype=np.float64)),
+                                ('n', statistics['N values'].to_numpy(dtype=np.int64)),
+                                ('difference', statistics['Difference'].to_numpy(dtype=np.float64))])
+
+    def export(self, workbook, genes=None):
         """Export the dynamic matrix and the statistics tables to an excel workbook.
 
         Args:
             workbook (openpyxl.workbook.workbook.Workbook): the workbook
+            genes (list of str): the genes to export. If None, all the genes are exported.
         """
 
+        if genes is None:
+            genes = list(self._dynamic_matrices.keys())
+
         # Loop over the gene
-        for gene, df in self._dynamic_matrices.items():
+        for gene in genes:
 
-            # Create a dynamic matrix model with the current dynamic matrix
+            # Create a dynamic matrix model with the current dynamic matrix and the statistics computed for the display
             model = DynamicMatrixModel()
-            model.dynamic_matrix = df
+            model.dynamic_matrix = self._dynamic_matrices[gene]
+            model.statistics = self._get_statistics(gene)
 
             # Export the data
             model.export(workbook, gene)
 
+    def export_tidy(self, bundle):
+        """Export the statistics of each entry of the dynamic matrices to the cell statistics table of a tidy bundle.
+
+        The table has one row per gene, zone and sample and is streamed one gene at a time.
+
+        Args:
+            bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
+        """
+
+        bundle.write_table('cell_statistics', self._iter_cell_statistics())
+
+    @property
+    def genes(self):
+        """Return the genes of the dynamic matrices.
+
+        Returns:
+            list of str: the genes
+        """
+
+        return list(self._dynamic_matrices.keys())
+
     def on_select_gene(self, gene):
         """Update the averages, stds and n values tables with the newly selected gene.
 
@@ -139,6 +202,7 @@ class DynamicMatrixWidget(QtWidgets.QWidget):
         else:
             # Update the dynamic matrix model with the dynamic matrix corresponding to the selected gene
             dynamic_matrix_model.dynamic_matrix = self._dynamic_matrices[selected_gene]
+            dynamic_matrix_model.statistics = self._get_statistics(selected_gene)
 
             # Fetch the checked zones from the corresponding combo box
             selected_zones = [item.text() for item in self._selected_zones_combobox.checked_items()]
@@ -174,8 +238,16 @@ class DynamicMatrixWidget(QtWidgets.QWidget):
 
         self._dynamic_matrices.clear()
 
+        self._statistics.clear()
+
         rawdata = rawdata_model.rawdata
 
+        # The CP values, calibrated across runs if some calibrators are set
+        cp_values = rawdata_model.cp_values
+
+        # The raw data which failed the quality controls are excluded
+        qc_mask = rawdata_model.qc_mask
+
         # Fetch the list of genes from the rawdata
         genes = sorted(list(collections.OrderedDict.fromkeys(rawdata['Gene']))) if 'Gene' in rawdata.columns else []
         if not genes:
@@ -187,16 +259,30 @@ class DynamicMatrixWidget(QtWidgets.QWidget):
         # The zones for which the dynamic matrices will be computed
         zones = [''.join(z) for z in DynamicMatrixModel.zones]
 
-        # Loop over the genes and compute a dataframe for each gene
-        for gene in genes:
-            self._dynamic_matrices[gene] = pd.DataFrame(None, index=zones, columns=samples)
-            # Loop over the zones
-            for zone in zones:
-                # Loop over the samples
-                for sample in samples:
-                    # Create a filter for the rawdata parts which match the running gene, sample and zone
-                    fylter = rawdata['Gene'].isin([gene]) & rawdata['Name'].isin([sample]) & rawdata['Zone'].isin(tuple(zone))
-                    self._dynamic_matrices[gene].loc[zone, sample] = rawdata['CP'][fylter].tolist()
+        gene_indexes = dict([(gene, i) for i, gene in enumerate(genes)])
+        sample_indexes = dict([(sample, i) for i, sample in enumerate(samples)])
+
+        # Each entry of the dynamic matrices starts as an empty list of CP values
+        cells = np.empty((len(genes), len(zones), len(samples)), dtype=object)
+        for index in np.ndindex(cells.shape):
+            cells[index] = []
+
+        # The CP values are dispatched to their gene and sample in a single pass over the raw data per zone, each list
+        # keeping the order of the raw data. The raw data index may have duplicates hence the filtering is made on arrays.
+        for j, zone in enumerate(zones):
+            if cells.size == 0:
+                break
+            fylter = (rawdata['Zone'].isin(tuple(zone)) & qc_mask).to_numpy()
+            if not fylter.any():
+                continue
+            entries = [rawdata['Gene'].to_numpy()[fylter], rawdata['Name'].to_numpy()[fylter]]
+            cp_values_per_entry = pd.Series(cp_values.to_numpy()[fylter]).groupby(entries, sort=False).agg(list)
+            for (gene, sample), values in cp_values_per_entry.items():
+                cells[gene_indexes[gene], j, sample_indexes[sample]] = values
+
+        # Build a dataframe for each gene
+        for i, gene in enumerate(genes):
+            self._dynamic_matrices[gene] = pd.DataFrame(cells[i], index=zones, columns=samples)
 
         # Update the selected gene combobox
         self._selected_gene_combobox.clear()
@@ -8,12 +8,15 @@ from lightcycler.kernel.models.pandas_data_model import PandasDataModel
 
 class GeneDataFrameWidget(QtWidgets.QWidget):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, label='Gene', **kwargs):
 
         super(GeneDataFrameWidget, self).__init__(*args, **kwargs)
 
         self._matrices = collections.OrderedDict()
 
+        # The label of the combo box used for selecting a matrix
+        self._label = label
+
         self._init_ui()
 
     def _build_events(self):
@@ -45,7 +48,7 @@ class GeneDataFrameWidget(QtWidgets.QWidget):
 
         self._matrix_tableview = CopyPastableTableView(delimiter=',')
 
-        self._selected_gene_label = QtWidgets.QLabel('Gene')
+        self._selected_gene_label = QtWidgets.QLabel(self._label)
         self._selected_gene_combobox = QtWidgets.QComboBox()
 
     def _init_ui(self):
@@ -1,8 +1,11 @@
 import logging
 
+import pandas as pd
+
 from PyQt5 import QtCore, QtWidgets
 
 from lightcycler.gui.dialogs.ct_power_dialog import CTPowerDialog
+from lightcycler.gui.dialogs.standard_curves_dialog import StandardCurvesDialog
 from lightcycler.gui.views.droppable_listview import DroppableListView
 from lightcycler.gui.widgets.gene_dataframe_widget import GeneDataFrameWidget
 from lightcycler.kernel.models.available_genes_model import AvailableGenesModel
@@ -21,6 +24,9 @@ class GenesWidget(QtWidgets.QWidget):
 
         self._genes_model = None
 
+        # The ct powers estimated from the standard curves. They are used for pre-filling the ct power dialog.
+        self._estimated_ct_powers = {}
+
         self._init_ui()
 
     def _build_events(self):
@@ -29,6 +35,9 @@ class GenesWidget(QtWidgets.QWidget):
 
         self._reset_genes_pushbutton.clicked.connect(self.on_reset)
         self._compute_rq_matrix_pushbutton.clicked.connect(self.on_compute_rq_matrix)
+        self._compute_stability_pushbutton.clicked.connect(self.on_compute_stability)
+        self._fit_standard_curves_pushbutton.clicked.connect(self.on_fit_standard_curves)
+        self._absolute_quantification_pushbutton.clicked.connect(self.on_compute_absolute_quantification)
 
     def _build_layout(self):
         """Build the layout of the widget.
@@ -59,7 +68,10 @@ class GenesWidget(QtWidgets.QWidget):
 
         rq_matrix_layout = QtWidgets.QHBoxLayout()
 
+        rq_matrix_layout.addWidget(self._fit_standard_curves_pushbutton, stretch=1)
         rq_matrix_layout.addWidget(self._compute_rq_matrix_pushbutton, stretch=4)
+        rq_matrix_layout.addWidget(self._compute_stability_pushbutton, stretch=1)
+        rq_matrix_layout.addWidget(self._absolute_quantification_pushbutton, stretch=1)
 
         main_layout.addLayout(rq_matrix_layout)
 
@@ -94,6 +106,12 @@ class GenesWidget(QtWidgets.QWidget):
 
         self._compute_rq_matrix_pushbutton = QtWidgets.QPushButton('Compute RQ matrix')
 
+        self._compute_stability_pushbutton = QtWidgets.QPushButton('Rank reference genes')
+
+        self._fit_standard_curves_pushbutton = QtWidgets.QPushButton('Fit standard curves')
+
+        self._absolute_quantification_pushbutton = QtWidgets.QPushButton('Absolute quantification')
+
         self._tabs = QtWidgets.QTabWidget()
 
         self._delta_ct_matrices_widget = GeneDataFrameWidget(self)
@@ -101,12 +119,22 @@ class GenesWidget(QtWidgets.QWidget):
         self._geom_means_widget = QtWidgets.QTableView()
         self._ratio_matrices_widget = GeneDataFrameWidget(self)
         self._ratio_matrices_per_group_widget = GeneDataFrameWidget(self)
+        self._stability_widget = GeneDataFrameWidget(self, label='Zone')
+        self._pairwise_variations_widget = GeneDataFrameWidget(self, label='Zone')
+        self._standard_curves_widget = QtWidgets.QTableView()
+        self._copy_matrices_widget = GeneDataFrameWidget(self)
+        self._copy_matrices_per_group_widget = GeneDataFrameWidget(self)
 
         self._tabs.addTab(self._delta_ct_matrices_widget, 'Delta CT matrix')
         self._tabs.addTab(self._pow_delta_ct_matrices_widget, 'Pow Delta CT matrix')
         self._tabs.addTab(self._geom_means_widget, 'Geom. means')
         self._tabs.addTab(self._ratio_matrices_widget, 'Ratio matrix')
         self._tabs.addTab(self._ratio_matrices_per_group_widget, 'Ratio per group')
+        self._tabs.addTab(self._stability_widget, 'Genes stability')
+        self._tabs.addTab(self._pairwise_variations_widget, 'Pairwise variation')
+        self._tabs.addTab(self._standard_curves_widget, 'Standard curves')
+        self._tabs.addTab(self._copy_matrices_widget, 'Copy matrix')
+        self._tabs.addTab(self._copy_matrices_per_group_widget, 'Copies per group')
 
     def _init_ui(self):
         """Initialize the ui.
@@ -142,9 +170,15 @@ class GenesWidget(QtWidgets.QWidget):
         rawdata_model = self._main_window.rawdata_widget.model()
         genes = rawdata_model.genes
 
-        dialog = CTPowerDialog(genes)
+        # Start from the ct powers used for the last computation so that only the modified ones trigger a recomputation.
+        # The ct powers estimated from the standard curves fitted since then take precedence.
+        ct_powers = dict(self._genes_model.ct_power_per_gene or {})
+        ct_powers.update(self._estimated_ct_powers)
+
+        dialog = CTPowerDialog(genes, ct_powers)
 
         if dialog.exec_():
+            self._estimated_ct_powers = {}
             self._genes_model.set_ct_power_per_gene(dialog.ct_powers)
             self._genes_model.compute_rq_matrix()
             self._delta_ct_matrices_widget.set_matrices(self._genes_model.delta_ct_matrices)
@@ -153,6 +187,55 @@ class GenesWidget(QtWidgets.QWidget):
             self._ratio_matrices_widget.set_matrices(self._genes_model.ratio_matrices)
             self._ratio_matrices_per_group_widget.set_matrices(self._genes_model.ratio_matrices_per_group)
 
+    def on_fit_standard_curves(self):
+        """Fit the standard curves of the dilution series for estimating the ct power of each gene.
+        """
+
+        rawdata_model = self._main_window.rawdata_widget.model()
+
+        dialog = StandardCurvesDialog(rawdata_model, self)
+
+        if dialog.exec_():
+            self._estimated_ct_powers = dialog.ct_powers
+            logging.info('Estimated the ct power of {} gene(s) from the standard curves'.format(len(self._estimated_ct_powers)))
+
+    def on_compute_absolute_quantification(self):
+        """Compute the copy number matrices from the standard curves of the dilution series.
+        """
+
+        rawdata_model = self._main_window.rawdata_widget.model()
+
+        dialog = StandardCurvesDialog(rawdata_model, self)
+
+        if not dialog.exec_():
+            return
+
+        if not dialog.concentrations:
+            logging.error('No standard curves fitted')
+            return
+
+        self._genes_model.compute_absolute_quantification(dialog.concentrations)
+
+        self._standard_curves_widget.setModel(PandasDataModel(self._genes_model.standard_curves.round(3), self))
+        self._copy_matrices_widget.set_matrices(self._genes_model.copy_matrices)
+        self._copy_matrices_per_group_widget.set_matrices(self._genes_model.copy_matrices_per_group)
+
+        self._tabs.setCurrentWidget(self._copy_matrices_widget)
+
+    def on_compute_stability(self):
+        """Compute the expression stability of the genes for helping in the choice of the reference genes.
+        """
+
+        stability_per_zone, pairwise_variations_per_zone = self._genes_model.compute_stability()
+        if not stability_per_zone:
+            logging.error('No data loaded yet')
+            return
+
+        self._stability_widget.set_matrices(stability_per_zone)
+        self._pairwise_variations_widget.set_matrices(pairwise_variations_per_zone)
+
+        self._tabs.setCurrentWidget(self._stability_widget)
+
     def export(self, workbook):
         """Event handler which export the raw data to an excel spreadsheet.
 
@@ -162,6 +245,28 @@ class GenesWidget(QtWidgets.QWidget):
 
         self._genes_model.export(workbook)
 
+    def export_tidy(self, bundle):
+        """Export the genes and the RQ to a tidy bundle.
+
+        Args:
+            bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
+        """
+
+        self._genes_model.export_tidy(bundle)
+
+    @property
+    def genes_per_group(self):
+        """Return the reference and interest genes.
+
+        Returns:
+            pandas.DataFrame: the reference and interest genes stored resp. in the reference and interest columns
+        """
+
+        reference_genes = self._reference_genes_listview.model().items
+        interest_genes = self._interest_genes_listview.model().items
+
+        return pd.DataFrame({'reference': pd.Series(reference_genes, dtype=object), 'interest': pd.Series(interest_genes, dtype=object)})
+
     def on_clear(self):
         """Event handler which resets all the groups defined so far.
         """
@@ -207,13 +312,11 @@ class GenesWidget(QtWidgets.QWidget):
         if 'reference' in genes_per_group.columns and 'interest' in genes_per_group.columns:
             reference_genes_model = self._reference_genes_listview.model()
             reference_genes = genes_per_group['reference'].dropna()
-            for gene in reference_genes:
-                reference_genes_model.add_item(gene)
+            reference_genes_model.add_items(reference_genes)
 
             interest_genes_model = self._interest_genes_listview.model()
             interest_genes = genes_per_group['interest'].dropna()
-            for gene in interest_genes:
-                interest_genes_model.add_item(gene)
+            interest_genes_model.add_items(interest_genes)
 
         available_genes_model = AvailableGenesModel(self)
         available_genes_model.genes = genes
@@ -1,9 +1,9 @@
 import collections
 import logging
+import os
 
 from PyQt5 import QtCore, QtWidgets
 
-from lightcycler.gui.dialogs.means_and_errors_dialog import MeansAndErrorsDialog
 from lightcycler.gui.dialogs.group_contents_dialog import GroupContentsDialog
 from lightcycler.gui.dialogs.grubbs_data_dialog import GrubbsDataDialog
 from lightcycler.gui.views.copy_pastable_tableview import CopyPastableTableView
@@ -11,7 +11,10 @@ from lightcycler.gui.views.droppable_listview import DroppableListView
 from lightcycler.gui.views.groups_listview import GroupsListView
 from lightcycler.kernel.models.available_samples_model import AvailableSamplesModel
 from lightcycler.kernel.models.groups_model import GroupsModel
+from lightcycler.kernel.models.pandas_data_model import PandasDataModel
 from lightcycler.kernel.models.pvalues_data_model import PValuesDataModel
+from lightcycler.kernel.utils.group_tests import EFFECT_SIZES, GROUP_TESTS
+from lightcycler.kernel.utils.multiple_testing import ADJUSTMENT_METHODS
 
 
 class GroupsWidget(QtWidgets.QWidget):
@@ -28,6 +31,12 @@ class GroupsWidget(QtWidgets.QWidget):
 
         self._student_test_per_gene = collections.OrderedDict()
 
+        self._family_wide_student_test_per_gene = collections.OrderedDict()
+
+        self._effect_sizes_per_gene = collections.OrderedDict()
+
+        self._resampling_per_gene = collections.OrderedDict()
+
     def _build_events(self):
         """Build the events related with the widget.
         """
@@ -37,6 +46,7 @@ class GroupsWidget(QtWidgets.QWidget):
         self._new_group_pushbutton.clicked.connect(self.on_create_new_group)
         self._reset_groups_pushbutton.clicked.connect(self.on_clear)
         self._run_ttest_pushbutton.clicked.connect(self.on_run_student_test)
+        self._run_resampling_pushbutton.clicked.connect(self.on_run_resampling)
         self._selected_gene_combobox.currentTextChanged.connect(self.on_select_gene)
         self._selected_zone_combobox.currentTextChanged.connect(self.on_select_zone)
         self._plot_statistics_button.clicked.connect(self.on_plot_statistics)
@@ -70,7 +80,19 @@ class GroupsWidget(QtWidgets.QWidget):
 
         main_layout.addLayout(groups_layout)
 
-        main_layout.addWidget(self._run_ttest_pushbutton)
+        hlayout = QtWidgets.QHBoxLayout()
+        hlayout.addWidget(self._selected_test_label)
+        hlayout.addWidget(self._selected_test_combobox)
+        hlayout.addWidget(self._family_wide_correction_label)
+        hlayout.addWidget(self._family_wide_correction_combobox)
+        hlayout.addWidget(self._run_ttest_pushbutton, stretch=1)
+        main_layout.addLayout(hlayout)
+
+        hlayout = QtWidgets.QHBoxLayout()
+        hlayout.addWidget(self._n_resamples_label)
+        hlayout.addWidget(self._n_resamples_spinbox)
+        hlayout.addWidget(self._run_resampling_pushbutton, stretch=1)
+        main_layout.addLayout(hlayout)
 
         hlayout = QtWidgets.QHBoxLayout()
         hlayout.addWidget(self._selected_gene_label)
@@ -111,7 +133,24 @@ class GroupsWidget(QtWidgets.QWidget):
 
         self._reset_groups_pushbutton = QtWidgets.QPushButton('Reset groups')
 
-        self._run_ttest_pushbutton = QtWidgets.QPushButton('Run student test')
+        self._selected_test_label = QtWidgets.QLabel('Test')
+        self._selected_test_combobox = QtWidgets.QComboBox()
+        self._selected_test_combobox.addItems(GROUP_TESTS)
+
+        self._family_wide_correction_label = QtWidgets.QLabel('Family-wide correction')
+        self._family_wide_correction_combobox = QtWidgets.QComboBox()
+        self._family_wide_correction_combobox.addItems(ADJUSTMENT_METHODS)
+
+        self._run_ttest_pushbutton = QtWidgets.QPushButton('Run test')
+
+        self._n_resamples_label = QtWidgets.QLabel('Resamples')
+        self._n_resamples_spinbox = QtWidgets.QSpinBox()
+        self._n_resamples_spinbox.setMinimum(100)
+        self._n_resamples_spinbox.setMaximum(1000000)
+        self._n_resamples_spinbox.setSingleStep(1000)
+        self._n_resamples_spinbox.setValue(10000)
+
+        self._run_resampling_pushbutton = QtWidgets.QPushButton('Run bootstrap and permutation tests')
 
         self._selected_gene_label = QtWidgets.QLabel('Gene')
         self._selected_gene_combobox = QtWidgets.QComboBox()
@@ -128,7 +167,98 @@ class GroupsWidget(QtWidgets.QWidget):
         self._tabs.addTab(self._statistics_tableview, 'Statistics')
 
         self._student_test_tableview = CopyPastableTableView(delimiter=',')
-        self._tabs.addTab(self._student_test_tableview, 'Student tests')
+        self._family_wide_student_test_tableview = CopyPastableTableView(delimiter=',')
+
+        student_tests_widget = QtWidgets.QWidget()
+        student_tests_layout = QtWidgets.QHBoxLayout()
+        vlayout = QtWidgets.QVBoxLayout()
+        vlayout.addWidget(QtWidgets.QLabel('Holm-adjusted per gene and zone'))
+        vlayout.addWidget(self._student_test_tableview)
+        student_tests_layout.addLayout(vlayout)
+        vlayout = QtWidgets.QVBoxLayout()
+        vlayout.addWidget(QtWidgets.QLabel('Adjusted over all genes and zones'))
+        vlayout.addWidget(self._family_wide_student_test_tableview)
+        student_tests_layout.addLayout(vlayout)
+        student_tests_widget.setLayout(student_tests_layout)
+        self._tabs.addTab(student_tests_widget, 'Student tests')
+
+        self._cohen_d_tableview = CopyPastableTableView(delimiter=',')
+        self._tabs.addTab(self._cohen_d_tableview, "Cohen's d")
+
+        self._hedges_g_tableview = CopyPastableTableView(delimiter=',')
+        self._tabs.addTab(self._hedges_g_tableview, "Hedges' g")
+
+        self._fold_change_tableview = CopyPastableTableView(delimiter=',')
+        self._tabs.addTab(self._fold_change_tableview, 'CP fold change (95% CI)')
+
+        self._permutation_tableview = CopyPastableTableView(delimiter=',')
+        self._bootstrap_tableview = CopyPastableTableView(delimiter=',')
+
+        resampling_widget = QtWidgets.QWidget()
+        resampling_layout = QtWidgets.QHBoxLayout()
+        vlayout = QtWidgets.QVBoxLayout()
+        vlayout.addWidget(QtWidgets.QLabel('Permutation p-values'))
+        vlayout.addWidget(self._permutation_tableview)
+        resampling_layout.addLayout(vlayout)
+        vlayout = QtWidgets.QVBoxLayout()
+        vlayout.addWidget(QtWidgets.QLabel('Mean difference (bootstrap 95% CI)'))
+        vlayout.addWidget(self._bootstrap_tableview)
+        resampling_layout.addLayout(vlayout)
+        resampling_widget.setLayout(resampling_layout)
+        self._tabs.addTab(resampling_widget, 'Resampling')
+
+    def _update_effect_sizes(self, gene, zone):
+        """Update the effect sizes table views for a given gene and zone.
+
+        Args:
+            gene (str): the gene
+            zone (str): the zone
+        """
+
+        if gene not in self._effect_sizes_per_gene.get('cp fold change', {}):
+            return
+
+        if zone not in self._effect_sizes_per_gene['cp fold change'][gene]:
+            return
+
+        cohen_d_df = self._effect_sizes_per_gene["cohen's d"][gene][zone]
+        self._cohen_d_tableview.setModel(PandasDataModel(cohen_d_df.round(3), self))
+
+        hedges_g_df = self._effect_sizes_per_gene["hedges' g"][gene][zone]
+        self._hedges_g_tableview.setModel(PandasDataModel(hedges_g_df.round(3), self))
+
+        # Each CP fold change is displayed along with its confidence interval
+        fold_change_df = self._effect_sizes_per_gene['cp fold change'][gene][zone]
+        lower_bound_df = self._effect_sizes_per_gene['cp fold change lower bound'][gene][zone]
+        upper_bound_df = self._effect_sizes_per_gene['cp fold change upper bound'][gene][zone]
+        fold_change_df = (fold_change_df.round(3).astype(str) +
+                          ' [' + lower_bound_df.round(3).astype(str) + ', ' + upper_bound_df.round(3).astype(str) + ']')
+        self._fold_change_tableview.setModel(PandasDataModel(fold_change_df, self))
+
+    def _update_resampling(self, gene, zone):
+        """Update the resampling table views for a given gene and zone.
+
+        Args:
+            gene (str): the gene
+            zone (str): the zone
+        """
+
+        if gene not in self._resampling_per_gene.get('permutation p-value', {}):
+            return
+
+        if zone not in self._resampling_per_gene['permutation p-value'][gene]:
+            return
+
+        permutation_df = self._resampling_per_gene['permutation p-value'][gene][zone]
+        self._permutation_tableview.setModel(PValuesDataModel(permutation_df, self))
+
+        # Each mean difference is displayed along with its bootstrap confidence interval
+        difference_df = self._resampling_per_gene['mean difference'][gene][zone]
+        lower_bound_df = self._resampling_per_gene['mean difference lower bound'][gene][zone]
+        upper_bound_df = self._resampling_per_gene['mean difference upper bound'][gene][zone]
+        difference_df = (difference_df.round(3).astype(str) +
+                         ' [' + lower_bound_df.round(3).astype(str) + ', ' + upper_bound_df.round(3).astype(str) + ']')
+        self._bootstrap_tableview.setModel(PandasDataModel(difference_df, self))
 
     def _init_ui(self):
         """Initialize the ui.
@@ -151,6 +281,19 @@ class GroupsWidget(QtWidgets.QWidget):
 
         model.export(workbook)
 
+    def export_tidy(self, bundle):
+        """Export the groups, their statistics and the group tests to a tidy bundle.
+
+        Args:
+            bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
+        """
+
+        model = self._groups_listview.model()
+        if model is None:
+            return
+
+        model.export_tidy(bundle)
+
     @property
     def groups_listview(self):
         """Getter for _groups_listview attribute.
@@ -214,8 +357,8 @@ class GroupsWidget(QtWidgets.QWidget):
         groups_model = self._groups_listview.model()
         groups_model.load_groups(groups)
 
-        # Coerce the dtype to str in case of empty dataframe to avoid FutureWarning
-        filtered_samples = [sample for sample in samples if sample in groups.values.astype(str)]
+        groups_per_sample = groups_model.groups_per_sample
+        filtered_samples = [sample for sample in samples if sample in groups_per_sample]
 
         available_samples_model = AvailableSamplesModel(self)
         available_samples_model.samples = samples
@@ -242,11 +385,28 @@ class GroupsWidget(QtWidgets.QWidget):
         if not self._statistics:
             return
 
+        # matplotlib is only loaded when the statistics are plotted
+        from lightcycler.gui.dialogs.means_and_errors_dialog import MeansAndErrorsDialog
+
         means_and_errors_dialog = MeansAndErrorsDialog(self._statistics, self)
         means_and_errors_dialog.show()
 
+    def on_run_resampling(self):
+        """Event handler which performs the bootstrap and permutation tests on the groups defined so far.
+        """
+
+        groups_model = self._groups_listview.model()
+
+        # The genes are spread over all the available cores
+        self._resampling_per_gene = groups_model.run_resampling(n_resamples=self._n_resamples_spinbox.value(), n_workers=os.cpu_count())
+
+        gene = self._selected_gene_combobox.currentText()
+        zone = self._selected_zone_combobox.currentText()
+        if gene and zone:
+            self._update_resampling(gene, zone)
+
     def on_run_student_test(self):
-        """Event handler which will performs pairwise student test on the groups defined so far.
+        """Event handler which will performs the selected pairwise test on the groups defined so far.
         """
 
         groups_model = self._groups_listview.model()
@@ -255,8 +415,20 @@ class GroupsWidget(QtWidgets.QWidget):
         # Compute the statistics
         self._statistics = groups_model.get_statistics(selected_groups=selected_groups)
 
-        # Perform the student test for the selected groups
-        self._student_test_per_gene = groups_model.run_student_test()
+        # Perform the selected test for the selected groups
+        test = self._selected_test_combobox.currentText()
+        self._student_test_per_gene = groups_model.run_group_tests(test)
+
+        # Adjust the p-values of the test over all the genes and zones at once
+        groups_model.family_wide_correction = self._family_wide_correction_combobox.currentText()
+        self._family_wide_student_test_per_gene = groups_model.run_group_tests(test,
+                                                                               p_adjust=groups_model.family_wide_correction,
+                                                                               family_wide=True)
+
+        # Compute the effect sizes between the selected groups
+        self._effect_sizes_per_gene = collections.OrderedDict()
+        for effect_size in EFFECT_SIZES:
+            self._effect_sizes_per_gene[effect_size] = groups_model.get_effect_sizes_per_gene(effect_size)
 
         # Update the selected gene and zone combo boxes
         self._selected_gene_combobox.clear()
@@ -279,8 +451,17 @@ class GroupsWidget(QtWidgets.QWidget):
         statistics_df = self._statistics[gene][zone]
         self._statistics_tableview.setModel(PValuesDataModel(statistics_df, self))
 
-        student_test_df = self._student_test_per_gene[gene][zone]
-        self._student_test_tableview.setModel(PValuesDataModel(student_test_df, self))
+        student_test_df = self._student_test_per_gene[gene].get(zone)
+        if student_test_df is not None:
+            self._student_test_tableview.setModel(PValuesDataModel(student_test_df, self))
+
+        family_wide_student_test_df = self._family_wide_student_test_per_gene[gene].get(zone)
+        if family_wide_student_test_df is not None:
+            self._family_wide_student_test_tableview.setModel(PValuesDataModel(family_wide_student_test_df, self))
+
+        self._update_effect_sizes(gene, zone)
+
+        self._update_resampling(gene, zone)
 
     def on_select_group(self, idx):
         """Event handler which select a new group.
@@ -314,8 +495,17 @@ class GroupsWidget(QtWidgets.QWidget):
         statistics_df = self._statistics[gene][zone]
         self._statistics_tableview.setModel(PValuesDataModel(statistics_df, self))
 
-        student_test_df = self._student_test_per_gene[gene][zone]
-        self._student_test_tableview.setModel(PValuesDataModel(student_test_df, self))
+        student_test_df = self._student_test_per_gene[gene].get(zone)
+        if student_test_df is not None:
+            self._student_test_tableview.setModel(PValuesDataModel(student_test_df, self))
+
+        family_wide_student_test_df = self._family_wide_student_test_per_gene[gene].get(zone)
+        if family_wide_student_test_df is not None:
+            self._family_wide_student_test_tableview.setModel(PValuesDataModel(family_wide_student_test_df, self))
+
+        self._update_effect_sizes(gene, zone)
+
+        self._update_resampling(gene, zone)
 
     def on_update_samples_and_groups(self, rawdata_model):
         """Update the available sample listview and the group contents listview with a change in rawdata.
@@ -326,16 +516,11 @@ class GroupsWidget(QtWidgets.QWidget):
 
         groups_model = self._groups_listview.model()
 
-        groups_contents = [model.items for _, model, _ in groups_model.groups]
+        samples = rawdata_model.samples
 
         # Update the available samples listview by removing from the samples the ones that are present in a group
-        filtered_samples = []
-        for s in rawdata_model.samples:
-            for gc in groups_contents:
-                if s in gc:
-                    break
-            else:
-                filtered_samples.append(s)
+        groups_per_sample = groups_model.groups_per_sample
+        filtered_samples = [s for s in samples if s not in groups_per_sample]
 
         available_samples_model = AvailableSamplesModel(self)
         available_samples_model.samples = filtered_samples
@@ -343,11 +528,9 @@ class GroupsWidget(QtWidgets.QWidget):
 
         # Update the group contents listview by removing from the group contents of
         # each group the samples which are not present in the input samples list
+        samples = set(samples)
         for _, model, _ in groups_model.groups:
-            to_be_deleted = []
-            for s in model.items:
-                if s not in rawdata_model.samples:
-                    to_be_deleted.append(s)
+            to_be_deleted = [s for s in model.items if s not in samples]
             model.remove_items(to_be_deleted)
 
     def on_sort_groups(self):
@@ -39,23 +39,39 @@ class EnhancedTextEdit(QtWidgets.QPlainTextEdit):
             fin.write(self.toPlainText())
 
 
-class QTextEditLogger(logging.Handler):
+class QTextEditLogger(logging.Handler, QtCore.QObject):
     """This class implements a QTextEdit based handler for the application's logger.
 
-    Every logging call will be written in the QTextEdit. The logbook can be saved to a text file or cleared.
+    Every logging call will be written in the QTextEdit. The logbook can be saved to a text file or cleared. The messages
+    logged from a background thread are forwarded to the GUI thread through a signal.
     """
 
+    # Signal emitted when a message has been logged.
+    message_logged = QtCore.pyqtSignal(str)
+
     def __init__(self, parent):
 
-        super().__init__()
+        logging.Handler.__init__(self)
+        QtCore.QObject.__init__(self)
         self._widget = EnhancedTextEdit(parent)
         self._widget.setReadOnly(True)
 
+        self.message_logged.connect(self.on_log_message)
+
     def emit(self, record):
         """
         """
 
         msg = self.format(record)
+        self.message_logged.emit(msg)
+
+    def on_log_message(self, msg):
+        """Write a logged message in the QTextEdit.
+
+        Args:
+            msg (str): the message
+        """
+
         self._widget.appendPlainText(msg)
         # Will act as a flush
         self._widget.repaint()
@@ -51,6 +51,20 @@ class RawDataWidget(QtWidgets.QWidget):
 
         model.export(workbook)
 
+    def export_tidy(self, bundle):
+        """Export the raw data to the measurements table of a tidy bundle.
+
+        Args:
+            bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
+        """
+
+        model = self._rawdata_tableview.model()
+        if model is None:
+            logging.error('No data loaded yet')
+            return
+
+        model.export_tidy(bundle)
+
     def model(self):
         """Returns the underlying model.
 
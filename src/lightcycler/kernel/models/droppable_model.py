@@ -7,21 +7,62 @@ class DroppableModel(QtCore.QAbstractListModel):
 
         super(DroppableModel, self).__init__(*args, **kwargs)
 
+        # The items in insertion order. Used for accessing an item from its row.
         self._items = []
 
+        # The row of each item. Used for O(1) membership tests and row lookups.
+        self._rows = {}
+
+    def __contains__(self, item):
+        """Return true if the item is stored in the model.
+
+        Args:
+            item (str): the item
+        """
+
+        return item in self._rows
+
+    def _set_items(self, items):
+        """Replace the contents of the model.
+
+        Args:
+            items (list of str): the new items
+        """
+
+        self.beginResetModel()
+
+        self._items = list(dict.fromkeys(items))
+        self._rows = dict([(item, row) for row, item in enumerate(self._items)])
+
+        self.endResetModel()
+
     def add_item(self, item):
         """Add an item to the model.
 
         Args:
-            sample (str): the sample
+            item (str): the item
         """
 
-        if item in self._items:
+        self.add_items([item])
+
+    def add_items(self, items):
+        """Add several items to the model in one go. The items already stored in the model are skipped.
+
+        Args:
+            items (list of str): the items
+        """
+
+        new_items = [item for item in dict.fromkeys(items) if item not in self._rows]
+        if not new_items:
             return
 
-        self.beginInsertRows(QtCore.QModelIndex(), self.rowCount(), self.rowCount())
+        first_row = len(self._items)
+
+        self.beginInsertRows(QtCore.QModelIndex(), first_row, first_row + len(new_items) - 1)
 
-        self._items.append(item)
+        for row, item in enumerate(new_items, first_row):
+            self._rows[item] = row
+        self._items.extend(new_items)
 
         self.endInsertRows()
 
@@ -54,28 +95,35 @@ class DroppableModel(QtCore.QAbstractListModel):
             items (list): the list of items to remove
         """
 
-        indexes = []
-
-        for item in items:
-            try:
-                indexes.append(self._items.index(item))
-            except ValueError:
-                continue
+        rows = sorted(set([self._rows[item] for item in items if item in self._rows]))
+        if not rows:
+            return
 
-        indexes.reverse()
-        for idx in indexes:
-            self.beginRemoveRows(QtCore.QModelIndex(), idx, idx)
-            del self._items[idx]
+        # Split the rows in contiguous runs and remove each run with a single signal. The runs are removed from the last
+        # one so that the rows of the runs not removed yet remain valid.
+        runs = []
+        for row in rows:
+            if runs and row == runs[-1][1] + 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+
+        for first_row, last_row in reversed(runs):
+            self.beginRemoveRows(QtCore.QModelIndex(), first_row, last_row)
+            for item in self._items[first_row:last_row+1]:
+                del self._rows[item]
+            del self._items[first_row:last_row+1]
             self.endRemoveRows()
 
-        self.layoutChanged.emit()
+        # Update the rows of the items shifted by the removal
+        for row, item in enumerate(self._items[rows[0]:], rows[0]):
+            self._rows[item] = row
 
     def clear(self):
         """Reset the model.
         """
 
-        self._items = []
-        self.layoutChanged.emit()
+        self._set_items([])
 
     def rowCount(self, parent=None):
         """Returns the number of items.
@@ -88,10 +136,10 @@ class DroppableModel(QtCore.QAbstractListModel):
         """Getter for the items.
 
         Returns:
-            list of str: the items
+            list of str: a copy of the items
         """
 
-        return self._items
+        return list(self._items)
 
     def flags(self, index):
         """Return the flags of an itme with a given index.
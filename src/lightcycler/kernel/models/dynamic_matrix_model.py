@@ -1,18 +1,18 @@
 import collections
+import itertools
 import logging
 import os
 import re
 
 from PyQt5 import QtCore, QtGui
 
-import openpyxl
-
-import tabula
-
 import numpy as np
 
 import pandas as pd
 
+from lightcycler.kernel.utils.excel_writer import SheetWriter
+from lightcycler.kernel.utils.segments import segment_statistics
+
 
 class InvalidViewError(Exception):
     """Exception raised for dynamic matrix view related errors.
@@ -31,12 +31,32 @@ class DynamicMatrixModel(QtCore.QAbstractTableModel):
 
         self._dynamic_matrix = pd.DataFrame()
 
+        # The statistics tables of the dynamic matrix. They are computed lazily unless they are set from a results cache.
+        self._statistics = None
+
+    def _select_zones(self, statistics, zones):
+        """Select the rows of a statistics table matching the zones which are present in the dynamic matrix.
+
+        Args:
+            statistics (pandas.DataFrame): the statistics table
+            zones (list of str): the zones
+
+        Returns:
+            pandas.DataFrame: the selected rows
+        """
+
+        filtered_zones = [zone for zone in zones if zone in self._dynamic_matrix.index]
+
+        return statistics.loc[filtered_zones, :]
+
     def clear(self):
         """Clear the dynamic matrix.
         """
 
         self._dynamic_matrix = pd.DataFrame()
 
+        self._statistics = None
+
         self.layoutChanged.emit()
 
     def columnCount(self, parent=None):
@@ -48,6 +68,38 @@ class DynamicMatrixModel(QtCore.QAbstractTableModel):
 
         return self._dynamic_matrix.shape[1]
 
+    @staticmethod
+    def compute_statistics(dynamic_matrix):
+        """Compute the averages, the standard deviations, the number of values and the max - min difference of each entry
+        of a dynamic matrix.
+
+        The lists of CP values of all the entries are flattened and reduced together.
+
+        Args:
+            dynamic_matrix (pandas.DataFrame): the dynamic matrix
+
+        Returns:
+            collections.OrderedDict: the 'Averages', 'Std Devs', 'N values' and 'Difference' tables (pandas.DataFrame) for
+                all the zones of the dynamic matrix. The entries without any CP value are NaN except for the number of values.
+        """
+
+        cells = dynamic_matrix.to_numpy(dtype=object).ravel()
+
+        counts = np.fromiter((len(cell) for cell in cells), dtype=np.int64, count=cells.size)
+        values = np.fromiter(itertools.chain.from_iterable(cells), dtype=np.float64, count=counts.sum())
+
+        averages, stds, diff = segment_statistics(values, counts)
+
+        statistics = collections.OrderedDict()
+        for title, table, decimals in [('Averages', averages, 3),
+                                       ('Std Devs', stds, 3),
+                                       ('N values', counts.astype(np.float64), None),
+                                       ('Difference', diff, 3)]:
+            df = pd.DataFrame(table.reshape(dynamic_matrix.shape), index=dynamic_matrix.index, columns=dynamic_matrix.columns)
+            statistics[title] = df.round(decimals) if decimals is not None else df
+
+        return statistics
+
     def data(self, index, role):
         """Get the data at a given index for a given role.
 
@@ -93,135 +145,62 @@ class DynamicMatrixModel(QtCore.QAbstractTableModel):
 
         self._dynamic_matrix = matrix
 
+        self._statistics = None
+
         self.layoutChanged.emit()
 
     def export(self, workbook, gene):
         """Export the raw data to an excel spreadsheet.
 
         Args:
-            workbook (openpyxl.workbook.workbook.Workbook): the workbook
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only workbook
+            gene (str): the gene of the dynamic matrix
         """
 
-        worksheet = workbook.create_sheet(gene)
-
-        # Create a worksheet for the dynamic matrix
-        comp = 1
-        worksheet.cell(row=comp, column=1).value = 'Dynamic matrix'
-
-        comp += 1
-
-        for i, v in enumerate(self._dynamic_matrix.columns):
-            worksheet.cell(row=comp, column=i+2).value = v
-
-        for i, v in enumerate(self._dynamic_matrix.index):
-            comp += 1
-            worksheet.cell(row=comp, column=1).value = v
-            for j in range(len(self._dynamic_matrix.columns)):
-                worksheet.cell(row=comp, column=j+2).value = str(self._dynamic_matrix.iloc[i, j])
-
-        all_zones = [''.join(z) for z in DynamicMatrixModel.zones]
-
-        comp += 2
-        worksheet.cell(row=comp, column=1).value = 'Averages'
-        averages = self.get_averages(all_zones)
-
-        comp += 1
-        for i, v in enumerate(averages.columns):
-            worksheet.cell(row=comp, column=i+2).value = v
-
-        for i, v in enumerate(averages.index):
-            comp += 1
-            worksheet.cell(row=comp, column=1).value = v
-            for j in range(len(averages.columns)):
-                worksheet.cell(row=comp, column=j+2).value = averages.iloc[i, j]
-
-        comp += 2
-        worksheet.cell(row=comp, column=1).value = 'Std Devs'
-        stds = self.get_stds(all_zones)
-
-        comp += 1
-        for i, v in enumerate(stds.columns):
-            worksheet.cell(row=comp, column=i+2).value = v
+        statistics = self.statistics
 
-        for i, v in enumerate(stds.index):
-            comp += 1
-            worksheet.cell(row=comp, column=1).value = v
-            for j in range(len(stds.columns)):
-                worksheet.cell(row=comp, column=j+2).value = stds.iloc[i, j]
+        with SheetWriter(workbook, gene) as writer:
 
-        comp += 2
-        worksheet.cell(row=comp, column=1).value = 'N values'
-        n_values = self.get_n_values(all_zones)
+            # Write the dynamic matrix whose entries are the string representation of the list of CP values
+            writer.write(1, 1, ['Dynamic matrix'])
+            comp = writer.write_dataframe(2, self._dynamic_matrix.map(str))
 
-        comp += 1
-        for i, v in enumerate(n_values.columns):
-            worksheet.cell(row=comp, column=i+2).value = v
-
-        for i, v in enumerate(n_values.index):
-            comp += 1
-            worksheet.cell(row=comp, column=1).value = v
-            for j in range(len(n_values.columns)):
-                worksheet.cell(row=comp, column=j+2).value = n_values.iloc[i, j]
+            # Write the statistics tables, each one being separated from the previous one by an empty row
+            for title in ['Averages', 'Std Devs', 'N values']:
+                comp += 2
+                writer.write(comp, 1, [title])
+                comp = writer.write_dataframe(comp + 1, statistics[title])
 
     def get_averages(self, zones):
         """Getter for the averages of each entry of the dynamic matrix for each selected zone.
 
         Args:
+            zones (list of str): the zones
+
         Returns:
             pandas.DataFrame: the averages
         """
 
-        filtered_zones = []
-        for zone in zones:
-            if zone not in self._dynamic_matrix.index:
-                continue
-            filtered_zones.append(zone)
-
-        if not filtered_zones:
+        averages = self._select_zones(self.statistics['Averages'], zones)
+        if averages.empty:
             return pd.DataFrame()
 
-        samples = self._dynamic_matrix.columns
-
-        averages = pd.DataFrame(np.nan, index=filtered_zones, columns=samples)
-
-        for z in filtered_zones:
-            for s in samples:
-                averages.loc[z, s] = np.mean(self._dynamic_matrix.loc[z, s])
-
-        averages = averages.round(3)
-
         return averages
 
     def get_diff(self, zones):
         """Getter for the difference between the max and the min of each dynamic matrix entry for each selected zone.
 
         Args:
+            zones (list of str): the zones
+
         Returns:
             pandas.DataFrame: the difference matrix
         """
 
-        filtered_zones = []
-        for zone in zones:
-            if zone not in self._dynamic_matrix.index:
-                continue
-            filtered_zones.append(zone)
-
-        if not filtered_zones:
+        diff = self._select_zones(self.statistics['Difference'], zones)
+        if diff.empty:
             return pd.DataFrame()
 
-        samples = self._dynamic_matrix.columns
-
-        diff = pd.DataFrame(np.nan, index=filtered_zones, columns=samples)
-
-        for z in filtered_zones:
-            for s in samples:
-                if self._dynamic_matrix.loc[z, s]:
-                    diff.loc[z, s] = max(self._dynamic_matrix.loc[z, s]) - min(self._dynamic_matrix.loc[z, s])
-                else:
-                    diff.loc[z, s] = np.nan
-
-        diff = diff.round(3)
-
         return diff
 
     def get_n_values(self, zones):
@@ -234,21 +213,7 @@ class DynamicMatrixModel(QtCore.QAbstractTableModel):
             pandas.DataFrame: the matrix.
         """
 
-        filtered_zones = []
-        for zone in zones:
-            if zone not in self._dynamic_matrix.index:
-                continue
-            filtered_zones.append(zone)
-
-        samples = self._dynamic_matrix.columns
-
-        n_values = pd.DataFrame(np.nan, index=filtered_zones, columns=samples)
-
-        for z in filtered_zones:
-            for s in samples:
-                n_values.loc[z, s] = len(self._dynamic_matrix.loc[z, s])
-
-        return n_values
+        return self._select_zones(self.statistics['N values'], zones)
 
     def get_stds(self, zones):
         """Getter for the standard deviation matrix of each entry of the dynamic matrix for each selected zone.
@@ -260,27 +225,7 @@ class DynamicMatrixModel(QtCore.QAbstractTableModel):
             pandas.DataFrame: the matrix of standard deviations
         """
 
-        # Keep only the zones which are present as an index of the current dynamic matrix
-        filtered_zones = []
-        for zone in zones:
-            if zone not in self._dynamic_matrix.index:
-                continue
-            filtered_zones.append(zone)
-
-        # Fetch the sample names
-        samples = self._dynamic_matrix.columns
-
-        # Initialize the standard deviation data frame
-        stds = pd.DataFrame(np.nan, index=filtered_zones, columns=samples)
-
-        # Compute the standard deviation
-        for z in filtered_zones:
-            for s in samples:
-                stds.loc[z, s] = np.std(self._dynamic_matrix.loc[z, s])
-
-        stds = stds.round(3)
-
-        return stds
+        return self._select_zones(self.statistics['Std Devs'], zones)
 
     def headerData(self, idx, orientation, role):
         """Returns the header data for a given index, orientation and role.
@@ -305,3 +250,26 @@ class DynamicMatrixModel(QtCore.QAbstractTableModel):
         """
 
         return self._dynamic_matrix.shape[0]
+
+    @property
+    def statistics(self):
+        """Return the statistics tables of the dynamic matrix for all its zones.
+
+        Returns:
+            collections.OrderedDict: the statistics tables (see compute_statistics)
+        """
+
+        if self._statistics is None:
+            self._statistics = DynamicMatrixModel.compute_statistics(self._dynamic_matrix)
+
+        return self._statistics
+
+    @statistics.setter
+    def statistics(self, statistics):
+        """Set the statistics tables of the dynamic matrix.
+
+        Args:
+            statistics (collections.OrderedDict): the statistics tables, typically fetched from a results cache
+        """
+
+        self._statistics = statistics
@@ -1,27 +1,54 @@
 import collections
+import itertools
 import logging
 
 import numpy as np
 
 import pandas as pd
 
-import scipy.stats.mstats as stats
-
 from PyQt5 import QtCore
 
+from lightcycler.kernel.utils.excel_writer import SheetWriter
+from lightcycler.kernel.utils.stability import genorm, normfinder
+from lightcycler.kernel.utils.standard_curves import compute_copies, fit_standard_curves
+from lightcycler.kernel.utils.tidy_export import tidy_column, to_long_form
+
+
+def nan_geometric_mean(values, axis=0):
+    """Compute the geometric mean of an array along a given axis skipping the NaN values.
+
+    The geometric mean is computed in log space. It is NaN where all the values are NaN.
+
+    Args:
+        values (numpy.ndarray): the values
+        axis (int): the axis along which the geometric mean is computed
+
+    Returns:
+        numpy.ndarray: the geometric mean
+    """
+
+    valid = ~np.isnan(values)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_sums = np.where(valid, np.log(np.where(valid, values, 1.0)), 0.0).sum(axis=axis)
+        return np.exp(log_sums/valid.sum(axis=axis))
+
+
+def nan_group_mean(values, membership):
+    """Average an array over groups of entries of its last axis skipping the NaN values.
 
-def dataframe_to_excel(worksheet, row, dataframe):
+    Args:
+        values (numpy.ndarray): the values. The last axis runs over the entries to group.
+        membership (numpy.ndarray): the (n entries, n groups) matrix whose element is 1 if the entry belongs to the group and 0 otherwise
 
-    # Write the column
-    for col, value in enumerate(dataframe.columns):
-        worksheet.cell(row=row, column=col+2).value = value
+    Returns:
+        numpy.ndarray: the average of each group. Its last axis runs over the groups.
+    """
 
-    # write the dataframe and the indexes
-    for ind in dataframe.index:
-        row += 1
-        worksheet.cell(row=row, column=1).value = ind
-        for i, col in enumerate(dataframe.columns):
-            worksheet.cell(row=row, column=i+2).value = dataframe.loc[ind, col]
+    valid = ~np.isnan(values)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (np.where(valid, values, 0.0) @ membership)/(valid.astype(np.float64) @ membership)
 
 
 class GenesModel:
@@ -54,6 +81,43 @@ class GenesModel:
 
         self._ratio_matrices_per_group = collections.OrderedDict()
 
+        # The results of the absolute quantification
+        self._standard_curves = pd.DataFrame()
+
+        self._copy_matrices = collections.OrderedDict()
+
+        self._copy_matrices_per_group = collections.OrderedDict()
+
+        # The gene x zone x sample arrays of the RQ pipeline and the inputs they were computed with.
+        # Each stage of the pipeline is recomputed only if one of its inputs changed since the last computation.
+        self._genes = None
+
+        self._samples = None
+
+        self._cp_sums = None
+
+        self._cp_counts = None
+
+        self._control_samples = None
+
+        self._delta_ct = None
+
+        self._powers = None
+
+        self._pow_delta_ct = None
+
+        self._reference_indexes = None
+
+        self._gmeans = None
+
+        self._interest_indexes = None
+
+        self._ratios = None
+
+    @property
+    def ct_power_per_gene(self):
+        return self._ct_power_per_gene
+
     @property
     def delta_ct_matrices(self):
         return self._delta_ct_matrices
@@ -74,10 +138,25 @@ class GenesModel:
     def ratio_matrices_per_group(self):
         return self._ratio_matrices_per_group
 
+    @property
+    def standard_curves(self):
+        return self._standard_curves
+
+    @property
+    def copy_matrices(self):
+        return self._copy_matrices
+
+    @property
+    def copy_matrices_per_group(self):
+        return self._copy_matrices_per_group
+
     def set_ct_power_per_gene(self, ct_power_per_gene):
 
         self._ct_power_per_gene = ct_power_per_gene
 
+        # The CP fold changes between the groups use the same ct powers
+        self._groups_model.ct_power_per_gene = ct_power_per_gene
+
     def on_set_dynamic_matrices(self, dynamic_matrices):
         """Event handler which set the dynamic matrices.
 
@@ -87,36 +166,242 @@ class GenesModel:
 
         self._dynamic_matrices = dynamic_matrices
 
-    def _compute_delta_ct_matrices(self):
+        # The whole RQ pipeline must be recomputed from the new dynamic matrices
+        self._cp_sums = None
+
+    def _compute_cp_sums(self, genes, samples):
+        """Compute the sum and the number of the CP values stored in each entry of the dynamic matrices.
+
+        Args:
+            genes (list of str): the genes
+            samples (list of str): the samples
+
+        Returns:
+            2-tuple of numpy.ndarray: the sums and the number of CP values for each (gene, zone, sample) entry
+        """
+
+        zones = list(GenesModel.zones)
+
+        shape = (len(genes), len(zones), len(samples))
+
+        # Gather the lists of CP values of all the dynamic matrices in a single gene x zone x sample tensor
+        cells = np.empty(shape, dtype=object)
+        for i, gene in enumerate(genes):
+            cells[i] = self._dynamic_matrices[gene].loc[zones, samples].to_numpy()
+        cells = cells.ravel()
+
+        # Flatten the CP values and sum them up per entry in one go
+        counts = np.fromiter((len(cell) for cell in cells), dtype=np.int64, count=cells.size)
+        values = np.fromiter(itertools.chain.from_iterable(cells), dtype=np.float64, count=counts.sum())
+        sums = np.bincount(np.repeat(np.arange(cells.size), counts), weights=values, minlength=cells.size)
+
+        return sums.reshape(shape), counts.reshape(shape)
+
+    def _update_cp_sums(self, genes, samples):
+        """Update the sums of the CP values if the dynamic matrices, the genes or the samples changed since the last call.
+
+        Any update invalidates the following stages of the RQ pipeline.
+
+        Args:
+            genes (list of str): the genes
+            samples (list of str): the samples
+        """
+
+        if self._cp_sums is not None and genes == self._genes and samples == self._samples:
+            return
+
+        self._genes = list(genes)
+        self._samples = list(samples)
+        self._cp_sums, self._cp_counts = self._compute_cp_sums(genes, samples)
+        self._control_samples = None
+        self._gmeans = None
+
+    def _export_matrices(self, workbook, title, matrices):
+        """Export a set of matrices one below the other in a sheet, each matrix being preceded by its gene.
+
+        Args:
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only workbook
+            title (str): the title of the sheet
+            matrices (collections.OrderedDict): the matrix (pandas.DataFrame) of each gene
+        """
+
+        with SheetWriter(workbook, title) as writer:
+            comp = 1
+            for gene, df in matrices.items():
+                writer.write(comp, 1, [gene])
+                writer.write_dataframe(comp + 1, df)
+                comp += df.shape[0] + 3
+
+    def _get_group_membership(self, sample_indexes):
+        """Return the membership matrix of the samples to the selected groups.
+
+        Args:
+            sample_indexes (dict): the index of each sample
+
+        Returns:
+            2-tuple: the names of the selected groups and the (n samples, n groups) membership matrix
+        """
+
+        selected_groups = [(group, model) for group, model, selected in self._groups_model.groups if selected]
+        membership = np.zeros((len(sample_indexes), len(selected_groups)), dtype=np.float64)
+        for j, (_, model) in enumerate(selected_groups):
+            membership[[sample_indexes[sample] for sample in model.items if sample in sample_indexes], j] = 1.0
+
+        return [group for group, _ in selected_groups], membership
+
+    def _iter_long_form_matrices(self, matrices, column, value):
+        """Iterate over the long-form tables of a set of matrices.
+
+        Args:
+            matrices (collections.OrderedDict): the (zone x column) matrix (pandas.DataFrame) of each gene
+            column (str): the name of the column storing the columns of the matrices
+            value (str): the name of the column storing the values of the matrices
+
+        Returns:
+            generator: the (pandas.DataFrame) table of each gene
+        """
+
+        for gene, df in matrices.items():
+            yield to_long_form([('gene', [gene]), ('zone', df.index), (column, df.columns)], [(value, df.to_numpy(dtype=np.float64))])
+
+    def compute_absolute_quantification(self, concentrations):
+        """Compute the copy number matrices from the standard curves of the dilution series.
+
+        The standard curves are fitted for each gene and run (Date, RT) at once on the CP values used for building the
+        dynamic matrices, i.e. calibrated across runs if some calibrators are set. The CP values of the runs which have no
+        valid curve are converted using the curve fitted over all the runs of their gene. The copies of all the raw
+        data are then averaged over each (gene, zone, sample) entry like the CP values of the dynamic matrices.
+
+        Args:
+            concentrations (dict): the concentration of each sample of the dilution series
+        """
+
+        self._standard_curves = pd.DataFrame()
+        self._copy_matrices = collections.OrderedDict()
+        self._copy_matrices_per_group = collections.OrderedDict()
+
+        rawdata = self._rawdata_model.rawdata
+        if rawdata.empty or not concentrations:
+            return
+
+        cp_column = self._rawdata_model.cp_column
+
+        # The CP values are those of the dynamic matrices and the raw data which failed the quality controls are excluded
+        rawdata = rawdata.assign(**{cp_column: self._rawdata_model.cp_values.to_numpy()})
+        rawdata = rawdata[self._rawdata_model.qc_mask.to_numpy()]
+
+        # A run is identified by its date and RT as for the inter-run calibration
+        run_columns = ('Gene', 'Date', 'RT')
+
+        run_curves = fit_standard_curves(rawdata, concentrations, by=run_columns, cp_column=cp_column)
+        gene_curves = fit_standard_curves(rawdata, concentrations, by=('Gene',), cp_column=cp_column)
+
+        copies = compute_copies(rawdata, run_curves, by=run_columns, fallback_curves=gene_curves, cp_column=cp_column)
+
+        genes = [gene for gene in self._rawdata_model.genes if gene in gene_curves.index and not np.isnan(gene_curves.loc[gene, 'slope'])]
+        if not genes:
+            logging.error('No valid standard curve found')
+            return
 
         all_samples = sorted(self._rawdata_model.samples)
 
-        control_samples = self._groups_model.get_group_control_contents()
+        zones = GenesModel.zones
+
+        shape = (len(genes), len(zones), len(all_samples))
+
+        gene_indexes = pd.Index(genes).get_indexer(rawdata['Gene'])
+        sample_indexes = pd.Index(all_samples).get_indexer(rawdata['Name'])
+        valid = ~np.isnan(copies) & (gene_indexes >= 0) & (sample_indexes >= 0)
+
+        # Sum up the copies of each (gene, zone, sample) entry
+        sums = np.zeros(np.prod(shape), dtype=np.float64)
+        counts = np.zeros(np.prod(shape), dtype=np.float64)
+        for k, zone in enumerate(zones):
+            in_zone = valid & rawdata['Zone'].isin(tuple(zone)).to_numpy()
+            flat_indexes = (gene_indexes[in_zone]*len(zones) + k)*len(all_samples) + sample_indexes[in_zone]
+            sums += np.bincount(flat_indexes, weights=copies[in_zone], minlength=sums.size)
+            counts += np.bincount(flat_indexes, minlength=counts.size)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_copies = (sums/counts).reshape(shape)
+
+        for i, gene in enumerate(genes):
+            self._copy_matrices[gene] = pd.DataFrame(mean_copies[i], index=zones, columns=all_samples)
+
+        group_names, membership = self._get_group_membership(dict([(sample, i) for i, sample in enumerate(all_samples)]))
+        copies_per_group = nan_group_mean(mean_copies, membership)
+        for i, gene in enumerate(genes):
+            self._copy_matrices_per_group[gene] = pd.DataFrame(copies_per_group[i], index=zones, columns=group_names)
+
+        run_curves.index = ['{} ({} {})'.format(gene, pd.Timestamp(date).strftime('%Y-%m-%d'), rt) for gene, date, rt in run_curves.index]
+        self._standard_curves = run_curves
+
+    def compute_stability(self):
+        """Compute the expression stability of all the genes for each zone.
+
+        The stability is computed from the log2 relative quantities of the genes, i.e. -CP * log2(ct power), using
+        geNorm and NormFinder. For NormFinder, the samples are grouped according to the selected groups.
+
+        Returns:
+            2-tuple of collections.OrderedDict: for each zone, the stability of each gene and the geNorm pairwise variations
+        """
+
+        stability_per_zone = collections.OrderedDict()
+
+        pairwise_variations_per_zone = collections.OrderedDict()
+
+        if not self._dynamic_matrices:
+            return stability_per_zone, pairwise_variations_per_zone
 
         genes = self._rawdata_model.genes
 
-        ct_control = pd.DataFrame(np.nan, index=GenesModel.zones, columns=genes)
-        for gene in genes:
-            for zone in GenesModel.zones:
-                temp = []
-                for sample in control_samples:
-                    temp.extend(self._dynamic_matrices[gene].loc[zone, sample])
-                ct_control.loc[zone, gene] = np.average(temp)
+        all_samples = sorted(self._rawdata_model.samples)
+
+        self._update_cp_sums(genes, all_samples)
+
+        ct_power_per_gene = self._ct_power_per_gene if self._ct_power_per_gene else {}
+        powers = np.array([ct_power_per_gene.get(gene, 2.00) for gene in genes], dtype=np.float64)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_quantities = -np.log2(powers)[:, np.newaxis, np.newaxis]*self._cp_sums/self._cp_counts
 
-        delta_ct = collections.OrderedDict()
-        for gene in genes:
-            delta_ct[gene] = pd.DataFrame(np.nan, index=GenesModel.zones, columns=all_samples)
-            for zone in GenesModel.zones:
-                for sample in all_samples:
-                    delta_ct[gene].loc[zone, sample] = ct_control.loc[zone, gene] - np.average(self._dynamic_matrices[gene].loc[zone, sample])
+        # The index of the group of each sample. -1 for the samples which are not in a selected group.
+        group_indexes = np.full(len(all_samples), -1, dtype=np.int64)
+        sample_indexes = dict([(sample, i) for i, sample in enumerate(all_samples)])
+        selected_groups = [model for _, model, selected in self._groups_model.groups if selected]
+        for j, model in enumerate(selected_groups):
+            group_indexes[[sample_indexes[sample] for sample in model.items if sample in sample_indexes]] = j
 
-        return delta_ct
+        for k, zone in enumerate(GenesModel.zones):
+            m_values, elimination_m_values, ranking, pairwise_variations = genorm(log_quantities[:, k, :])
+            normfinder_stabilities = normfinder(log_quantities[:, k, :], group_indexes)
+
+            stability = pd.DataFrame(np.nan, index=genes,
+                                     columns=['geNorm M', 'geNorm M at elimination', 'geNorm rank', 'NormFinder', 'NormFinder rank'])
+            stability['geNorm M'] = m_values
+            stability['geNorm M at elimination'] = elimination_m_values
+            stability.iloc[ranking, 2] = np.arange(1, len(genes) + 1)
+            stability['NormFinder'] = normfinder_stabilities
+            stability['NormFinder rank'] = pd.Series(normfinder_stabilities, index=genes).rank(method='min')
+            stability_per_zone[zone] = stability.sort_values('geNorm rank')
+
+            pairwise_variations_per_zone[zone] = pd.DataFrame(pairwise_variations,
+                                                              index=['V{}/{}'.format(n, n+1) for n in range(2, len(genes))],
+                                                              columns=['V'])
+
+        return stability_per_zone, pairwise_variations_per_zone
 
     def compute_rq_matrix(self):
         """Compute the RQ matrix.
 
-        Args:
-            ct_power_per_gene (float): the power used for computing the CT matrix per gene
+        The computation is performed on gene x zone x sample arrays and the results are then dispatched per gene.
+        The arrays are cached so that only the stages depending on what changed since the last call are recomputed:
+            - new dynamic matrices: the whole pipeline
+            - new group control contents: the delta ct and the following stages
+            - new ct powers: the power of the delta ct of the modified genes and, if one of them is a reference gene,
+              the geometric means and the ratios
+            - new reference genes: the geometric means and the ratios
+            - new interest genes: the ratios
         """
 
         if not self._ct_power_per_gene:
@@ -125,98 +410,193 @@ class GenesModel:
         if not self._dynamic_matrices:
             return
 
+        genes = self._rawdata_model.genes
+
         all_samples = sorted(self._rawdata_model.samples)
 
         zones = GenesModel.zones
 
-        self._delta_ct_matrices = self._compute_delta_ct_matrices()
+        gene_indexes = dict([(gene, i) for i, gene in enumerate(genes)])
 
-        # Compute the power of the delta ct matrix
-        self._pow_delta_ct_matrices = collections.OrderedDict()
-        for gene in self._delta_ct_matrices:
-            power = self._ct_power_per_gene.get(gene, 2.00)
-            self._pow_delta_ct_matrices[gene] = pow(power, self._delta_ct_matrices[gene])
+        sample_indexes = dict([(sample, i) for i, sample in enumerate(all_samples)])
+
+        # Sum up the CP values of each (gene, zone, sample) entry
+        self._update_cp_sums(genes, all_samples)
+
+        # Compute the delta ct
+        control_samples = [sample for sample in self._groups_model.get_group_control_contents() if sample in sample_indexes]
+        if control_samples != self._control_samples:
+            self._control_samples = control_samples
+
+            control = np.zeros(len(all_samples), dtype=bool)
+            control[[sample_indexes[sample] for sample in control_samples]] = True
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                # The average CP value of each (gene, zone, sample) entry
+                means = self._cp_sums/self._cp_counts
+                # The average CP value over all the values of the group control for each (gene, zone) entry
+                ct_control = self._cp_sums[:, :, control].sum(axis=2)/self._cp_counts[:, :, control].sum(axis=2)
+
+            self._delta_ct = ct_control[:, :, np.newaxis] - means
+
+            self._delta_ct_matrices = collections.OrderedDict()
+            for i, gene in enumerate(genes):
+                self._delta_ct_matrices[gene] = pd.DataFrame(self._delta_ct[i], index=zones, columns=all_samples)
+
+            self._powers = None
+            self._gmeans = None
+
+        # Compute the power of the delta ct only for the genes whose power changed
+        powers = np.array([self._ct_power_per_gene.get(gene, 2.00) for gene in genes], dtype=np.float64)
+        if self._powers is None:
+            self._pow_delta_ct = np.empty_like(self._delta_ct)
+            self._pow_delta_ct_matrices = collections.OrderedDict([(gene, None) for gene in genes])
+            updated_indexes = np.arange(len(genes))
+        else:
+            updated_indexes = np.flatnonzero(powers != self._powers)
+        self._powers = powers
+
+        self._pow_delta_ct[updated_indexes] = np.power(powers[updated_indexes, np.newaxis, np.newaxis], self._delta_ct[updated_indexes])
+        for i in updated_indexes:
+            self._pow_delta_ct_matrices[genes[i]] = pd.DataFrame(self._pow_delta_ct[i], index=zones, columns=all_samples)
+
+        updated_indexes = set(updated_indexes.tolist())
 
         # Compute the geometric mean matrix over the reference genes
-        self._geom_means = pd.DataFrame(np.nan, index=zones, columns=all_samples)
-        reference_genes = self._reference_genes_model.items
-        for zone in GenesModel.zones:
-            for sample in all_samples:
-                values = []
-                for ref_gene in reference_genes:
-                    values.append(self._pow_delta_ct_matrices[ref_gene].loc[zone, sample])
-                self._geom_means.loc[zone, sample] = stats.gmean(values)
-
-        # Compute the ratio matrices for each gene of interest
-        self._ratio_matrices = collections.OrderedDict()
-        interest_genes = self._interest_genes_model.items
-        for gene in interest_genes:
-            self._ratio_matrices[gene] = self._pow_delta_ct_matrices[gene]/self._geom_means
+        reference_indexes = [gene_indexes[gene] for gene in self._reference_genes_model.items if gene in gene_indexes]
+        if self._gmeans is None or reference_indexes != self._reference_indexes or updated_indexes.intersection(reference_indexes):
+            self._reference_indexes = reference_indexes
+            self._gmeans = nan_geometric_mean(self._pow_delta_ct[reference_indexes], axis=0)
+            self._geom_means = pd.DataFrame(self._gmeans, index=zones, columns=all_samples)
+            # All the ratios must be recomputed
+            self._interest_indexes = None
+
+        # Compute the ratio matrices for each gene of interest. The matrices of the genes which were already
+        # genes of interest and whose power did not change are kept as they are.
+        interest_indexes = [gene_indexes[gene] for gene in self._interest_genes_model.items if gene in gene_indexes]
+        if interest_indexes != self._interest_indexes:
+            reusable_indexes = set(self._interest_indexes or []).difference(updated_indexes)
+            self._interest_indexes = interest_indexes
+            self._ratios = self._pow_delta_ct[interest_indexes]/self._gmeans
+        else:
+            reusable_indexes = set(interest_indexes).difference(updated_indexes)
+            for k, i in enumerate(interest_indexes):
+                if i not in reusable_indexes:
+                    self._ratios[k] = self._pow_delta_ct[i]/self._gmeans
+
+        ratio_matrices = collections.OrderedDict()
+        for k, i in enumerate(interest_indexes):
+            gene = genes[i]
+            if i in reusable_indexes and gene in self._ratio_matrices:
+                ratio_matrices[gene] = self._ratio_matrices[gene]
+            else:
+                ratio_matrices[gene] = pd.DataFrame(self._ratios[k], index=zones, columns=all_samples)
+        self._ratio_matrices = ratio_matrices
+
+        # Compute the ratio matrices per group by averaging the ratios over the samples of each selected group
+        group_names, membership = self._get_group_membership(sample_indexes)
+        ratios_per_group = nan_group_mean(self._ratios, membership)
 
-        # Compute the ratio matrices per group
         self._ratio_matrices_per_group = collections.OrderedDict()
-        # Loop over the genes of interest
-        for gene in interest_genes:
-            self._ratio_matrices_per_group[gene] = pd.DataFrame(index=GenesModel.zones)
-            for group, model, selected in self._groups_model.groups:
-                if not selected:
-                    continue
-                samples_in_group = model.items
-                self._ratio_matrices_per_group[gene][group] = self._ratio_matrices[gene].loc[GenesModel.zones, samples_in_group].mean(axis=1).tolist()
+        for k, i in enumerate(interest_indexes):
+            self._ratio_matrices_per_group[genes[i]] = pd.DataFrame(ratios_per_group[k], index=zones, columns=group_names)
 
     def export(self, workbook):
         """
         """
 
         self.export_rq_statistics(workbook)
+        self.export_absolute_quantification(workbook)
         self.export_genes(workbook)
 
-    def export_rq_statistics(self, workbook):
-        """
+    def export_tidy(self, bundle):
+        """Export the genes, the RQ and, if computed, the absolute quantification results to a tidy bundle.
+
+        The following tables are written:
+            - genes: one row per reference or interest gene with its role and its ct power
+            - rq: one row per gene, zone and sample with the delta ct, its power and the ratio (NaN for the genes which are
+              not genes of interest)
+            - geometric_means: one row per zone and sample
+            - rq_per_group: one row per gene of interest, zone and selected group
+            - standard_curves, copies and copies_per_group if the absolute quantification has been computed
+
+        Args:
+            bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
         """
 
-        worksheet = workbook.create_sheet('Delta ct matrices')
-        comp = 1
-        for gene, df in self._delta_ct_matrices.items():
-            worksheet.cell(row=comp, column=1).value = gene
-            dataframe_to_excel(worksheet, comp+1, df)
-            comp += df.shape[0] + 3
+        ct_power_per_gene = self._ct_power_per_gene or {}
 
-        worksheet = workbook.create_sheet('Pow delta ct matrices')
-        comp = 1
-        for gene, df in self._pow_delta_ct_matrices.items():
-            worksheet.cell(row=comp, column=1).value = gene
-            dataframe_to_excel(worksheet, comp+1, df)
-            comp += df.shape[0] + 3
+        genes = pd.DataFrame([(gene, role, ct_power_per_gene.get(gene, np.nan))
+                              for role, model in [('reference', self._reference_genes_model), ('interest', self._interest_genes_model)]
+                              for gene in model.items],
+                             columns=['gene', 'role', 'ct_power'])
+        bundle.write_table('genes', genes)
 
-        worksheet = workbook.create_sheet('Geometric means')
-        dataframe_to_excel(worksheet, 1, self._geom_means)
+        if self._delta_ct is not None and self._gmeans is not None:
+            zones = GenesModel.zones
 
-        worksheet = workbook.create_sheet('Ratio matrices')
-        comp = 1
-        for gene, df in self._ratio_matrices.items():
-            worksheet.cell(row=comp, column=1).value = gene
-            dataframe_to_excel(worksheet, comp+1, df)
-            comp += df.shape[0] + 3
+            ratios = np.full(self._delta_ct.shape, np.nan)
+            ratios[self._interest_indexes] = self._ratios
 
-        worksheet = workbook.create_sheet('Ratio matrices per group')
-        comp = 1
-        for gene, df in self._ratio_matrices_per_group.items():
-            worksheet.cell(row=comp, column=1).value = gene
-            dataframe_to_excel(worksheet, comp+1, df)
-            comp += df.shape[0] + 3
+            bundle.write_table('rq', to_long_form([('gene', self._genes), ('zone', zones), ('sample', self._samples)],
+                                                  [('delta_ct', self._delta_ct),
+                                                   ('pow_delta_ct', self._pow_delta_ct),
+                                                   ('ratio', ratios)]))
 
-    def export_genes(self, workbook):
+            bundle.write_table('geometric_means', to_long_form([('zone', zones), ('sample', self._samples)], [('gmean', self._gmeans)]))
+
+            bundle.write_table('rq_per_group', self._iter_long_form_matrices(self._ratio_matrices_per_group, 'group', 'ratio'))
+
+        if self._copy_matrices:
+            standard_curves = self._standard_curves.rename_axis('curve').reset_index()
+            bundle.write_table('standard_curves', standard_curves.rename(columns=tidy_column))
+
+            bundle.write_table('copies', self._iter_long_form_matrices(self._copy_matrices, 'sample', 'copies'))
+
+            bundle.write_table('copies_per_group', self._iter_long_form_matrices(self._copy_matrices_per_group, 'group', 'copies'))
+
+    def export_rq_statistics(self, workbook):
+        """Export the RQ matrices.
+
+        Args:
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only workbook
         """
+
+        self._export_matrices(workbook, 'Delta ct matrices', self._delta_ct_matrices)
+
+        self._export_matrices(workbook, 'Pow delta ct matrices', self._pow_delta_ct_matrices)
+
+        with SheetWriter(workbook, 'Geometric means') as writer:
+            writer.write_dataframe(1, self._geom_means)
+
+        self._export_matrices(workbook, 'Ratio matrices', self._ratio_matrices)
+
+        self._export_matrices(workbook, 'Ratio matrices per group', self._ratio_matrices_per_group)
+
+    def export_absolute_quantification(self, workbook):
+        """Export the standard curves and the copy matrices if the absolute quantification has been computed.
+
+        Args:
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only workbook
         """
 
-        worksheet = workbook.create_sheet('Genes')
+        if not self._copy_matrices:
+            return
+
+        with SheetWriter(workbook, 'Standard curves') as writer:
+            writer.write_dataframe(1, self._standard_curves)
+
+        self._export_matrices(workbook, 'Copy matrices', self._copy_matrices)
 
-        worksheet.cell(row=1, column=1).value = 'reference'
-        worksheet.cell(row=1, column=2).value = 'interest'
+        self._export_matrices(workbook, 'Copy matrices per group', self._copy_matrices_per_group)
 
-        for i, item in enumerate(self._reference_genes_model.items):
-            worksheet.cell(row=i+2, column=1).value = item
+    def export_genes(self, workbook):
+        """Export the reference and interest genes.
+
+        Args:
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only workbook
+        """
 
-        for i, item in enumerate(self._interest_genes_model.items):
-            worksheet.cell(row=i+2, column=2).value = item
+        with SheetWriter(workbook, 'Genes') as writer:
+            writer.write(1, 1, ['reference', 'interest'])
+            writer.write_rows(2, 1, itertools.zip_longest(self._reference_genes_model.items, self._interest_genes_model.items))
@@ -5,10 +5,6 @@ import re
 
 from PyQt5 import QtCore, QtGui
 
-import openpyxl
-
-import tabula
-
 import numpy as np
 
 import pandas as pd
@@ -1,4 +1,5 @@
 import collections
+import itertools
 import logging
 
 from PyQt5 import QtCore, QtGui
@@ -7,15 +8,15 @@ import numpy as np
 
 import pandas as pd
 
-import numpy as np
-
-import scipy.stats as stats
-
-import scikit_posthocs as sk
-
-from outliers import smirnov_grubbs as grubbs
-
 from lightcycler.kernel.models.droppable_model import DroppableModel
+from lightcycler.kernel.utils.excel_writer import SheetWriter
+from lightcycler.kernel.utils.group_tests import EFFECT_SIZES, adjust_pairwise_p_values, compute_effect_sizes
+from lightcycler.kernel.utils.group_tests import compute_group_statistics, run_group_tests
+from lightcycler.kernel.utils.multiple_testing import adjust_p_values
+from lightcycler.kernel.utils.resampling import RESAMPLING_RESULTS, run_resampling
+from lightcycler.kernel.utils.results_cache import ResultsCache
+from lightcycler.kernel.utils.segments import segment_statistics
+from lightcycler.kernel.utils.tidy_export import tidy_column, to_long_form
 
 
 def get_nested_indices(nested_list, index):
@@ -55,6 +56,289 @@ class GroupsModel(QtCore.QAbstractListModel):
 
         self._group_control = None
 
+        # The version of the dynamic matrices. It is incremented each time new dynamic matrices are set.
+        self._data_version = 0
+
+        # The cache for the outliers. This is a dict whose keys are the group names and values are
+        # 2-tuples storing resp. the cache key (group samples, data version) and the outliers.
+        self._outliers_cache = {}
+
+        # The reverse index which maps each sample to the groups it belongs to. It is computed lazily and invalidated
+        # each time a group or its contents change.
+        self._groups_per_sample = None
+
+        # The results computed from the dynamic matrices (CP values, sample means, group statistics and tests). They are
+        # shared between the display and the export and cleared each time new dynamic matrices are set. Each change of the
+        # groups contents adds new entries hence only the 128 most recently used results are kept.
+        self._results = ResultsCache(max_size=128)
+
+        # The method used to adjust the p-values over all the genes and zones at once
+        self._family_wide_correction = 'benjamini-hochberg'
+
+        # The ct power of each gene used for computing the CP fold changes. The genes missing from it use a ct power of 2.
+        self._ct_power_per_gene = {}
+
+    def _compute_group_statistics(self):
+        """Compute the statistics and the effect sizes of the selected groups for all the genes and student test zones at once.
+
+        The statistics are computed on the mean CP value of each sample. The results are cached until the dynamic
+        matrices are changed. The ct powers used for the CP fold changes are part of the cache key.
+
+        Returns:
+            2-tuple: the cache key and a dict storing the genes, the selected groups, the (n genes, n zones, n samples)
+                sample means, the (n samples, n groups) membership matrix, the (n genes, n zones, n groups) number of
+                values, means and variances and the (n genes, n zones, n groups, n groups) effect sizes
+        """
+
+        selected_groups = [(group, model) for group, model, selected in self._groups if selected]
+
+        cache_key = (tuple([(group, tuple(model.items)) for group, model in selected_groups]), tuple(sorted(self._ct_power_per_gene.items())))
+
+        groups = [group for group, _ in selected_groups]
+
+        return cache_key, self._results.get(('group statistics', cache_key), self._compute_selected_group_statistics, groups)
+
+    def _compute_group_tests(self, test):
+        """Perform a group test over the selected groups for all the genes and student test zones at once.
+
+        The test is performed on the mean CP value of each sample. The results of each test are cached until the dynamic
+        matrices are changed.
+
+        Args:
+            test (str): the test. One of lightcycler.kernel.utils.group_tests.GROUP_TESTS.
+
+        Returns:
+            5-tuple: the genes, the selected groups, the (n genes, n zones, n groups) number of values, the unadjusted
+                (n genes, n zones, n groups, n groups) pairwise p-values and the (n genes, n zones) omnibus p-values
+                (None for the pairwise tests)
+        """
+
+        statistics_key, group_statistics = self._compute_group_statistics()
+
+        return self._results.get(('group tests', statistics_key, test), self._compute_selected_group_tests, group_statistics, test)
+
+    def _compute_pooled_statistics(self, samples):
+        """Compute the mean, the standard deviation and the number of the CP values pooled over a set of samples for all
+        the genes and student test zones at once.
+
+        Args:
+            samples (list of str): the samples
+
+        Returns:
+            3-tuple: the (n genes, n zones) means, standard deviations and number of CP values. The means and standard
+                deviations of the genes and zones without any CP value are NaN.
+        """
+
+        genes, all_samples, counts, values, cell_indexes = self._get_cp_values()
+
+        n_genes, n_zones, n_samples = counts.shape
+
+        in_group = np.zeros(n_samples, dtype=bool)
+        sample_indexes = dict([(sample, i) for i, sample in enumerate(all_samples)])
+        in_group[[sample_indexes[sample] for sample in samples if sample in sample_indexes]] = True
+
+        # Keep the CP values of the group samples and pool them per gene and zone
+        values = values[in_group[cell_indexes % n_samples]]
+
+        n_values = counts[:, :, in_group].sum(axis=-1)
+
+        # The pooled CP values are sorted by gene and zone hence each gene and zone is a segment
+        means, stds, _ = segment_statistics(values, n_values.ravel())
+
+        means = means.reshape(n_genes, n_zones)
+        stds = stds.reshape(n_genes, n_zones)
+
+        return means, stds, n_values
+
+    def _compute_sample_means(self):
+        """Compute the mean CP value of each sample for each gene and student test zone of the dynamic matrices.
+
+        Returns:
+            3-tuple: the genes, the samples and the (n genes, n zones, n samples) means
+        """
+
+        genes, samples, counts, values, cell_indexes = self._get_cp_values()
+
+        sums = np.bincount(cell_indexes, weights=values, minlength=counts.size)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums.reshape(counts.shape)/counts
+
+        return genes, samples, means
+
+    def _compute_selected_group_statistics(self, selected_groups):
+        """Compute the statistics and the effect sizes of a list of groups for all the genes and student test zones at once.
+
+        Args:
+            selected_groups (list of str): the groups
+
+        Returns:
+            dict: the statistics (see _compute_group_statistics)
+        """
+
+        genes, samples, means = self._get_sample_means()
+
+        sample_indexes = dict([(sample, i) for i, sample in enumerate(samples)])
+
+        membership = np.zeros((len(samples), len(selected_groups)), dtype=np.float64)
+        for j, (_, samples_per_group) in enumerate(self._get_samples_per_group(samples, selected_groups).items()):
+            membership[[sample_indexes[sample] for sample in samples_per_group], j] = 1.0
+
+        n_values, group_means, group_variances = compute_group_statistics(means, membership)
+
+        ct_powers = np.array([self._ct_power_per_gene.get(gene, 2.0) for gene in genes], dtype=np.float64)[:, np.newaxis]
+
+        return {'genes': genes,
+                'groups': selected_groups,
+                'sample means': means,
+                'membership': membership,
+                'statistics': (n_values, group_means, group_variances),
+                'effect sizes': compute_effect_sizes(n_values, group_means, group_variances, ct_power=ct_powers)}
+
+    def _compute_selected_group_tests(self, group_statistics, test):
+        """Perform a group test over a list of groups for all the genes and student test zones at once.
+
+        Args:
+            group_statistics (dict): the statistics of the groups (see _compute_group_statistics)
+            test (str): the test. One of lightcycler.kernel.utils.group_tests.GROUP_TESTS.
+
+        Returns:
+            5-tuple: the results of the test (see _compute_group_tests)
+        """
+
+        p_values, omnibus_p_values = run_group_tests(group_statistics['sample means'],
+                                                     group_statistics['membership'],
+                                                     test=test,
+                                                     p_adjust=None,
+                                                     statistics=group_statistics['statistics'])
+
+        return group_statistics['genes'], group_statistics['groups'], group_statistics['statistics'][0], p_values, omnibus_p_values
+
+    def _create_samples_per_group_model(self, samples=None):
+        """Create a model which will store the samples of a group.
+
+        Args:
+            samples (list of str): the initial samples of the group
+
+        Returns:
+            lightcycler.kernel.models.droppable_model.DroppableModel: the model
+        """
+
+        samples_per_group_model = DroppableModel(self)
+        if samples is not None:
+            samples_per_group_model.add_items(samples)
+
+        # Any change in the group contents invalidates the sample -> groups index
+        samples_per_group_model.rowsInserted.connect(self._invalidate_groups_per_sample)
+        samples_per_group_model.rowsRemoved.connect(self._invalidate_groups_per_sample)
+        samples_per_group_model.modelReset.connect(self._invalidate_groups_per_sample)
+
+        return samples_per_group_model
+
+    def _get_samples_per_group(self, samples, groups):
+        """Dispatch a list of samples over a list of groups using the sample -> groups index.
+
+        Args:
+            samples (list of str): the samples
+            groups (list of str): the groups
+
+        Returns:
+            collections.OrderedDict: the samples of each group
+        """
+
+        groups_per_sample = self.groups_per_sample
+
+        samples_per_group = collections.OrderedDict([(group, []) for group in groups])
+
+        for sample in samples:
+            for group in groups_per_sample.get(sample, []):
+                if group in samples_per_group:
+                    samples_per_group[group].append(sample)
+
+        return samples_per_group
+
+    def _gather_cp_values(self):
+        """Gather the CP values of all the dynamic matrices for the student test zones.
+
+        Returns:
+            5-tuple: the genes, the samples, the (n genes, n zones, n samples) number of CP values of each entry, the
+                flattened CP values and the (flattened) index of the entry of each CP value
+        """
+
+        zones = GroupsModel.student_test_zones
+
+        genes = list(self._dynamic_matrices.keys())
+        samples = list(collections.OrderedDict.fromkeys(itertools.chain.from_iterable(df.columns for df in self._dynamic_matrices.values())))
+        sample_indexes = dict([(sample, i) for i, sample in enumerate(samples)])
+
+        shape = (len(genes), len(zones), len(samples))
+
+        # Gather the lists of CP values of all the dynamic matrices in a single gene x zone x sample tensor
+        cells = np.empty(shape, dtype=object)
+        cells.fill(())
+        for i, gene in enumerate(genes):
+            df = self._dynamic_matrices[gene]
+            columns = [sample_indexes[sample] for sample in df.columns]
+            cells[i][:, columns] = df.loc[zones, :].to_numpy()
+        cells = cells.ravel()
+
+        # Flatten the CP values in one go
+        counts = np.fromiter((len(cell) for cell in cells), dtype=np.int64, count=cells.size)
+        values = np.fromiter(itertools.chain.from_iterable(cells), dtype=np.float64, count=counts.sum())
+        cell_indexes = np.repeat(np.arange(cells.size), counts)
+
+        return genes, samples, counts.reshape(shape), values, cell_indexes
+
+    def _get_cp_values(self):
+        """Return the CP values of all the dynamic matrices for the student test zones.
+
+        The CP values are gathered once and cached until new dynamic matrices are set.
+
+        Returns:
+            5-tuple: the CP values (see _gather_cp_values)
+        """
+
+        return self._results.get('cp values', self._gather_cp_values)
+
+    def _get_pooled_statistics(self, groups):
+        """Return the mean, the standard deviation and the number of the CP values pooled over the samples of each group for
+        all the genes and student test zones.
+
+        The statistics of each group are cached separately so that only the groups not yet displayed are computed on export.
+
+        Args:
+            groups (list of str): the groups
+
+        Returns:
+            2-tuple: the genes and the (mean, stddev, n) x n genes x n zones x n groups statistics
+        """
+
+        genes, samples, _, _, _ = self._get_cp_values()
+
+        group_statistics = []
+        for group_samples in self._get_samples_per_group(samples, groups).values():
+            group_statistics.append(self._results.get(('pooled statistics', tuple(group_samples)), self._compute_pooled_statistics, group_samples))
+
+        return genes, np.stack([np.stack(statistics) for statistics in group_statistics], axis=-1).astype(np.float64)
+
+    def _get_sample_means(self):
+        """Return the mean CP value of each sample for each gene and student test zone of the dynamic matrices.
+
+        The means are computed for all the genes at once and are cached until new dynamic matrices are set.
+
+        Returns:
+            3-tuple: the genes, the samples and the (n genes, n zones, n samples) means. The means of the samples
+                which have no CP value or which are not registered in the dynamic matrix of a gene are NaN.
+        """
+
+        return self._results.get('sample means', self._compute_sample_means)
+
+    def _invalidate_groups_per_sample(self, *args):
+        """Invalidate the sample -> groups index.
+        """
+
+        self._groups_per_sample = None
+
     def add_group(self, group_name):
         """Add a new group to the model.
 
@@ -69,7 +353,7 @@ class GroupsModel(QtCore.QAbstractListModel):
 
         # Update the model
         self.beginInsertRows(QtCore.QModelIndex(), self.rowCount(), self.rowCount())
-        self._groups.append([group_name, DroppableModel(self), True])
+        self._groups.append([group_name, self._create_samples_per_group_model(), True])
         self.endInsertRows()
 
     def clear(self):
@@ -126,6 +410,8 @@ class GroupsModel(QtCore.QAbstractListModel):
                 if ct_matrix.iloc[i, j]:
                     means.iloc[i, j] = np.mean(ct_matrix.iloc[i, j])
 
+        import scipy.stats as stats
+
         geom_means = stats.gmean(means.loc[reference_genes, :], axis=0)
 
         geom_means = pd.DataFrame([geom_means], index=['gmean'], columns=means.columns)
@@ -173,76 +459,141 @@ class GroupsModel(QtCore.QAbstractListModel):
         """Export the model to an excel spreadsheet
 
         Args:
-            workbook (openpyxl.workbook.workbook.Workbook): the excel spreadsheet
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only excel spreadsheet
         """
 
-        # Create a worksheet which will store the groups contents
-        worksheet = workbook.create_sheet('Groups')
-
         sorted_groups = sorted(self._groups, key=lambda x: x[0])
 
-        for i, (group, samples_per_group_model, _) in enumerate(sorted_groups):
-            worksheet.cell(row=1, column=i+1).value = group
-            for j, sample in enumerate(samples_per_group_model.items):
-                worksheet.cell(row=j+2, column=i+1).value = sample
+        # Create a worksheet which will store the groups contents, one group per column
+        with SheetWriter(workbook, 'Groups') as writer:
+            writer.write(1, 1, [group for group, _, _ in sorted_groups])
+            writer.write_rows(2, 1, itertools.zip_longest(*[model.items for _, model, _ in sorted_groups]))
 
         # Create a worksheet which will store the group control. If None has been set, the sheet will be empty
-        worksheet = workbook.create_sheet('Group control')
-        if self._group_control is not None:
-            worksheet.cell(row=1, column=1).value = self._group_control
-
-        # Create a worksheet for storing the results of the statistics computation
-        worksheet = workbook.create_sheet('Statistics')
+        with SheetWriter(workbook, 'Group control') as writer:
+            if self._group_control is not None:
+                writer.write(1, 1, [self._group_control])
 
         statistics = self.get_statistics(selected_groups=[v[0] for v in sorted_groups])
-        if not statistics:
-            return
 
-        comp = 1
-        for gene, d in statistics.items():
+        # Create a worksheet for storing the results of the statistics computation
+        with SheetWriter(workbook, 'Statistics') as writer:
 
-            worksheet.cell(row=comp, column=1).value = gene
+            if not statistics:
+                return
 
-            for zone, df in d.items():
-                comp += 1
-                worksheet.cell(row=comp, column=1).value = zone
+            comp = 1
+            for gene, d in statistics.items():
 
-                comp += 1
-                for i, v in enumerate(df.columns):
-                    worksheet.cell(row=comp, column=i+2).value = v
+                writer.write(comp, 1, [gene])
 
-                for i, row in enumerate(df.index):
+                for zone, df in d.items():
                     comp += 1
-                    worksheet.cell(row=comp, column=1).value = row
-                    for j, _ in enumerate(df.columns):
-                        worksheet.cell(row=comp, column=j+2).value = df.iloc[i, j]
+                    writer.write(comp, 1, [zone])
 
-                comp += 2
+                    comp = writer.write_dataframe(comp + 1, df)
 
-        # Create a worksheet for storing the results of the student tests
-        worksheet = workbook.create_sheet('Student tests')
+                    comp += 2
 
         student_test = self.run_student_test()
 
-        comp = 1
-        for gene, d in student_test.items():
-            worksheet.cell(row=comp, column=1).value = gene
+        # The p-values adjusted over all the genes and zones are written on the right of the per gene and zone ones
+        family_wide_student_test = self.run_student_test(family_wide=True)
+
+        # Create a worksheet for storing the results of the student tests
+        with SheetWriter(workbook, 'Student tests') as writer:
+
+            comp = 1
+            for gene, d in student_test.items():
+                writer.write(comp, 1, [gene])
 
-            for zone, df in d.items():
-                comp += 1
-                worksheet.cell(row=comp, column=1).value = zone
+                for zone, df in d.items():
+                    comp += 1
+                    offset = len(df.columns) + 3
+                    writer.write(comp, 1, [zone, 'holm (per gene and zone)'])
+                    writer.write(comp, offset, ['{} (all genes and zones)'.format(self._family_wide_correction)])
 
-                comp += 1
-                for i, v in enumerate(df.columns):
-                    worksheet.cell(row=comp, column=i+2).value = v
+                    family_wide_df = family_wide_student_test[gene][zone]
 
-                for i, row in enumerate(df.index):
                     comp += 1
-                    worksheet.cell(row=comp, column=1).value = row
-                    for j, _ in enumerate(df.columns):
-                        worksheet.cell(row=comp, column=j+2).value = df.iloc[i, j]
+                    writer.write(comp, 2, df.columns)
+                    writer.write(comp, offset + 1, family_wide_df.columns)
+
+                    for row, values, family_wide_values in zip(df.index, df.to_numpy().tolist(), family_wide_df.to_numpy().tolist()):
+                        comp += 1
+                        writer.write(comp, 1, [row] + values)
+                        writer.write(comp, offset, [row] + family_wide_values)
+
+                    comp += 2
+
+    def export_tidy(self, bundle):
+        """Export the groups, their statistics and the pairwise student tests between the selected groups to a tidy bundle.
+
+        The following tables are written:
+            - groups: one row per group and sample with the selection and group control status of the group
+            - group_statistics: one row per gene, student test zone and group
+            - group_tests: one row per gene, student test zone and pair of selected groups with the unadjusted, the Holm-adjusted
+              (per gene and zone) and the family-wide adjusted (over all genes and zones) p-values and the effect sizes. The
+              effect sizes are the ones of the first group of the pair with respect to the second one.
+
+        Args:
+            bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
+        """
+
+        sorted_groups = sorted(self._groups, key=lambda x: x[0])
+
+        groups = pd.DataFrame([(group, sample, selected, group == self._group_control)
+                               for group, model, selected in sorted_groups for sample in model.items],
+                              columns=['group', 'sample', 'selected', 'control'])
+        bundle.write_table('groups', groups)
+
+        if self._dynamic_matrices is None or not sorted_groups:
+            return
+
+        zones = GroupsModel.student_test_zones
+
+        group_names = [group for group, _, _ in sorted_groups]
+        genes, group_statistics = self._get_pooled_statistics(group_names)
+        bundle.write_table('group_statistics', to_long_form([('gene', genes), ('zone', zones), ('group', group_names)],
+                                                            [('mean', group_statistics[0]),
+                                                             ('stddev', group_statistics[1]),
+                                                             ('n', group_statistics[2].astype(np.int64))]))
+
+        if not any([selected for _, _, selected in self._groups]):
+            return
+
+        try:
+            genes, selected_groups, n_values, p_values, _ = self._compute_group_tests('student t')
+        except Exception as error:
+            logging.error('Can not compute student t test: {}'.format(str(error)))
+            return
+
+        _, group_statistics = self._compute_group_statistics()
+        effect_sizes = group_statistics['effect sizes']
+
+        # The genes and zones without any value do not take part to the adjustment
+        has_values = np.any(n_values > 0, axis=-1)
+        p_values = np.where(has_values[:, :, np.newaxis, np.newaxis], p_values, np.nan)
+
+        rows, columns = np.triu_indices(len(selected_groups), k=1)
+
+        values = [('n_1', n_values[:, :, rows].astype(np.int64)),
+                  ('n_2', n_values[:, :, columns].astype(np.int64)),
+                  ('p_value', p_values[..., rows, columns]),
+                  ('p_value_holm', adjust_pairwise_p_values(p_values, 'holm')[..., rows, columns]),
+                  ('p_value_family_wide', adjust_pairwise_p_values(p_values, self._family_wide_correction, family_wide=True)[..., rows, columns])]
+        values.extend([(tidy_column(effect_size), effect_sizes[effect_size][..., rows, columns]) for effect_size in EFFECT_SIZES])
 
-                comp += 2
+        group_tests = to_long_form([('gene', genes), ('zone', zones), ('pair', range(len(rows)))], values)
+        group_tests = group_tests[np.repeat(has_values.ravel(), len(rows))]
+
+        pairs = group_tests.pop('pair').to_numpy(dtype=np.int64)
+        selected_groups = np.asarray(selected_groups, dtype=object)
+        group_tests.insert(2, 'group_1', selected_groups[rows[pairs]])
+        group_tests.insert(3, 'group_2', selected_groups[columns[pairs]])
+        group_tests.insert(4, 'family_wide_correction', self._family_wide_correction)
+
+        bundle.write_table('group_tests', group_tests.reset_index(drop=True))
 
     def flags(self, index):
         """Return the flag for the item with specified index.
@@ -279,43 +630,84 @@ class GroupsModel(QtCore.QAbstractListModel):
             logging.error('No group selected for getting statistics')
             return None
 
+        groups = [group for group, _ in selected_groups]
+
+        genes, group_statistics = self._get_pooled_statistics(groups)
+
         statistics = collections.OrderedDict()
 
-        # Loop over the dynamc matrices
-        for gene, df in self._dynamic_matrices.items():
+        for i, gene in enumerate(genes):
 
             statistics[gene] = collections.OrderedDict()
 
-            # Loop over the student test zones
-            for zone in GroupsModel.student_test_zones:
+            for j, zone in enumerate(GroupsModel.student_test_zones):
 
-                # The statistics will be stored in a pandas DataFramewhose indexes are resp. the average, the stds and the number of values and the columns are the group names
-                statistics_per_gene_and_zone = pd.DataFrame(np.nan, index=['mean', 'stddev', 'n'], columns=[group for group, _ in selected_groups])
+                # The statistics are stored in a pandas DataFrame whose indexes are resp. the average, the stds and the number of values
+                # and the columns are the group names
+                statistics[gene][zone] = pd.DataFrame(group_statistics[:, i, j, :], index=['mean', 'stddev', 'n'], columns=groups)
 
-                # Loop over the selected groups
-                for group, samples_per_group_model in selected_groups:
+        return statistics
 
-                    values = []
-                    for sample in samples_per_group_model.items:
-                        if sample not in df.columns:
-                            continue
-                        values.extend(df.loc[zone, sample])
-                    if values:
-                        mean = np.mean(values)
-                        stddev = np.std(values)
-                    else:
-                        mean = stddev = np.nan
+    def get_effect_sizes(self):
+        """Return the effect sizes between all the pairs of selected groups for each gene and student test zone.
 
-                    statistics_per_gene_and_zone.loc['mean', group] = mean
-                    statistics_per_gene_and_zone.loc['stddev', group] = stddev
-                    statistics_per_gene_and_zone.loc['n', group] = len(values)
+        The effect sizes are computed from the mean CP value of each sample in the same pass as the group tests. The CP
+        fold changes are computed from the CP values which are not normalized by the reference genes (delta-CT) with the
+        ct power of each gene (2 by default).
 
-                statistics[gene][zone] = statistics_per_gene_and_zone
+        Returns:
+            3-tuple: the genes, the selected groups and the (n genes, n zones, n groups, n groups) effect sizes for each
+                entry of lightcycler.kernel.utils.group_tests.EFFECT_SIZES
+        """
 
-        return statistics
+        if self._dynamic_matrices is None or not any([selected for _, _, selected in self._groups]):
+            return [], [], collections.OrderedDict()
+
+        _, group_statistics = self._compute_group_statistics()
+
+        return group_statistics['genes'], group_statistics['groups'], group_statistics['effect sizes']
+
+    def get_effect_sizes_per_gene(self, effect_size):
+        """Return an effect size between all the pairs of selected groups for each gene and student test zone.
+
+        Args:
+            effect_size (str): the effect size. One of lightcycler.kernel.utils.group_tests.EFFECT_SIZES.
+
+        Returns:
+            collections.OrderedDict: the effect size (pandas.DataFrame) between the pairs of groups for each gene and
+                student test zone which has values
+        """
+
+        effect_size_per_gene = collections.OrderedDict()
+
+        genes, groups, effect_sizes = self.get_effect_sizes()
+        if not genes:
+            return effect_size_per_gene
+
+        _, group_statistics = self._compute_group_statistics()
+        n_values = group_statistics['statistics'][0]
+
+        values = effect_sizes[effect_size]
+
+        for i, gene in enumerate(genes):
+            effect_size_per_gene[gene] = collections.OrderedDict()
+            for j, zone in enumerate(GroupsModel.student_test_zones):
+                if np.any(n_values[i, j] > 0):
+                    effect_size_per_gene[gene][zone] = pd.DataFrame(values[i, j], index=groups, columns=groups)
+
+        return effect_size_per_gene
 
     def get_outliers(self, group):
         """Compute the outliers for each gene and zone.
+
+        The results are cached per group and are recomputed only if the group contents or the dynamic matrices
+        have changed since the last call.
+
+        Args:
+            group (str): the group
+
+        Returns:
+            collections.OrderedDict: the outliers for each gene and student test zone
         """
 
         outliers = collections.OrderedDict()
@@ -325,7 +717,17 @@ class GroupsModel(QtCore.QAbstractListModel):
         if group not in all_groups:
             logging.error('Unknown group: {}'.format(group))
         else:
-            samples_per_group_model = all_groups[group]
+            # The items are copied on each access hence they are read once for all the genes and zones
+            samples = all_groups[group].items
+
+            cache_key = (tuple(samples), self._data_version)
+            if group in self._outliers_cache:
+                key, cached_outliers = self._outliers_cache[group]
+                if key == cache_key:
+                    return cached_outliers
+
+            # The outliers package pulls in scipy hence it is only loaded when the outliers are computed
+            from outliers import smirnov_grubbs as grubbs
 
             # Loop over the genes
             for gene, df in self._dynamic_matrices.items():
@@ -336,7 +738,7 @@ class GroupsModel(QtCore.QAbstractListModel):
                 for zone in GroupsModel.student_test_zones:
 
                     values = []
-                    for sample in samples_per_group_model.items:
+                    for sample in samples:
                         # If the sample is not registered anymore in the dynamic matrix skip it
                         if sample not in df.columns:
                             continue
@@ -354,6 +756,8 @@ class GroupsModel(QtCore.QAbstractListModel):
                     else:
                         outliers[gene][zone] = ([], [])
 
+            self._outliers_cache[group] = (cache_key, outliers)
+
         return outliers
 
     @ property
@@ -395,6 +799,22 @@ class GroupsModel(QtCore.QAbstractListModel):
 
         return [group for group, _, _ in self._groups]
 
+    @property
+    def groups_per_sample(self):
+        """Return the sample -> groups index.
+
+        Returns:
+            dict: the groups (list of str) each sample belongs to
+        """
+
+        if self._groups_per_sample is None:
+            self._groups_per_sample = {}
+            for group, samples_per_group_model, _ in self._groups:
+                for sample in samples_per_group_model.items:
+                    self._groups_per_sample.setdefault(sample, []).append(group)
+
+        return self._groups_per_sample
+
     @ property
     def groups(self):
         """Return the groups.
@@ -426,12 +846,14 @@ class GroupsModel(QtCore.QAbstractListModel):
 
         self._groups = []
 
+        self._outliers_cache.clear()
+
+        self._invalidate_groups_per_sample()
+
         for group in groups.columns:
             samples = groups[group].dropna()
 
-            samples_per_group_model = DroppableModel()
-            for sample in samples:
-                samples_per_group_model.add_item(sample)
+            samples_per_group_model = self._create_samples_per_group_model(samples)
 
             self._groups.append([group, samples_per_group_model, True])
 
@@ -446,6 +868,11 @@ class GroupsModel(QtCore.QAbstractListModel):
 
         self._dynamic_matrices = dynamic_matrices
 
+        # The dynamic matrices are rebuilt each time the raw data changes, hence any cached result is obsolete
+        self._data_version += 1
+        self._outliers_cache.clear()
+        self._results.clear()
+
     def remove_groups(self, items):
         """Remove groups from the models
         """
@@ -464,9 +891,12 @@ class GroupsModel(QtCore.QAbstractListModel):
 
         for idx in indexes:
             self.beginRemoveRows(QtCore.QModelIndex(), idx, idx)
+            self._outliers_cache.pop(self._groups[idx][0], None)
             del self._groups[idx]
             self.endRemoveRows()
 
+        self._invalidate_groups_per_sample()
+
     def reset(self):
         """Reset the model.
         """
@@ -474,6 +904,9 @@ class GroupsModel(QtCore.QAbstractListModel):
         self.__dynamic_matrices = None
         self._groups = []
         self._group_control = None
+        self._outliers_cache.clear()
+        self._results.clear()
+        self._invalidate_groups_per_sample()
         self.layoutChanged.emit()
 
     def rowCount(self, parent=None):
@@ -482,64 +915,171 @@ class GroupsModel(QtCore.QAbstractListModel):
 
         return len(self._groups)
 
-    def run_student_test(self):
-        """Perform a pairwise student test over the groups.
+    @property
+    def family_wide_correction(self):
+        """Return the method used to adjust the p-values over all the genes and zones at once.
+
+        Returns:
+            str: the method
+        """
+
+        return self._family_wide_correction
+
+    @family_wide_correction.setter
+    def family_wide_correction(self, method):
+        """Set the method used to adjust the p-values over all the genes and zones at once.
+
+        Args:
+            method (str): the method. One of lightcycler.kernel.utils.multiple_testing.ADJUSTMENT_METHODS.
+        """
+
+        self._family_wide_correction = method
+
+    @property
+    def ct_power_per_gene(self):
+        """Return the ct power of each gene used for computing the CP fold changes.
+
+        Returns:
+            dict: the ct power of each gene
         """
 
-        student_test_per_gene = collections.OrderedDict()
+        return self._ct_power_per_gene
+
+    @ct_power_per_gene.setter
+    def ct_power_per_gene(self, ct_power_per_gene):
+        """Set the ct power of each gene used for computing the CP fold changes.
+
+        Args:
+            ct_power_per_gene (dict): the ct power of each gene. The genes missing from it use a ct power of 2.
+        """
+
+        self._ct_power_per_gene = dict(ct_power_per_gene or {})
+
+    def run_group_tests(self, test='student t', p_adjust='holm', family_wide=False):
+        """Perform a group test over the selected groups for all the genes and student test zones at once.
+
+        Args:
+            test (str): the test. One of lightcycler.kernel.utils.group_tests.GROUP_TESTS.
+            p_adjust (str): the adjustment method of the pairwise p-values. One of
+                lightcycler.kernel.utils.multiple_testing.ADJUSTMENT_METHODS or None.
+            family_wide (bool): if True, the p-values are adjusted over all the pairs of groups of all the genes and
+                zones at once, otherwise over the pairs of groups of each gene and zone
+
+        Returns:
+            collections.OrderedDict: the pairwise p-values (pandas.DataFrame) for each gene and student test zone. For
+                the omnibus tests, the pairwise p-values are the ones of the post-hoc test and an additional row stores
+                the omnibus p-value.
+        """
+
+        test_per_gene = collections.OrderedDict()
 
         if self._dynamic_matrices is None:
-            return student_test_per_gene
+            return test_per_gene
 
-        selected_groups = [(group, samples_per_group_model) for group, samples_per_group_model, selected in self._groups if selected]
+        if not any([selected for _, _, selected in self._groups]):
+            logging.warning('No group selected for {} test'.format(test))
+            return test_per_gene
 
-        selected_group_names = [group[0] for group in selected_groups]
+        try:
+            genes, selected_groups, n_values, p_values, omnibus_p_values = self._compute_group_tests(test)
+        except Exception as error:
+            logging.error('Can not compute {} test: {}'.format(test, str(error)))
+            return test_per_gene
 
-        # Loop over the gene and perform the student test for this gene
-        for gene, dynamic_matrix in self._dynamic_matrices.items():
+        # The genes and zones without any value do not take part to the adjustment
+        has_values = np.any(n_values > 0, axis=-1)
+        p_values = np.where(has_values[:, :, np.newaxis, np.newaxis], p_values, np.nan)
 
-            # Create a dict for each student test zone
-            student_test_per_gene[gene] = collections.OrderedDict()
+        p_values = adjust_pairwise_p_values(p_values, p_adjust, family_wide=family_wide)
+        if omnibus_p_values is not None and family_wide and p_adjust is not None:
+            omnibus_p_values = adjust_p_values(np.where(has_values, omnibus_p_values, np.nan), p_adjust, axis=None)
 
-            # Loop over the zones
-            for zone in GroupsModel.student_test_zones:
+        for i, gene in enumerate(genes):
 
-                # Create a data frame which contains as entry the name of the group and the average of each sample
-                df = pd.DataFrame(columns=['groups', 'averages'])
+            test_per_gene[gene] = collections.OrderedDict()
 
-                for group, samples_per_group_model in selected_groups:
+            for j, zone in enumerate(GroupsModel.student_test_zones):
 
-                    for sample in samples_per_group_model.items:
+                if not has_values[i, j]:
+                    logging.warning('No value found in the selected groups for gene {} zone {}'.format(gene, zone))
+                    continue
 
-                        # Check that the sample is in the dynamic matrix
-                        if sample not in dynamic_matrix.columns:
-                            continue
+                df = pd.DataFrame(p_values[i, j], index=selected_groups, columns=selected_groups)
+                if omnibus_p_values is not None:
+                    df.loc[test] = omnibus_p_values[i, j]
 
-                        if not dynamic_matrix.loc[zone, sample]:
-                            continue
+                test_per_gene[gene][zone] = df
+
+        return test_per_gene
+
+    def run_resampling(self, n_resamples=10000, confidence=0.95, seed=0, n_workers=None):
+        """Compute the bootstrap confidence intervals and the permutation p-values of the mean differences between the
+        selected groups for all the genes and student test zones.
 
-                        mean = np.mean(dynamic_matrix.loc[zone, sample])
-                        row = pd.DataFrame([[group, mean]], columns=['groups', 'averages'])
-                        df = pd.concat([df, row])
+        The resampling is performed on the mean CP value of each sample.
 
-                # If the dataframe storing the group and average per sample is not empty compute the student test
-                if not df.empty:
+        Args:
+            n_resamples (int): the number of bootstrap and permutation replicates
+            confidence (float): the confidence level of the bootstrap intervals
+            seed (int): the seed of the random generator
+            n_workers (int): the number of worker processes over which the genes are spread. If None, the resampling is
+                performed in the current process.
 
-                    if df.isnull().values.any():
-                        logging.warning('NaN values detected for {} group in zone {} of gene {}'.format(group, zone, gene))
+        Returns:
+            collections.OrderedDict: for each entry of lightcycler.kernel.utils.resampling.RESAMPLING_RESULTS, the
+                (pandas.DataFrame) results between the pairs of groups for each gene and student test zone which has values
+        """
 
-                    # Any kind of error must be caught here
-                    try:
-                        student_test_per_gene[gene][zone] = sk.posthoc_ttest(df, val_col='averages', group_col='groups', p_adjust='holm')
-                    except:
-                        logging.error('Can not compute student test for gene {} zone {}. Skip it.'.format(gene, zone))
-                        student_test_per_gene[gene][zone] = pd.DataFrame(np.nan, index=selected_group_names, columns=selected_group_names)
-                        continue
+        resampling = collections.OrderedDict([(name, collections.OrderedDict()) for name in RESAMPLING_RESULTS])
 
-                else:
-                    logging.warning('No group selected for student test for gene {} zone {}'.format(gene, zone))
+        if self._dynamic_matrices is None:
+            return resampling
 
-        return student_test_per_gene
+        if not any([selected for _, _, selected in self._groups]):
+            logging.warning('No group selected for resampling')
+            return resampling
+
+        _, group_statistics = self._compute_group_statistics()
+
+        try:
+            results = run_resampling(group_statistics['sample means'],
+                                     group_statistics['membership'],
+                                     n_resamples=n_resamples,
+                                     confidence=confidence,
+                                     seed=seed,
+                                     n_workers=n_workers)
+        except Exception as error:
+            logging.error('Can not perform the resampling: {}'.format(str(error)))
+            return resampling
+
+        genes = group_statistics['genes']
+        groups = group_statistics['groups']
+        n_values = group_statistics['statistics'][0]
+
+        for name, values in results.items():
+            for i, gene in enumerate(genes):
+                resampling[name][gene] = collections.OrderedDict()
+                for j, zone in enumerate(GroupsModel.student_test_zones):
+                    if np.any(n_values[i, j] > 0):
+                        resampling[name][gene][zone] = pd.DataFrame(values[i, j], index=groups, columns=groups)
+
+        return resampling
+
+    def run_student_test(self, family_wide=False):
+        """Perform a pairwise student test over the selected groups.
+
+        Args:
+            family_wide (bool): if True, the p-values are adjusted over all the genes and zones at once with the family-wide
+                correction method, otherwise they are Holm-adjusted over the pairs of groups of each gene and zone
+
+        Returns:
+            collections.OrderedDict: the adjusted pairwise p-values (pandas.DataFrame) for each gene and student test zone
+        """
+
+        if family_wide:
+            return self.run_group_tests('student t', p_adjust=self._family_wide_correction, family_wide=True)
+        else:
+            return self.run_group_tests('student t')
 
     def setData(self, index, value, role):
         """Set the data for a given index and given role.
@@ -563,8 +1103,12 @@ class GroupsModel(QtCore.QAbstractListModel):
             if self._groups[row][0] == self._group_control:
                 self._group_control = value
 
+            self._outliers_cache.pop(self._groups[row][0], None)
+
             self._groups[row][0] = value
 
+            self._invalidate_groups_per_sample()
+
         return super(GroupsModel, self).setData(index, value, role)
 
     def sort(self):
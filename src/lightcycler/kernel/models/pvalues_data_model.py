@@ -4,8 +4,6 @@
 
 import logging
 
-import openpyxl
-
 from PyQt5 import QtCore, QtGui
 
 from lightcycler.kernel.models.exportable_data_model import ExportableDataModel
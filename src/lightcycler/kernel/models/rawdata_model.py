@@ -1,20 +1,19 @@
 import collections
+import contextlib
 import copy
-import csv
 import logging
-import os
-import re
 
 from PyQt5 import QtCore, QtGui
 
-import openpyxl
-
-import tabula
-
 import numpy as np
 
 import pandas as pd
 
+from lightcycler.kernel.readers.registry import ReaderError, read_data_file
+from lightcycler.kernel.utils.calibration import apply_run_offsets, estimate_run_offsets
+from lightcycler.kernel.utils.excel_writer import SheetWriter
+from lightcycler.kernel.utils.tidy_export import tidy_column
+
 
 class RawDataError(Exception):
     """This class implements exceptions related with the contents of the data.
@@ -35,6 +34,63 @@ class RawDataModel(QtCore.QAbstractTableModel):
 
         self._rawdata_default = copy.copy(self._rawdata)
 
+        # The column from which the CP values used for building the dynamic matrices are read
+        self._cp_column = 'CP'
+
+        # The calibrator samples used for the inter-run calibration
+        self._calibrators = []
+
+        # The registries of genes and samples. They are computed lazily and invalidated each time the raw data change.
+        self._genes = None
+
+        self._samples = None
+
+        # The run offsets per calibration set and CP column. They are computed lazily and invalidated each time the raw data change.
+        self._run_offsets = {}
+
+        # The nesting depth of the batched updates and whether the raw data have been updated during the current batch
+        self._batch_depth = 0
+
+        self._batch_updated = False
+
+    def _emit_data_updated(self):
+        """Emit the data_updated signal, or defer it to the end of the current batched update.
+        """
+
+        if self._batch_depth > 0:
+            self._batch_updated = True
+            return
+
+        self.data_updated.emit(self)
+
+    def _invalidate_registries(self):
+        """Invalidate the registries of genes and samples and the run offsets.
+        """
+
+        self._genes = None
+
+        self._samples = None
+
+        self._run_offsets = {}
+
+    @contextlib.contextmanager
+    def batch_update(self):
+        """Batch several updates of the raw data into a single data_updated signal.
+
+        The data_updated signal is emitted once on leaving the outermost batch if any update has been made within it, so
+        that the dynamic matrices and the models depending on them are updated only once.
+        """
+
+        self._batch_depth += 1
+
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_updated:
+                self._batch_updated = False
+                self.data_updated.emit(self)
+
     def remove_indexes(self, indexes):
         """Remove a set of indexes from the model.
 
@@ -48,7 +104,9 @@ class RawDataModel(QtCore.QAbstractTableModel):
 
         self.layoutChanged.emit()
 
-        self.data_updated.emit(self)
+        self._invalidate_registries()
+
+        self._emit_data_updated()
 
     def flags(self, index):
         """
@@ -96,147 +154,12 @@ class RawDataModel(QtCore.QAbstractTableModel):
             else:
                 self._rawdata.iloc[row, col] = value
 
-        # Emit a signal that the raw data has been updated
-        self.data_updated.emit(self)
-
-        return True
-
-    def read_pdf_file(self, pdf_file):
-        """Read a PDF data file.
-
-        Args:
-            pdf_file: the pdf file
-        """
-
-        filename, _ = os.path.splitext(pdf_file)
-
-        basename = os.path.basename(filename)
-
-        match = re.match(r'(\d{4}-\d{2}-\d{2}) .*(RT(\d+)(-\d+)?)_(\w+)', basename)
-        if match is None:
-            raise IOError('Invalid filename')
-
-        matches = match.groups()
-        date = matches[0]
-        rt = matches[1]
-        gene = matches[-1]
-
-        pages = tabula.read_pdf(pdf_file, pages='all')
-
-        data_frame = pd.DataFrame()
-
-        # Loop over the table stored in each page of the pdf document
-        for df in pages:
-            data_frame = pd.concat([data_frame, df], ignore_index=True)
-
-        # Drop unused columns
-        for col in ['Inc', 'Type', 'Concentration', 'Standard', 'Status']:
-            data_frame.drop(col, inplace=True, axis=1)
-
-        n_samples = len(data_frame.index)
-
-        # Clean up the Name column from leading "Sample" and "Control" strings
-        for i in range(n_samples):
-            name = data_frame['Name'].iloc[i].strip()
-            data_frame['Name'].iloc[i] = name.split(' ')[-1].strip()
-
-        names_and_zones = []
-        for i in range(n_samples):
-            match = re.findall(r'(\d+)([ABCDEF])', data_frame['Name'].iloc[i])
-            if match:
-                names_and_zones.append(match[0])
-            else:
-                names_and_zones.append([data_frame['Name'].iloc[i], ''])
-
-        names = [v[0] for v in names_and_zones]
-        zones = [v[1] for v in names_and_zones]
-        # The F zone are the same that E zone
-        zones = [z if z != 'F' else 'E' for z in zones]
-        # If zone is an empty string set it to Z
-        zones = [z if z else 'Z' for z in zones]
-        zones = ['P' if name == 'RT' else zones[i] for i, name in enumerate(names)]
-
-        data_frame['Name'] = names
-
-        data_frame.insert(0, 'Date', [date]*n_samples)
-
-        data_frame.insert(1, 'Gene', [gene]*n_samples)
-
-        data_frame.insert(2, 'RT', [rt]*n_samples)
-
-        data_frame.insert(5, 'Zone', zones)
-
-        data_frame.insert(7, 'File', [basename]*n_samples)
-
-        data_frame['Date'] = pd.to_datetime(data_frame['Date'])
-        data_frame['CP'] = data_frame['CP'].str.replace(',', '.').astype(np.float)
-
-        self._rawdata = pd.concat([self._rawdata, data_frame])
-
-        # Emit a signal that the raw data has been updated
-        self.data_updated.emit(self)
-
-    def read_csv_file(self, csv_file):
-        """Read a csv data file.
-
-        Args:
-            csv_file: the csv file
-        """
-
-        filename, _ = os.path.splitext(csv_file)
-
-        basename = os.path.basename(filename)
-
-        match = re.match(r'(\d{4}-\d{2}-\d{2}) .*(RT(\d+)(-\d+)?)_(\w+)', basename)
-        if match is None:
-            raise IOError('Invalid filename')
-
-        matches = match.groups()
-        date = matches[0]
-        rt = matches[1]
-        gene = matches[-1]
-
-        fin = open(csv_file, 'r')
-        data = fin.readlines()
-        fin.close()
-
-        # Skip the first two lines
-        _ = data.pop(0)
-        _ = data.pop(0)
-
-        reader = csv.reader(data, delimiter='\t')
-
-        data_frame = pd.DataFrame(columns=['Date', 'Gene', 'RT', 'Pos', 'Name', 'Zone', 'CP', 'File'])
-
-        for row in reader:
-            line = {}
-            line['Date'] = [date]
-            line['Gene'] = [gene]
-            line['RT'] = [rt]
-            line['Pos'] = [row[2]]
-            line['Name'] = [row[3].strip().split(' ')[-1]]
-            match = re.findall(r'(\d+)([ABCDEF])', line['Name'][0])
-            if match:
-                line['Name'] = [match[0][0]]
-                line['Zone'] = [match[0][1]]
-            else:
-                line['Zone'] = ['Z']
-
-            cp = float(row[4].replace(',', '.')) if row[4].strip() else np.nan
-            line['CP'] = [cp]
-            line['File'] = [basename]
-            data_frame = pd.concat([data_frame, pd.DataFrame.from_dict(line)])
-
-        data_frame['Date'] = pd.to_datetime(data_frame['Date'])
-
-        data_frame.reset_index(drop=True, inplace=True)
-
-        self._rawdata = pd.concat([self._rawdata, data_frame])
+        self._invalidate_registries()
 
         # Emit a signal that the raw data has been updated
-        self.data_updated.emit(self)
+        self._emit_data_updated()
 
-    _readers = {'.pdf': read_pdf_file, '.csv': read_csv_file, '.txt': read_csv_file}
+        return True
 
     def add_data(self, data_file, sort=False):
         """Add new data to the model.
@@ -245,15 +168,19 @@ class RawDataModel(QtCore.QAbstractTableModel):
             data (pandas.DataFrame): the data
         """
 
-        _, ext = os.path.splitext(data_file)
-        ext = ext.lower()
-
         try:
-            self._readers[ext](self, data_file)
-        except KeyError:
-            logging.error('Unknown extension for data file {}'.format(data_file))
+            data_frame = read_data_file(data_file)
+        except ReaderError as error:
+            logging.error(str(error))
             return
 
+        self._rawdata = pd.concat([self._rawdata, data_frame])
+
+        self._invalidate_registries()
+
+        # Emit a signal that the raw data has been updated
+        self._emit_data_updated()
+
         if sort:
             self.sort()
 
@@ -267,9 +194,15 @@ class RawDataModel(QtCore.QAbstractTableModel):
 
         self._rawdata = pd.DataFrame()
 
+        self._cp_column = 'CP'
+
+        self._calibrators = []
+
         self.layoutChanged.emit()
 
-        self.data_updated.emit(self)
+        self._invalidate_registries()
+
+        self._emit_data_updated()
 
     def columnCount(self, parent=None):
         """Return the number of columns of the model for a given parent.
@@ -314,17 +247,31 @@ class RawDataModel(QtCore.QAbstractTableModel):
         """Export the raw data to an excel spreadsheet.
 
         Args:
-            workbook (openpyxl.workbook.workbook.Workbook): the workbook
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only workbook
+        """
+
+        with SheetWriter(workbook, 'Raw data') as writer:
+            writer.write(1, 1, self._rawdata.columns)
+            writer.write_rows(2, 1, self._rawdata.to_numpy(dtype=object))
+
+    def export_tidy(self, bundle):
+        """Export the raw data to the measurements table of a tidy bundle.
+
+        The table has one row per well. Its columns are the raw data columns renamed in snake case ('Name' being renamed
+        'sample'), the CP value used for building the dynamic matrices (cp_used) and the QC status (qc_passed).
+
+        Args:
+            bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
         """
 
-        worksheet = workbook.create_sheet('Raw data')
+        measurements = self._rawdata.rename(columns=lambda column: 'sample' if column == 'Name' else tidy_column(column))
+        measurements = measurements.reset_index(drop=True)
 
-        for i, v in enumerate(self._rawdata.columns):
-            worksheet.cell(row=1, column=i+1).value = v
+        if not self._rawdata.empty and self._cp_column in self._rawdata.columns:
+            measurements['cp_used'] = self.cp_values.to_numpy()
+            measurements['qc_passed'] = self.qc_mask.to_numpy()
 
-        for i in range(len(self._rawdata.index)):
-            for j in range(len(self._rawdata.columns)):
-                worksheet.cell(row=i+2, column=j+1).value = self._rawdata.iloc[i, j]
+        bundle.write_table('measurements', measurements)
 
     def headerData(self, col, orientation, role):
         """Returns the header data for a given row/column, orientation and role
@@ -340,6 +287,110 @@ class RawDataModel(QtCore.QAbstractTableModel):
                 return str(col+1)
         return None
 
+    @ property
+    def cp_column(self):
+        """Return the column from which the CP values used for building the dynamic matrices are read.
+
+        Returns:
+            str: the column
+        """
+
+        return self._cp_column
+
+    @ cp_column.setter
+    def cp_column(self, cp_column):
+        """Set the column from which the CP values used for building the dynamic matrices are read.
+
+        Args:
+            cp_column (str): the column
+        """
+
+        if cp_column not in self._rawdata.columns:
+            raise RawDataError('Unknown column {}'.format(cp_column))
+
+        if cp_column == self._cp_column:
+            return
+
+        self._cp_column = cp_column
+
+        self._emit_data_updated()
+
+    @ property
+    def calibrators(self):
+        """Return the calibrator samples used for the inter-run calibration.
+
+        Returns:
+            list of str: the calibrators
+        """
+
+        return self._calibrators
+
+    @ calibrators.setter
+    def calibrators(self, calibrators):
+        """Set the calibrator samples used for the inter-run calibration.
+
+        Args:
+            calibrators (list of str): the calibrators. If empty, the CP values are not calibrated.
+        """
+
+        calibrators = sorted(calibrators)
+        if calibrators == self._calibrators:
+            return
+
+        self._calibrators = calibrators
+
+        self._emit_data_updated()
+
+    @ property
+    def run_offsets(self):
+        """Return the CP offset of each run of each gene estimated from the calibrators.
+
+        The offsets are cached per calibration set and CP column until the raw data change.
+
+        Returns:
+            pandas.Series: the offset of each (Gene, Date, RT) run
+        """
+
+        key = (tuple(self._calibrators), self._cp_column)
+        if key not in self._run_offsets:
+            self._run_offsets[key] = estimate_run_offsets(self._rawdata, self._calibrators, self._cp_column)
+
+        return self._run_offsets[key]
+
+    @ property
+    def cp_values(self):
+        """Return the CP values used for building the dynamic matrices.
+
+        The values are read from the CP column and, if calibrators are set, the offset of their run is subtracted.
+
+        Returns:
+            pandas.Series: the CP values
+        """
+
+        # The cleared raw data have no columns at all
+        if self._cp_column not in self._rawdata.columns:
+            return pd.Series(np.nan, index=self._rawdata.index, dtype=np.float64)
+
+        if not self._calibrators or self._rawdata.empty:
+            return self._rawdata[self._cp_column]
+
+        return apply_run_offsets(self._rawdata, self.run_offsets, self._cp_column)
+
+    @ property
+    def qc_mask(self):
+        """Return the mask of the raw data which passed the quality controls.
+
+        The raw data with no quality control status are considered as passed.
+
+        Returns:
+            pandas.Series: the mask
+        """
+
+        if 'Melt QC' not in self._rawdata.columns:
+            return pd.Series(True, index=self._rawdata.index)
+
+        return ~self._rawdata['Melt QC'].isin([False])
+
     def get_row(self, sample, gene, index):
 
         cond = np.logical_and(self._rawdata['Name'] == sample, self._rawdata['Gene'] == gene)
@@ -372,7 +423,12 @@ class RawDataModel(QtCore.QAbstractTableModel):
         self._rawdata_default = copy.copy(self._rawdata)
         self.layoutChanged.emit()
 
-        self.data_updated.emit(self)
+        if self._cp_column not in self._rawdata.columns:
+            self._cp_column = 'CP'
+
+        self._invalidate_registries()
+
+        self._emit_data_updated()
 
     def on_reset(self):
 
@@ -380,7 +436,12 @@ class RawDataModel(QtCore.QAbstractTableModel):
 
         self.layoutChanged.emit()
 
-        self.data_updated.emit(self)
+        if self._cp_column not in self._rawdata.columns:
+            self._cp_column = 'CP'
+
+        self._invalidate_registries()
+
+        self._emit_data_updated()
 
     def on_change_value(self, sample, gene, index, new_value):
         """Change a value of the raw data.
@@ -401,6 +462,8 @@ class RawDataModel(QtCore.QAbstractTableModel):
         self._rawdata.loc[matches[index], 'CP'] = new_value
         self.layoutChanged.emit()
 
+        self._invalidate_registries()
+
     def on_remove_value(self, sample, gene, index):
         """Remove a value from the dynamic matrix for given sample, genes and index.
 
@@ -421,8 +484,69 @@ class RawDataModel(QtCore.QAbstractTableModel):
         self._rawdata.drop(matches[index], inplace=True)
         self._rawdata.reset_index(drop=True, inplace=True)
 
+        self._invalidate_registries()
+
         self.endRemoveRows()
 
+    def _set_curves_column(self, column, curves_index, values):
+        """Set a column of the raw data from values computed per curve.
+
+        The values are matched to the raw data through their Date, Gene, RT, Pos and Name keys. The raw data which have
+        no matching curve get a NaN value.
+
+        Args:
+            column (str): the column
+            curves_index (pandas.DataFrame): the Date, Gene, RT, Pos and Name of each curve
+            values (numpy.ndarray): the value of each curve
+        """
+
+        if self._rawdata.empty:
+            return
+
+        keys = ['Date', 'Gene', 'RT', 'Pos', 'Name']
+
+        def _normalize_keys(data_frame):
+            normalized = data_frame[keys].astype(str)
+            normalized['Date'] = pd.to_datetime(data_frame['Date']).dt.strftime('%Y-%m-%d')
+            return pd.MultiIndex.from_frame(normalized)
+
+        values_per_curve = pd.Series(values, index=_normalize_keys(curves_index))
+        # The last stored curve of a well wins
+        values_per_curve = values_per_curve[~values_per_curve.index.duplicated(keep='last')]
+
+        self._rawdata[column] = values_per_curve.reindex(_normalize_keys(self._rawdata)).to_numpy()
+
+        if not self._rawdata_default.empty:
+            self._rawdata_default[column] = values_per_curve.reindex(_normalize_keys(self._rawdata_default)).to_numpy()
+
+        self.layoutChanged.emit()
+
+        self._invalidate_registries()
+
+        self._emit_data_updated()
+
+    def set_called_cq(self, curves_index, cq):
+        """Set the Cq called from the amplification curves as the Cq column of the raw data.
+
+        Args:
+            curves_index (pandas.DataFrame): the Date, Gene, RT, Pos and Name of each curve
+            cq (numpy.ndarray): the Cq of each curve
+        """
+
+        self._set_curves_column('Cq', curves_index, np.asarray(cq, dtype=np.float64))
+
+    def set_melt_qc(self, curves_index, passed):
+        """Set the melt curves quality control status as the Melt QC column of the raw data.
+
+        The raw data whose melt curve failed the quality control are excluded from the dynamic matrices.
+
+        Args:
+            curves_index (pandas.DataFrame): the Date, Gene, RT, Pos and Name of each melt curve
+            passed (numpy.ndarray): whether each melt curve passed the quality control
+        """
+
+        self._set_curves_column('Melt QC', curves_index, np.asarray(passed, dtype=bool).astype(object))
+
     def rowCount(self, parent=None):
         """Return the number of rows of the model for a given parent.
 
@@ -434,23 +558,28 @@ class RawDataModel(QtCore.QAbstractTableModel):
 
     @ property
     def genes(self):
-        """Return the samples names stored in the raw data.
+        """Return the gene names stored in the raw data.
+
+        The list is cached until the raw data change and must not be modified.
 
         Returns:
-            list of str: the sample names
+            list of str: the gene names
         """
 
         if 'Gene' not in self._rawdata.columns:
             return []
 
-        genes = list(collections.OrderedDict.fromkeys(self._rawdata['Gene']))
+        if self._genes is None:
+            self._genes = list(collections.OrderedDict.fromkeys(self._rawdata['Gene']))
 
-        return genes
+        return self._genes
 
     @ property
     def samples(self):
         """Return the samples names stored in the raw data.
 
+        The list is cached until the raw data change and must not be modified.
+
         Returns:
             list of str: the sample names
         """
@@ -458,9 +587,10 @@ class RawDataModel(QtCore.QAbstractTableModel):
         if 'Name' not in self._rawdata.columns:
             return []
 
-        samples = list(collections.OrderedDict.fromkeys(self._rawdata['Name']))
+        if self._samples is None:
+            self._samples = list(collections.OrderedDict.fromkeys(self._rawdata['Name']))
 
-        return samples
+        return self._samples
 
     def sort(self):
         """Sort the raw data.
@@ -473,3 +603,5 @@ class RawDataModel(QtCore.QAbstractTableModel):
             raise RawDataError('"Gene" or "Date" columns are missing from the raw data')
 
         self._rawdata.sort_values(by=['Gene', 'Date'], inplace=True, ascending=[True, True])
+
+        self._invalidate_registries()
@@ -0,0 +1,286 @@
+"""This module implements the following functions:
+    - find_plate_layout
+    - parse_data_filename
+    - read_csv_file
+    - read_pdf_file
+    - read_plate_layout
+
+The readers of the lightcycler data files (PDF reports and tab separated exports) whose metadata (date, RT and gene) are
+stored in their filename.
+
+A file whose name has no gene (e.g. "2020-01-01 plate RT1.txt") is a whole-plate export which may contain several genes.
+The gene of each well is then read from the plate layout file stored next to it with the same basename and a .layout.csv
+or .layout.txt extension (e.g. "2020-01-01 plate RT1.layout.csv"). The wells missing from the layout are skipped.
+"""
+
+import collections
+import csv
+import os
+import re
+
+import numpy as np
+
+import pandas as pd
+
+# The extensions of the plate layout files
+PLATE_LAYOUT_EXTENSIONS = ['.layout.csv', '.layout.txt']
+
+
+def _normalize_position(position):
+    """Normalize a well position (e.g. ' a01 ' --> 'A1').
+
+    Args:
+        position (str): the position
+
+    Returns:
+        str: the normalized position
+    """
+
+    position = str(position).strip().upper()
+
+    match = re.match(r'^([A-Z]+)0*(\d+)$', position)
+    if match is None:
+        return position
+
+    return '{}{}'.format(*match.groups())
+
+
+def _get_plate_genes(data_file):
+    """Return the gene of each well of a whole-plate export read from its plate layout.
+
+    Args:
+        data_file (str): the data file
+
+    Returns:
+        collections.OrderedDict: the gene of each normalized well position
+
+    Raises:
+        IOError: if no plate layout is found for the data file
+    """
+
+    layout_file = find_plate_layout(data_file)
+    if layout_file is None:
+        raise IOError('No plate layout found for whole-plate export {}'.format(data_file))
+
+    return read_plate_layout(layout_file)
+
+
+def find_plate_layout(data_file):
+    """Return the plate layout file of a whole-plate export.
+
+    Args:
+        data_file (str): the data file
+
+    Returns:
+        str: the plate layout file or None if not found
+    """
+
+    filename, _ = os.path.splitext(data_file)
+
+    for extension in PLATE_LAYOUT_EXTENSIONS:
+        layout_file = filename + extension
+        if os.path.exists(layout_file):
+            return layout_file
+
+    return None
+
+
+def parse_data_filename(data_file):
+    """Parse the metadata stored in the name of a lightcycler data file.
+
+    The basename of the file must match the "<date> ... RT<n>_<gene>" pattern or the "<date> ... RT<n>" one for a
+    whole-plate export.
+
+    Args:
+        data_file (str): the data file
+
+    Returns:
+        4-tuple: the basename, the date, the RT and the gene. The gene is None for a whole-plate export.
+    """
+
+    filename, _ = os.path.splitext(data_file)
+
+    basename = os.path.basename(filename)
+
+    match = re.match(r'(\d{4}-\d{2}-\d{2}) .*(RT(\d+)(-\d+)?)(?:_(\w+))?', basename)
+    if match is None:
+        raise IOError('Invalid filename')
+
+    matches = match.groups()
+
+    return basename, matches[0], matches[1], matches[-1]
+
+
+def read_csv_file(csv_file):
+    """Read a csv data file.
+
+    For a whole-plate export, the gene of each well is read from its plate layout.
+
+    Args:
+        csv_file (str): the csv file
+
+    Returns:
+        pandas.DataFrame: the raw data
+    """
+
+    basename, date, rt, gene = parse_data_filename(csv_file)
+
+    genes = _get_plate_genes(csv_file) if gene is None else None
+
+    with open(csv_file, 'r') as fin:
+        data = fin.readlines()
+
+    # Skip the first two lines
+    reader = csv.reader(data[2:], delimiter='\t')
+
+    rows = []
+    for row in reader:
+        if genes is not None:
+            gene = genes.get(_normalize_position(row[2]))
+            if gene is None:
+                continue
+
+        name = row[3].strip().split(' ')[-1]
+        zone = 'Z'
+        match = re.findall(r'(\d+)([ABCDEF])', name)
+        if match:
+            name, zone = match[0]
+
+        cp = float(row[4].replace(',', '.')) if row[4].strip() else np.nan
+
+        rows.append((date, gene, rt, row[2], name, zone, cp, basename))
+
+    data_frame = pd.DataFrame(rows, columns=['Date', 'Gene', 'RT', 'Pos', 'Name', 'Zone', 'CP', 'File'], dtype=object)
+
+    data_frame['Date'] = pd.to_datetime(data_frame['Date'])
+    data_frame['CP'] = data_frame['CP'].astype(np.float64)
+
+    return data_frame
+
+
+def read_pdf_file(pdf_file):
+    """Read a PDF data file.
+
+    For a whole-plate export, the gene of each well is read from its plate layout.
+
+    Args:
+        pdf_file (str): the pdf file
+
+    Returns:
+        pandas.DataFrame: the raw data
+    """
+
+    basename, date, rt, gene = parse_data_filename(pdf_file)
+
+    genes = _get_plate_genes(pdf_file) if gene is None else None
+
+    # tabula starts a Java bridge hence it is only loaded when a PDF file is read
+    import tabula
+
+    pages = tabula.read_pdf(pdf_file, pages='all')
+
+    # Concatenate the table stored in each page of the pdf document
+    data_frame = pd.concat(pages, ignore_index=True)
+
+    # Drop unused columns
+    data_frame.drop(['Inc', 'Type', 'Concentration', 'Standard', 'Status'], inplace=True, axis=1)
+
+    if genes is None:
+        genes_per_well = [gene]*len(data_frame.index)
+    else:
+        # Skip the wells missing from the plate layout
+        genes_per_well = [genes.get(_normalize_position(pos)) for pos in data_frame['Pos']]
+        data_frame = data_frame[[g is not None for g in genes_per_well]].reset_index(drop=True)
+        genes_per_well = [g for g in genes_per_well if g is not None]
+
+    n_samples = len(data_frame.index)
+
+    # Clean up the Name column from leading "Sample" and "Control" strings
+    data_frame['Name'] = [name.strip().split(' ')[-1].strip() for name in data_frame['Name']]
+
+    names_and_zones = []
+    for name in data_frame['Name']:
+        match = re.findall(r'(\d+)([ABCDEF])', name)
+        if match:
+            names_and_zones.append(match[0])
+        else:
+            names_and_zones.append([name, ''])
+
+    names = [v[0] for v in names_and_zones]
+    zones = [v[1] for v in names_and_zones]
+    # The F zone are the same that E zone
+    zones = [z if z != 'F' else 'E' for z in zones]
+    # If zone is an empty string set it to Z
+    zones = [z if z else 'Z' for z in zones]
+    zones = ['P' if name == 'RT' else zones[i] for i, name in enumerate(names)]
+
+    data_frame['Name'] = names
+
+    data_frame.insert(0, 'Date', [date]*n_samples)
+
+    data_frame.insert(1, 'Gene', genes_per_well)
+
+    data_frame.insert(2, 'RT', [rt]*n_samples)
+
+    data_frame.insert(5, 'Zone', zones)
+
+    data_frame.insert(7, 'File', [basename]*n_samples)
+
+    data_frame['Date'] = pd.to_datetime(data_frame['Date'])
+    data_frame['CP'] = data_frame['CP'].astype(str).str.replace(',', '.').astype(np.float64)
+
+    return data_frame
+
+
+def read_plate_layout(layout_file):
+    """Read a plate layout file.
+
+    The file is a comma, semicolon or tab separated file given either in long form, with a header defining a position
+    (Pos or Position) and a Gene columns and one line per well, or as a grid whose header line holds the column numbers
+    and whose lines start with the row letter (e.g. A, B ...) followed by the gene of each well of the row. The empty
+    cells are skipped.
+
+    Args:
+        layout_file (str): the plate layout file
+
+    Returns:
+        collections.OrderedDict: the gene of each normalized well position
+
+    Raises:
+        IOError: if the file is not a valid plate layout file
+    """
+
+    with open(layout_file, 'r') as fin:
+        data = fin.read()
+
+    try:
+        dialect = csv.Sniffer().sniff(data.split('\n')[0], delimiters=',;\t')
+    except csv.Error:
+        raise IOError('Invalid plate layout file {}: unknown delimiter'.format(layout_file))
+
+    rows = [[v.strip() for v in row] for row in csv.reader(data.splitlines(), dialect) if any([v.strip() for v in row])]
+    if not rows:
+        raise IOError('Invalid plate layout file {}: empty file'.format(layout_file))
+
+    header = [v.lower() for v in rows[0]]
+
+    genes = collections.OrderedDict()
+
+    pos_column = next((header.index(c) for c in ['pos', 'position'] if c in header), None)
+    if pos_column is not None and 'gene' in header:
+        gene_column = header.index('gene')
+        for row in rows[1:]:
+            if len(row) > max(pos_column, gene_column) and row[gene_column]:
+                genes[_normalize_position(row[pos_column])] = row[gene_column]
+    else:
+        for row in rows[1:]:
+            if not re.match(r'^[A-Za-z]+$', row[0]):
+                raise IOError('Invalid plate layout file {}: invalid row {}'.format(layout_file, row[0]))
+            for column, gene in zip(rows[0][1:], row[1:]):
+                if gene:
+                    genes[_normalize_position(row[0] + column)] = gene
+
+    if not genes:
+        raise IOError('Invalid plate layout file {}: no gene found'.format(layout_file))
+
+    return genes
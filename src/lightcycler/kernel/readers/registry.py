@@ -0,0 +1,244 @@
+"""This module implements the following classes and functions:
+    - CANONICAL_COLUMNS
+    - ENTRY_POINTS_GROUP
+    - get_extensions
+    - get_reader
+    - read_data_file
+    - ReaderError
+    - register_reader
+    - RawDataReader
+
+The raw data readers are registered with the extensions and the filename patterns of the files they handle and the
+dotted path of the function which reads them. The module of a reader is only imported when a matching file is read so
+that the dependencies of a format (e.g. tabula for the PDF files) are loaded only if needed.
+
+Third party packages can register their own readers through the 'lightcycler.readers' entry points group. Each entry
+point must refer to a callable with no arguments which calls register_reader.
+
+A reader is a module-level function which takes the data file as single argument and returns a pandas.DataFrame in the
+canonical schema. It does not depend on any model hence it can be run in a worker process.
+"""
+
+import collections
+import fnmatch
+import importlib
+import logging
+import os
+
+import numpy as np
+
+import pandas as pd
+
+# The columns of the raw data returned by the readers
+CANONICAL_COLUMNS = ['Date', 'Gene', 'RT', 'Pos', 'Name', 'Zone', 'CP', 'File']
+
+# The name of the entry points group of the third party readers
+ENTRY_POINTS_GROUP = 'lightcycler.readers'
+
+
+class ReaderError(Exception):
+    """Exception raised for raw data readers related errors.
+    """
+
+
+class RawDataReader:
+    """This class implements a registered raw data reader whose function is imported at first use.
+    """
+
+    def __init__(self, name, extensions, target, patterns=None):
+        """Constructor.
+
+        Args:
+            name (str): the name of the reader
+            extensions (list of str): the extensions (e.g. '.pdf') of the files handled by the reader
+            target (str): the dotted path of the reader function given as 'module:function'
+            patterns (list of str): the glob patterns the basename of the handled files must match. If None, all the files
+                with a matching extension are handled.
+        """
+
+        self._name = name
+
+        self._extensions = [extension.lower() for extension in extensions]
+
+        self._target = target
+
+        self._patterns = patterns
+
+        self._function = None
+
+    @property
+    def extensions(self):
+        """Return the extensions of the files handled by the reader.
+
+        Returns:
+            list of str: the extensions
+        """
+
+        return self._extensions
+
+    @property
+    def function(self):
+        """Return the reader function, importing its module if not done yet.
+
+        Returns:
+            callable: the reader function
+        """
+
+        if self._function is None:
+            module, function = self._target.split(':')
+            self._function = getattr(importlib.import_module(module), function)
+
+        return self._function
+
+    def matches(self, data_file):
+        """Return whether a file is handled by the reader.
+
+        Args:
+            data_file (str): the data file
+
+        Returns:
+            bool: True if the file is handled by the reader
+        """
+
+        basename = os.path.basename(data_file)
+
+        _, ext = os.path.splitext(basename)
+        if ext.lower() not in self._extensions:
+            return False
+
+        if self._patterns is None:
+            return True
+
+        return any([fnmatch.fnmatch(basename, pattern) for pattern in self._patterns])
+
+    @property
+    def name(self):
+        """Return the name of the reader.
+
+        Returns:
+            str: the name
+        """
+
+        return self._name
+
+    @property
+    def target(self):
+        """Return the dotted path of the reader function.
+
+        Returns:
+            str: the dotted path
+        """
+
+        return self._target
+
+
+# The registered readers. The readers registered last take precedence.
+_readers = collections.OrderedDict()
+
+_entry_points_loaded = False
+
+
+def _load_entry_points():
+    """Register the readers of the third party packages.
+    """
+
+    global _entry_points_loaded
+
+    if _entry_points_loaded:
+        return
+
+    _entry_points_loaded = True
+
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=ENTRY_POINTS_GROUP):
+        try:
+            entry_point.load()()
+        except Exception as error:
+            logging.error('Can not register the readers of {} entry point: {}'.format(entry_point.name, str(error)))
+
+
+def get_extensions():
+    """Return the extensions handled by the registered readers.
+
+    Returns:
+        list of str: the extensions
+    """
+
+    _load_entry_points()
+
+    return list(collections.OrderedDict.fromkeys([extension for reader in _readers.values() for extension in reader.extensions]))
+
+
+def get_reader(data_file):
+    """Return the reader of a data file.
+
+    Args:
+        data_file (str): the data file
+
+    Returns:
+        lightcycler.kernel.readers.registry.RawDataReader: the reader
+
+    Raises:
+        ReaderError: if no registered reader handles the file
+    """
+
+    _load_entry_points()
+
+    for reader in reversed(list(_readers.values())):
+        if reader.matches(data_file):
+            return reader
+
+    raise ReaderError('No reader found for data file {}'.format(data_file))
+
+
+def read_data_file(data_file):
+    """Read a data file with its registered reader.
+
+    Args:
+        data_file (str): the data file
+
+    Returns:
+        pandas.DataFrame: the raw data in the canonical schema
+
+    Raises:
+        ReaderError: if no registered reader handles the file or if the raw data do not follow the canonical schema
+    """
+
+    reader = get_reader(data_file)
+
+    data_frame = reader.function(data_file)
+
+    missing_columns = [column for column in CANONICAL_COLUMNS if column not in data_frame.columns]
+    if missing_columns:
+        raise ReaderError('Invalid raw data read by {} reader: missing {} columns'.format(reader.name, ', '.join(missing_columns)))
+
+    data_frame = data_frame.reset_index(drop=True)
+    data_frame['Date'] = pd.to_datetime(data_frame['Date'])
+    data_frame['CP'] = data_frame['CP'].astype(np.float64)
+
+    return data_frame
+
+
+def register_reader(name, extensions, target, patterns=None):
+    """Register a raw data reader.
+
+    A reader registered with the name of an existing one replaces it.
+
+    Args:
+        name (str): the name of the reader
+        extensions (list of str): the extensions (e.g. '.pdf') of the files handled by the reader
+        target (str): the dotted path of the reader function given as 'module:function'
+        patterns (list of str): the glob patterns the basename of the handled files must match
+    """
+
+    _readers.pop(name, None)
+
+    _readers[name] = RawDataReader(name, extensions, target, patterns=patterns)
+
+
+# The lightcycler data files whose basename must match the "<date> ... RT<n>_<gene>" pattern or the "<date> ... RT<n>" one
+# for the whole-plate exports
+register_reader('lightcycler pdf', ['.pdf'], 'lightcycler.kernel.readers.lightcycler_files:read_pdf_file', patterns=['????-??-?? *RT*'])
+
+register_reader('lightcycler csv', ['.csv', '.txt'], 'lightcycler.kernel.readers.lightcycler_files:read_csv_file', patterns=['????-??-?? *RT*'])
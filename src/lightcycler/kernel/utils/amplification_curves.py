@@ -0,0 +1,480 @@
+"""This module implements the following classes and functions:
+    - AmplificationCurvesStore
+    - build_curves_index
+    - read_amplification_curves_file
+    - read_curves_table
+"""
+
+import csv
+import json
+import os
+import re
+
+import numpy as np
+
+import pandas as pd
+
+from lightcycler.kernel.readers.lightcycler_files import parse_data_filename
+
+# The columns of the index of the store. A curve is identified by the same keys than a raw data row.
+INDEX_COLUMNS = ['Date', 'Gene', 'RT', 'Pos', 'Name', 'File']
+
+KEY_COLUMNS = ['Date', 'Gene', 'RT', 'Pos', 'Name']
+
+# The default number of cycles of an amplification program
+DEFAULT_N_CYCLES = 45
+
+
+def _find_column(header, candidates):
+    """Return the index of the first header column which matches one of the candidate names.
+
+    Args:
+        header (list of str): the header
+        candidates (list of str): the candidate names (case insensitive)
+
+    Returns:
+        int: the index of the column or None if no column matches
+    """
+
+    normalized_header = [h.strip().lower().replace('.', '') for h in header]
+    for candidate in candidates:
+        if candidate in normalized_header:
+            return normalized_header.index(candidate)
+
+    return None
+
+
+def _to_float(value):
+    """Convert a lightcycler string value to float.
+
+    Args:
+        value (str): the value
+
+    Returns:
+        float: the converted value. NaN for an empty value.
+    """
+
+    value = value.strip().replace(',', '.')
+
+    return float(value) if value else np.nan
+
+
+def read_curves_table(curves_file):
+    """Read a lightcycler curves export file.
+
+    The file is a tab separated file with one line per well and acquisition. The header line must define a sample
+    position, a sample name and a cycle and/or temperature columns. The fluorescence is read from the column named after
+    the acquisition channel (e.g. 465-510), or from the last column if no such column is found. The file is read line by
+    line so that only the curves of the file are kept in memory.
+
+    Args:
+        curves_file (str): the curves file
+
+    Returns:
+        3-tuple: the basename, date, RT and gene parsed from the filename, the sample name of each well position and
+            for each program and well position the list of (cycle, temperature, fluorescence) acquisitions
+    """
+
+    metadata = parse_data_filename(curves_file)
+    if metadata[-1] is None:
+        raise IOError('Invalid curves file {}: whole-plate curves exports are not supported'.format(curves_file))
+
+    # The acquisitions per program and well
+    acquisitions_per_program = {}
+
+    names = {}
+
+    with open(curves_file, 'r') as fin:
+
+        reader = csv.reader(fin, delimiter='\t')
+
+        # Skip the lines until the header line
+        for header in reader:
+            cycle_column = _find_column(header, ['cycle', 'cycleno', 'cycle no', 'cycle#'])
+            temperature_column = _find_column(header, ['temp', 'temperature', 'acqtemp'])
+            if cycle_column is not None or temperature_column is not None:
+                break
+        else:
+            raise IOError('Invalid curves file {}: no header line found'.format(curves_file))
+
+        pos_column = _find_column(header, ['samplepos', 'pos', 'position'])
+        name_column = _find_column(header, ['samplename', 'name'])
+        if pos_column is None or name_column is None:
+            raise IOError('Invalid curves file {}: missing position and/or name columns'.format(curves_file))
+
+        program_column = _find_column(header, ['prog', 'program', 'programno'])
+
+        fluorescence_column = len(header) - 1
+        for i, h in enumerate(header):
+            if re.match(r'^\s*\d{3}-\d{3}\s*(\(.*\))?\s*$', h):
+                fluorescence_column = i
+                break
+
+        columns = [c for c in [cycle_column, temperature_column, pos_column, name_column, fluorescence_column] if c is not None]
+
+        for row in reader:
+
+            if len(row) <= max(columns):
+                continue
+
+            try:
+                cycle = _to_float(row[cycle_column]) if cycle_column is not None else np.nan
+                temperature = _to_float(row[temperature_column]) if temperature_column is not None else np.nan
+                value = _to_float(row[fluorescence_column])
+            except ValueError:
+                continue
+
+            prog = row[program_column].strip() if program_column is not None else ''
+
+            pos = row[pos_column].strip()
+
+            if pos not in names:
+                name = row[name_column].strip().split(' ')[-1]
+                match = re.findall(r'(\d+)([ABCDEF])', name)
+                names[pos] = match[0][0] if match else name
+
+            acquisitions_per_program.setdefault(prog, {}).setdefault(pos, []).append((cycle, temperature, value))
+
+    if not acquisitions_per_program:
+        raise IOError('Invalid curves file {}: no curve found'.format(curves_file))
+
+    return metadata, names, acquisitions_per_program
+
+
+def build_curves_index(metadata, names, positions):
+    """Build the index of a set of curves read from a curves export file.
+
+    Args:
+        metadata (4-tuple): the basename, date, RT and gene parsed from the filename
+        names (dict): the sample name of each well position
+        positions (list of str): the well positions of the curves
+
+    Returns:
+        pandas.DataFrame: the Date, Gene, RT, Pos, Name and File of each curve
+    """
+
+    basename, date, rt, gene = metadata
+
+    n_wells = len(positions)
+
+    index = pd.DataFrame({'Date': [date]*n_wells,
+                          'Gene': [gene]*n_wells,
+                          'RT': [rt]*n_wells,
+                          'Pos': positions,
+                          'Name': [names[pos] for pos in positions],
+                          'File': [basename]*n_wells},
+                         columns=INDEX_COLUMNS)
+
+    index['Date'] = pd.to_datetime(index['Date'])
+
+    return index
+
+
+def read_amplification_curves_file(curves_file, n_cycles=DEFAULT_N_CYCLES, program=None):
+    """Read a lightcycler amplification curves export file.
+
+    Args:
+        curves_file (str): the amplification curves file
+        n_cycles (int): the number of cycles stored per curve. Shorter curves are padded with NaN.
+        program (int): the program from which the cycles are read. If None, the program with the most cycles is used.
+
+    Returns:
+        2-tuple: the index of the curves (pandas.DataFrame with Date, Gene, RT, Pos, Name and File columns) and the
+            (n wells, n cycles) fluorescence
+    """
+
+    metadata, names, acquisitions_per_program = read_curves_table(curves_file)
+
+    if program is None:
+        # The amplification program is the one with the most acquired cycles
+        program = max(acquisitions_per_program,
+                      key=lambda p: max([len(set([a[0] for a in acquisitions])) for acquisitions in acquisitions_per_program[p].values()]))
+    else:
+        program = str(program)
+
+    if program not in acquisitions_per_program:
+        raise IOError('Invalid amplification curves file {}: no program {}'.format(curves_file, program))
+
+    acquisitions_per_well = acquisitions_per_program[program]
+
+    positions = list(acquisitions_per_well.keys())
+
+    fluorescence = np.full((len(positions), n_cycles), np.nan, dtype=np.float32)
+    for i, pos in enumerate(positions):
+        for cycle, _, value in acquisitions_per_well[pos]:
+            if np.isnan(cycle) or cycle < 1 or cycle > n_cycles:
+                continue
+            fluorescence[i, int(cycle) - 1] = value
+
+    return build_curves_index(metadata, names, positions), fluorescence
+
+
+class AmplificationCurvesStore:
+    """This class implements an on-disk store of amplification curves.
+
+    The curves are stored row by row in a flat float32 binary file which is accessed through a memory map, so that
+    only the curves actually requested are read from the disk. The keys of the curves (Date, Gene, RT, Pos, Name) are
+    stored in a small csv index next to the binary file.
+    """
+
+    def __init__(self, directory, n_cycles=DEFAULT_N_CYCLES):
+        """Constructor.
+
+        If the directory already contains a store, it is reopened.
+
+        Args:
+            directory (str): the directory of the store
+            n_cycles (int): the number of cycles stored per curve
+        """
+
+        self._directory = directory
+
+        os.makedirs(self._directory, exist_ok=True)
+
+        if os.path.exists(self._metadata_file):
+            with open(self._metadata_file, 'r') as fin:
+                n_cycles = json.load(fin)['n_cycles']
+        else:
+            with open(self._metadata_file, 'w') as fout:
+                json.dump({'n_cycles': n_cycles}, fout)
+
+        self._n_cycles = n_cycles
+
+        if os.path.exists(self._index_file):
+            self._index = pd.read_csv(self._index_file, dtype=str, keep_default_na=False)
+            self._index['Date'] = pd.to_datetime(self._index['Date'])
+        else:
+            self._index = pd.DataFrame(columns=INDEX_COLUMNS)
+
+        # The row of each curve key (Date, Gene, RT, Pos, Name). Used for O(1) lookups of a given well.
+        self._rows = {}
+        self._add_keys(self._index, 0)
+
+        if not os.path.exists(self._fluorescence_file):
+            open(self._fluorescence_file, 'wb').close()
+
+        self._fluorescence = None
+
+    def __len__(self):
+        """Return the number of curves of the store.
+
+        Returns:
+            int: the number of curves
+        """
+
+        return len(self._index.index)
+
+    @staticmethod
+    def _make_key(date, gene, rt, pos, name):
+        """Return the key of a curve.
+
+        Args:
+            date (str): the date of the run
+            gene (str): the gene
+            rt (str): the RT
+            pos (str): the position of the well
+            name (str): the name of the sample
+
+        Returns:
+            5-tuple: the key
+        """
+
+        return (pd.Timestamp(date), str(gene), str(rt), str(pos), str(name))
+
+    def _add_keys(self, index, first_row):
+        """Register the keys of a set of curves.
+
+        When several curves share the same key, the first one is kept.
+
+        Args:
+            index (pandas.DataFrame): the index of the curves
+            first_row (int): the row of the first curve in the store
+        """
+
+        dates = pd.to_datetime(index['Date'])
+        for row, key in enumerate(zip(dates, *[index[column] for column in KEY_COLUMNS[1:]]), first_row):
+            self._rows.setdefault(self._make_key(*key), row)
+
+    @property
+    def _fluorescence_file(self):
+
+        return os.path.join(self._directory, 'fluorescence.f32')
+
+    @property
+    def _index_file(self):
+
+        return os.path.join(self._directory, 'index.csv')
+
+    @property
+    def _metadata_file(self):
+
+        return os.path.join(self._directory, 'metadata.json')
+
+    def add_file(self, curves_file, program=None):
+        """Add the curves of an amplification curves export file to the store.
+
+        Args:
+            curves_file (str): the amplification curves file
+            program (int): the program from which the cycles are read. If None, the program with the most cycles is used.
+
+        Returns:
+            int: the number of curves added
+        """
+
+        index, fluorescence = self._read_file(curves_file, program)
+
+        # Append the curves at the end of the binary file. The memory map will be reopened on the next access.
+        with open(self._fluorescence_file, 'ab') as fout:
+            fout.write(np.ascontiguousarray(fluorescence, dtype=np.float32).tobytes())
+
+        self._fluorescence = None
+
+        self._add_keys(index, len(self))
+
+        self._index = pd.concat([self._index, index], ignore_index=True)
+
+        self._save_index()
+
+        return len(index.index)
+
+    def _read_file(self, curves_file, program):
+        """Read a curves file.
+
+        Args:
+            curves_file (str): the curves file
+            program (int): the program from which the curves are read
+
+        Returns:
+            2-tuple: the index of the curves and the (n wells, n cycles) fluorescence
+        """
+
+        return read_amplification_curves_file(curves_file, n_cycles=self._n_cycles, program=program)
+
+    def clear(self):
+        """Remove all the curves of the store.
+        """
+
+        self._fluorescence = None
+
+        open(self._fluorescence_file, 'wb').close()
+
+        self._index = pd.DataFrame(columns=INDEX_COLUMNS)
+
+        self._rows.clear()
+
+        self._save_index()
+
+    @property
+    def directory(self):
+        """Return the directory of the store.
+
+        Returns:
+            str: the directory
+        """
+
+        return self._directory
+
+    @property
+    def fluorescence(self):
+        """Return the fluorescence of all the curves of the store.
+
+        The array is memory mapped: the curves are read from the disk only when they are accessed.
+
+        Returns:
+            numpy.memmap: the (n curves, n cycles) fluorescence
+        """
+
+        if self._fluorescence is None:
+            n_curves = len(self)
+            if n_curves == 0:
+                return np.empty((0, self._n_cycles), dtype=np.float32)
+            self._fluorescence = np.memmap(self._fluorescence_file, dtype=np.float32, mode='r', shape=(n_curves, self._n_cycles))
+
+        return self._fluorescence
+
+    def get_curve(self, date, gene, rt, pos, name):
+        """Return the curve of a given well.
+
+        Args:
+            date (str): the date of the run
+            gene (str): the gene
+            rt (str): the RT
+            pos (str): the position of the well
+            name (str): the name of the sample
+
+        Returns:
+            numpy.ndarray: the fluorescence of the well
+        """
+
+        row = self._rows.get(self._make_key(date, gene, rt, pos, name))
+        if row is None:
+            raise KeyError('No curve found for {}'.format((date, gene, rt, pos, name)))
+
+        return np.array(self.fluorescence[row])
+
+    def get_curves(self, rows):
+        """Return the curves stored at given rows of the store.
+
+        Only the requested curves are read from the disk.
+
+        Args:
+            rows (list of int): the rows
+
+        Returns:
+            numpy.ndarray: the (n rows, n cycles) fluorescence
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+
+        return np.array(self.fluorescence[rows])
+
+    @property
+    def index(self):
+        """Return the index of the store.
+
+        Returns:
+            pandas.DataFrame: the Date, Gene, RT, Pos, Name and File of each curve
+        """
+
+        return self._index
+
+    @property
+    def n_cycles(self):
+        """Return the number of cycles stored per curve.
+
+        Returns:
+            int: the number of cycles
+        """
+
+        return self._n_cycles
+
+    def _save_index(self):
+        """Save the index of the store.
+        """
+
+        index = self._index.copy()
+        index['Date'] = pd.to_datetime(index['Date']).dt.strftime('%Y-%m-%d')
+        index.to_csv(self._index_file, index=False)
+
+    def select(self, **keys):
+        """Return the rows of the curves matching a set of keys.
+
+        Args:
+            keys (dict): the keys to match. Valid keys are date, gene, rt, pos and name. A missing key matches any value.
+
+        Returns:
+            numpy.ndarray: the matching rows
+        """
+
+        selection = np.ones(len(self), dtype=bool)
+
+        for column in KEY_COLUMNS:
+            value = keys.get(column.lower())
+            if value is None:
+                continue
+            if column == 'Date':
+                selection &= (self._index['Date'] == pd.to_datetime(value)).to_numpy()
+            else:
+                selection &= (self._index[column].astype(str) == str(value)).to_numpy()
+
+        return np.flatnonzero(selection)
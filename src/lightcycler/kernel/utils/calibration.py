@@ -0,0 +1,91 @@
+"""This module implements the following functions:
+    - apply_run_offsets
+    - estimate_run_offsets
+"""
+
+import numpy as np
+
+import pandas as pd
+
+
+# The raw data columns defining a run of a gene
+RUN_COLUMNS = ['Gene', 'Date', 'RT']
+
+
+def estimate_run_offsets(rawdata, calibrators, cp_column='CP'):
+    """Estimate the CP offset of each run of each gene from the calibrator samples.
+
+    The CP values of the calibrators are modelled as CP = level(gene, calibrator) + offset(gene, run) where a run is
+    defined by its date and RT. The model is solved for all the genes and runs at once as a single sparse least squares
+    problem. The offsets of each gene are then centered so that they sum up to zero over its runs.
+
+    Args:
+        rawdata (pandas.DataFrame): the raw data
+        calibrators (list of str): the calibrator samples
+        cp_column (str): the raw data column from which the CP values are read
+
+    Returns:
+        pandas.Series: the offset of each (Gene, Date, RT) run which contains at least one calibrator
+    """
+
+    empty = pd.Series([], index=pd.MultiIndex.from_tuples([], names=RUN_COLUMNS), dtype=np.float64)
+
+    if rawdata.empty or not calibrators:
+        return empty
+
+    selection = rawdata['Name'].isin(list(calibrators)) & rawdata[cp_column].notna()
+    data = rawdata[selection]
+    if data.empty:
+        return empty
+
+    run_indexes, runs = pd.MultiIndex.from_frame(data[RUN_COLUMNS]).factorize()
+    runs = runs.set_names(RUN_COLUMNS)
+    level_indexes, levels = pd.MultiIndex.from_frame(data[['Gene', 'Name']]).factorize()
+
+    n_observations = len(data.index)
+    n_runs = len(runs)
+    n_levels = len(levels)
+
+    # Each observation depends on the offset of its run and on the level of its calibrator for its gene
+    rows = np.repeat(np.arange(n_observations), 2)
+    columns = np.column_stack([run_indexes, n_runs + level_indexes]).ravel()
+
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.linalg import lsqr
+
+    design = csr_matrix((np.ones(2*n_observations), (rows, columns)), shape=(n_observations, n_runs + n_levels))
+
+    cps = data[cp_column].to_numpy(dtype=np.float64)
+
+    solution = lsqr(design, cps, atol=1.0e-12, btol=1.0e-12)[0]
+
+    offsets = solution[:n_runs]
+
+    # The offsets are defined up to a constant per gene which is removed by centering them over the runs of the gene
+    gene_indexes, _ = pd.factorize(runs.get_level_values('Gene'))
+    means = np.bincount(gene_indexes, weights=offsets)/np.bincount(gene_indexes)
+    offsets = offsets - means[gene_indexes]
+
+    return pd.Series(offsets, index=runs)
+
+
+def apply_run_offsets(rawdata, offsets, cp_column='CP'):
+    """Subtract the offset of their run from the CP values of the raw data.
+
+    Args:
+        rawdata (pandas.DataFrame): the raw data
+        offsets (pandas.Series): the offset of each (Gene, Date, RT) run. The runs with no offset are left unchanged.
+        cp_column (str): the raw data column from which the CP values are read
+
+    Returns:
+        pandas.Series: the calibrated CP values
+    """
+
+    cps = rawdata[cp_column].astype(np.float64)
+
+    if offsets.empty or rawdata.empty:
+        return cps
+
+    run_offsets = offsets.reindex(pd.MultiIndex.from_frame(rawdata[RUN_COLUMNS])).to_numpy()
+
+    return cps - np.where(np.isnan(run_offsets), 0.0, run_offsets)
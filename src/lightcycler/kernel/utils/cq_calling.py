@@ -0,0 +1,230 @@
+"""This module implements the following functions:
+    - call_cq
+    - estimate_noise
+    - fit_points
+    - second_derivative_maximum
+    - subtract_baseline
+"""
+
+import numpy as np
+
+# The methods available for calling the Cq
+CQ_METHODS = ['second derivative maximum', 'fit points']
+
+# The number of cycles between the end of the baseline and the takeoff of a curve
+BASELINE_MARGIN = 4
+
+# The ratio of the second derivative maximum to the noise of the second differences above which a takeoff is trusted
+TAKEOFF_SIGNIFICANCE = 4.0
+
+
+def subtract_baseline(fluorescence, baseline_cycles=(3, 15), takeoff_cycles=None):
+    """Subtract from each curve the straight line fitted over its baseline cycles.
+
+    Args:
+        fluorescence (numpy.ndarray): the (n wells, n cycles) fluorescence
+        baseline_cycles (2-tuple of int): the first and last cycles (1-based, inclusive) of the baseline
+        takeoff_cycles (numpy.ndarray): the takeoff cycle of each well. If given, the baseline of a well stops
+            BASELINE_MARGIN cycles before its takeoff so that early amplifications do not bias the baseline.
+
+    Returns:
+        numpy.ndarray: the baseline subtracted fluorescence
+    """
+
+    fluorescence = np.asarray(fluorescence, dtype=np.float64)
+
+    n_cycles = fluorescence.shape[1]
+
+    cycles = np.arange(1, n_cycles + 1, dtype=np.float64)
+
+    ends = np.full(fluorescence.shape[0], float(baseline_cycles[1]))
+    if takeoff_cycles is not None:
+        takeoff_cycles = np.asarray(takeoff_cycles, dtype=np.float64)
+        ends = np.where(np.isnan(takeoff_cycles), ends, np.minimum(ends, np.floor(takeoff_cycles) - BASELINE_MARGIN))
+        # Keep at least three points in the baseline
+        ends = np.maximum(ends, baseline_cycles[0] + 2)
+
+    valid = (cycles >= baseline_cycles[0]) & (cycles <= ends[:, np.newaxis]) & ~np.isnan(fluorescence)
+
+    x = np.where(valid, cycles, 0.0)
+    y = np.where(valid, fluorescence, 0.0)
+
+    n = valid.sum(axis=1)
+    sx = x.sum(axis=1)
+    sy = y.sum(axis=1)
+    sxx = (x*x).sum(axis=1)
+    sxy = (x*y).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (n*sxy - sx*sy)/(n*sxx - sx*sx)
+        slopes = np.where(np.isfinite(slopes), slopes, 0.0)
+        intercepts = (sy - slopes*sx)/n
+
+    baselines = intercepts[:, np.newaxis] + slopes[:, np.newaxis]*cycles
+
+    return fluorescence - baselines
+
+
+def estimate_noise(fluorescence):
+    """Estimate the standard deviation of the noise of each curve.
+
+    The estimate is the median absolute deviation of the second differences of the curve, which is insensitive to a
+    drift of the baseline and, being a median, to the few cycles of the amplification.
+
+    Args:
+        fluorescence (numpy.ndarray): the (n wells, n cycles) fluorescence
+
+    Returns:
+        numpy.ndarray: the noise of each well
+    """
+
+    d2 = np.diff(np.asarray(fluorescence, dtype=np.float64), n=2, axis=1)
+
+    with np.errstate(invalid='ignore'):
+        mads = np.nanmedian(np.abs(d2 - np.nanmedian(d2, axis=1, keepdims=True)), axis=1)
+
+    # 1.4826 converts a MAD to a standard deviation and the second difference of a white noise has a variance 6 times larger
+    return 1.4826*mads/np.sqrt(6.0)
+
+
+def second_derivative_maximum(fluorescence):
+    """Call the Cq of each curve as the cycle of the maximum of its second derivative.
+
+    The second derivative is computed by finite differences over the cycle axis and the position of its maximum is
+    refined to a fractional cycle by fitting a parabola through the maximum and its two neighbours.
+
+    Args:
+        fluorescence (numpy.ndarray): the (n wells, n cycles) fluorescence
+
+    Returns:
+        2-tuple: the Cq of each well and the value of the second derivative at its maximum
+    """
+
+    fluorescence = np.asarray(fluorescence, dtype=np.float64)
+
+    n_wells, n_cycles = fluorescence.shape
+    if n_cycles < 3:
+        return np.full(n_wells, np.nan), np.full(n_wells, np.nan)
+
+    # d2[:, i] is centered on the cycle i + 2 (1-based)
+    d2 = np.diff(fluorescence, n=2, axis=1)
+    d2 = np.where(np.isnan(d2), -np.inf, d2)
+
+    maxima = np.argmax(d2, axis=1)
+
+    rows = np.arange(n_wells)
+    previous = d2[rows, np.clip(maxima - 1, 0, None)]
+    current = d2[rows, maxima]
+    following = d2[rows, np.clip(maxima + 1, None, d2.shape[1] - 1)]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offsets = 0.5*(previous - following)/(previous - 2.0*current + following)
+    offsets = np.where(np.isfinite(offsets), np.clip(offsets, -0.5, 0.5), 0.0)
+
+    cq = maxima + 2.0 + offsets
+
+    valid = np.isfinite(current)
+
+    return np.where(valid, cq, np.nan), np.where(valid, current, np.nan)
+
+
+def fit_points(fluorescence, threshold, n_points=2):
+    """Call the Cq of each curve as the crossing of its log-linear phase with a threshold.
+
+    For each well, a straight line is fitted to the log of the fluorescence over the n points starting just before
+    the first cycle above the threshold. The Cq is the fractional cycle at which this line crosses the threshold.
+
+    Args:
+        fluorescence (numpy.ndarray): the (n wells, n cycles) baseline subtracted fluorescence
+        threshold (float or numpy.ndarray): the threshold, common to all wells or per well
+        n_points (int): the number of points of the log-linear fit
+
+    Returns:
+        numpy.ndarray: the Cq of each well. NaN for the wells which never cross the threshold.
+    """
+
+    fluorescence = np.asarray(fluorescence, dtype=np.float64)
+
+    n_wells, n_cycles = fluorescence.shape
+
+    thresholds = np.broadcast_to(np.asarray(threshold, dtype=np.float64), (n_wells,))
+
+    above = fluorescence > thresholds[:, np.newaxis]
+    crossed = above.any(axis=1) & (thresholds > 0.0)
+    first_above = np.argmax(above, axis=1)
+
+    # The cycles (0-based) of the fit window of each well
+    cycle_indexes = np.clip(first_above[:, np.newaxis] - 1 + np.arange(max(n_points, 2)), 0, n_cycles - 1)
+
+    window = fluorescence[np.arange(n_wells)[:, np.newaxis], cycle_indexes]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_window = np.log10(window)
+    valid = np.isfinite(log_window)
+
+    x = np.where(valid, cycle_indexes + 1.0, 0.0)
+    y = np.where(valid, log_window, 0.0)
+
+    n = valid.sum(axis=1)
+    sx = x.sum(axis=1)
+    sy = y.sum(axis=1)
+    sxx = (x*x).sum(axis=1)
+    sxy = (x*y).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (n*sxy - sx*sy)/(n*sxx - sx*sx)
+        intercepts = (sy - slopes*sx)/n
+        cq = (np.log10(thresholds) - intercepts)/slopes
+
+    return np.where(crossed & (n >= 2) & (slopes > 0.0), cq, np.nan)
+
+
+def call_cq(fluorescence, method='second derivative maximum', baseline_cycles=(3, 15), threshold=None, n_points=2, noise_factor=10.0):
+    """Call the Cq of a set of amplification curves.
+
+    The Cq is called for all the wells at once. As a straight baseline has no curvature, the second derivative
+    maximum is computed on the raw curves. When it is significant, it also gives the takeoff cycle used to stop the
+    baseline of the early amplifications. The wells whose baseline subtracted amplitude does not exceed noise_factor
+    times their noise are considered as not amplified.
+
+    Args:
+        fluorescence (numpy.ndarray): the (n wells, n cycles) fluorescence
+        method (str): the method used for calling the Cq. One of CQ_METHODS.
+        baseline_cycles (2-tuple of int): the first and last cycles (1-based, inclusive) of the baseline
+        threshold (float): the threshold of the fit points method. If None, noise_factor times the median noise of all the wells.
+        n_points (int): the number of points of the fit points method
+        noise_factor (float): the ratio to the noise above which a well is considered as amplified
+
+    Returns:
+        numpy.ndarray: the Cq of each well. NaN for the wells not amplified.
+    """
+
+    if method not in CQ_METHODS:
+        raise ValueError('Unknown Cq calling method {}'.format(method))
+
+    fluorescence = np.asarray(fluorescence, dtype=np.float64)
+
+    if fluorescence.shape[0] == 0:
+        return np.empty(0, dtype=np.float64)
+
+    takeoff_cycles, peaks = second_derivative_maximum(fluorescence)
+
+    noise = estimate_noise(fluorescence)
+
+    with np.errstate(invalid='ignore'):
+        significant = peaks > TAKEOFF_SIGNIFICANCE*np.sqrt(6.0)*noise
+
+    corrected = subtract_baseline(fluorescence, baseline_cycles, np.where(significant, takeoff_cycles, np.nan))
+
+    with np.errstate(invalid='ignore'):
+        amplitudes = np.nanmax(np.where(np.isnan(corrected), -np.inf, corrected), axis=1)
+        amplified = amplitudes > noise_factor*noise
+
+    if method == 'second derivative maximum':
+        cq = takeoff_cycles
+    else:
+        if threshold is None:
+            threshold = noise_factor*np.nanmedian(noise) if np.any(~np.isnan(noise)) else np.nan
+        cq = fit_points(corrected, threshold, n_points)
+
+    return np.where(amplified, cq, np.nan)
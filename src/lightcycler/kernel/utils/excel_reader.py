@@ -0,0 +1,71 @@
+"""This module implements the following classes and functions:
+    - read_sheets
+"""
+
+import collections
+
+import pandas as pd
+
+
+def _to_dataframe(rows, header):
+    """Convert the rows of a sheet to a dataframe.
+
+    As for pandas.read_excel, the trailing empty rows are skipped, the empty cells are NaN and the unnamed columns are
+    named 'Unnamed: <index>'.
+
+    Args:
+        rows (list of tuples): the values of each row of the sheet
+        header (bool): if True the first row is used as the column names
+
+    Returns:
+        pandas.DataFrame: the dataframe
+    """
+
+    rows = [[None if v == '' else v for v in row] for row in rows]
+
+    while rows and all(v is None for v in rows[-1]):
+        rows.pop()
+
+    n_columns = max([len(row) for row in rows], default=0)
+    rows = [row + [None]*(n_columns - len(row)) for row in rows]
+
+    if not header:
+        return pd.DataFrame(rows)
+
+    if not rows:
+        return pd.DataFrame()
+
+    columns = [column if column is not None else 'Unnamed: {}'.format(i) for i, column in enumerate(rows[0])]
+
+    return pd.DataFrame(rows[1:], columns=columns)
+
+
+def read_sheets(filename, sheets):
+    """Read several sheets of an excel workbook in a single pass.
+
+    The workbook is opened once in read-only mode and only the requested sheets are streamed.
+
+    Args:
+        filename (str): the excel file
+        sheets (dict): the sheets to read. For each sheet, True if its first row is used as the column names.
+
+    Returns:
+        collections.OrderedDict: the dataframe of each requested sheet found in the workbook
+    """
+
+    import openpyxl
+
+    dataframes = collections.OrderedDict()
+
+    workbook = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+
+    try:
+        for sheet, header in sheets.items():
+            if sheet not in workbook.sheetnames:
+                continue
+
+            dataframes[sheet] = _to_dataframe(workbook[sheet].iter_rows(values_only=True), header)
+    finally:
+        workbook.close()
+
+    return dataframes
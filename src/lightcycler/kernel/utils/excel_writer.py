@@ -0,0 +1,273 @@
+"""This module implements the following classes and functions:
+    - create_workbook
+    - ExportCancelledError
+    - ExportWorkbook
+    - save_workbook
+    - SheetWriter
+"""
+
+import os
+import tempfile
+import threading
+
+
+class ExportCancelledError(Exception):
+    """Exception raised when an export is cancelled.
+    """
+
+
+class ExportWorkbook:
+    """This class implements a write-only workbook whose export can be cancelled from another thread.
+
+    The cancellation is checked by the sheet writers each time a row is written. The underlying openpyxl workbook is
+    created on construction so that openpyxl is only loaded when an export starts.
+    """
+
+    def __init__(self):
+        """Constructor.
+        """
+
+        import openpyxl
+
+        self._workbook = openpyxl.Workbook(write_only=True)
+
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Request the cancellation of the export.
+        """
+
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """Return whether the cancellation of the export has been requested.
+
+        Returns:
+            bool: True if the export has been cancelled
+        """
+
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """Raise if the cancellation of the export has been requested.
+
+        Raises:
+            ExportCancelledError: if the export has been cancelled
+        """
+
+        if self._cancelled.is_set():
+            raise ExportCancelledError('The export has been cancelled')
+
+    def create_sheet(self, title):
+        """Create a write-only sheet.
+
+        Args:
+            title (str): the title of the sheet
+
+        Returns:
+            openpyxl.worksheet._write_only.WriteOnlyWorksheet: the sheet
+        """
+
+        return self._workbook.create_sheet(title)
+
+    def save(self, filename):
+        """Save the workbook.
+
+        Args:
+            filename (str): the excel file
+        """
+
+        self._workbook.save(filename)
+
+    @property
+    def sheetnames(self):
+        """Return the titles of the sheets created so far.
+
+        Returns:
+            list of str: the titles
+        """
+
+        return self._workbook.sheetnames
+
+
+def create_workbook():
+    """Create an empty write-only workbook.
+
+    The sheets of a write-only workbook are streamed to disk row by row hence its memory footprint does not depend on the
+    size of the exported data.
+
+    Returns:
+        lightcycler.kernel.utils.excel_writer.ExportWorkbook: the workbook
+    """
+
+    return ExportWorkbook()
+
+
+def save_workbook(workbook, filename):
+    """Save a workbook atomically.
+
+    The workbook is saved to a temporary file of the destination directory which is then renamed to the destination file.
+    Hence, a failed save never leaves a partially written file and never overwrites an existing one.
+
+    Args:
+        workbook (openpyxl.workbook.workbook.Workbook): the workbook
+        filename (str): the destination file
+    """
+
+    directory, basename = os.path.split(os.path.abspath(filename))
+
+    fd, temp_filename = tempfile.mkstemp(suffix='.xlsx', prefix='.{}.'.format(basename), dir=directory)
+    os.close(fd)
+
+    try:
+        workbook.save(temp_filename)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def _to_list(values):
+    """Convert a sequence of values to a list of python scalars.
+
+    Args:
+        values (sequence): the values
+
+    Returns:
+        list: the values
+    """
+
+    if hasattr(values, 'tolist'):
+        return values.tolist()
+
+    return list(values)
+
+
+class SheetWriter:
+    """This class implements a streaming writer of a sheet of a write-only workbook.
+
+    The rows must be written in increasing order. The values written to the same row are merged until a following row
+    is written, the skipped rows being left empty. The writer must be closed (or used as a context manager) for its last
+    row to be written. If the workbook is an ExportWorkbook, its cancellation is checked before starting a new row.
+    """
+
+    def __init__(self, workbook, title):
+        """Constructor.
+
+        Args:
+            workbook (openpyxl.workbook.workbook.Workbook): the write-only workbook
+            title (str): the title of the sheet
+        """
+
+        self._workbook = workbook
+
+        self._worksheet = workbook.create_sheet(title)
+
+        # The index (starting from 1) of the row being written and its values. 0 if no row has been written yet.
+        self._row = 0
+        self._values = []
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.close()
+
+    def _flush(self):
+        """Append the row being written to the sheet.
+        """
+
+        if self._row > 0:
+            self._worksheet.append(self._values)
+
+        self._values = []
+
+    def close(self):
+        """Write the last row of the sheet.
+        """
+
+        self._flush()
+
+    @property
+    def row(self):
+        """Return the index of the row being written.
+
+        Returns:
+            int: the row index (starting from 1). 0 if no row has been written yet.
+        """
+
+        return self._row
+
+    def write(self, row, column, values):
+        """Write a sequence of values in a row starting from a given column.
+
+        Args:
+            row (int): the row index (starting from 1)
+            column (int): the column index (starting from 1)
+            values (sequence): the values
+
+        Raises:
+            ExportCancelledError: if the export of the workbook has been cancelled
+        """
+
+        if row < self._row:
+            raise ValueError('Row {} already written'.format(row))
+
+        if row > self._row:
+            if isinstance(self._workbook, ExportWorkbook):
+                self._workbook.check_cancelled()
+            self._flush()
+            for _ in range(self._row + 1, row):
+                self._worksheet.append([])
+            self._row = row
+
+        values = _to_list(values)
+
+        end = column - 1 + len(values)
+        if len(self._values) < end:
+            self._values.extend([None]*(end - len(self._values)))
+
+        self._values[column - 1:end] = values
+
+    def write_rows(self, row, column, rows):
+        """Write a sequence of rows starting from a given row and column.
+
+        Args:
+            row (int): the index of the first row (starting from 1)
+            column (int): the column index (starting from 1)
+            rows (sequence of sequences): the values of each row
+
+        Returns:
+            int: the index of the last written row
+        """
+
+        for values in _to_list(rows):
+            self.write(row, column, values)
+            row += 1
+
+        return max(row - 1, self._row)
+
+    def write_dataframe(self, row, dataframe, column=1):
+        """Write a dataframe along with its index and columns.
+
+        The columns are written in the first row starting from the column next to the given one. The index is written in
+        the given column of the following rows.
+
+        Args:
+            row (int): the index of the first row (starting from 1)
+            dataframe (pandas.DataFrame): the dataframe
+            column (int): the column index (starting from 1)
+
+        Returns:
+            int: the index of the last written row
+        """
+
+        self.write(row, column + 1, dataframe.columns)
+
+        rows = [[index] + values for index, values in zip(dataframe.index.tolist(), dataframe.to_numpy(dtype=object).tolist())]
+
+        return self.write_rows(row + 1, column, rows)
@@ -0,0 +1,415 @@
+"""This module implements the following functions:
+    - adjust_pairwise_p_values
+    - compute_effect_sizes
+    - compute_group_statistics
+    - kruskal_wallis_tests
+    - mann_whitney_u_tests
+    - one_way_anova
+    - pairwise_t_tests
+    - run_group_tests
+
+All the tests are computed at once for a set of families of groups (typically all the genes x zones of the dynamic
+matrices) from a (..., n samples) array of per-sample values and a (n samples, n groups) membership matrix. The NaN
+values are skipped. The pairwise results are (..., n groups, n groups) arrays. scipy is only loaded by the functions
+which need its distributions.
+"""
+
+import collections
+
+import numpy as np
+
+from lightcycler.kernel.utils.multiple_testing import adjust_p_values
+
+# The available group tests
+GROUP_TESTS = ['student t', 'welch t', 'mann-whitney u', 'one-way anova', 'kruskal-wallis']
+
+# The available effect sizes
+EFFECT_SIZES = ["cohen's d", "hedges' g", 'cp fold change', 'cp fold change lower bound', 'cp fold change upper bound']
+
+
+def adjust_pairwise_p_values(p_values, method='holm', family_wide=False):
+    """Adjust the pairwise p-values over their distinct pairs of groups.
+
+    Args:
+        p_values (numpy.ndarray): the (..., n groups, n groups) symmetric pairwise p-values
+        method (str): the adjustment method. One of lightcycler.kernel.utils.multiple_testing.ADJUSTMENT_METHODS or None.
+        family_wide (bool): if True, the pairs of all the families are adjusted at once, otherwise each family is
+            adjusted separately
+
+    Returns:
+        numpy.ndarray: the adjusted symmetric pairwise p-values whose diagonal is 1
+    """
+
+    n_groups = p_values.shape[-1]
+
+    rows, columns = np.triu_indices(n_groups, k=1)
+
+    pairs = p_values[..., rows, columns]
+    if method is not None:
+        pairs = adjust_p_values(pairs, method, axis=None if family_wide else -1)
+
+    adjusted = np.ones(p_values.shape, dtype=np.float64)
+    adjusted[..., rows, columns] = pairs
+    adjusted[..., columns, rows] = pairs
+
+    return adjusted
+
+
+def _get_weights(values, membership):
+    """Return the weight of each value in each group.
+
+    Args:
+        values (numpy.ndarray): the (..., n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+
+    Returns:
+        numpy.ndarray: the (..., n samples, n groups) weights. A value has a weight of 1 in the groups it belongs to if
+            it is not NaN and 0 otherwise.
+    """
+
+    return (~np.isnan(values))[..., np.newaxis]*np.asarray(membership, dtype=np.float64)
+
+
+def compute_group_statistics(values, membership):
+    """Compute the number of values, the mean and the variance (ddof=1) of each group.
+
+    Args:
+        values (numpy.ndarray): the (..., n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+
+    Returns:
+        3-tuple of numpy.ndarray: the (..., n groups) number of values, means and variances
+    """
+
+    weights = _get_weights(values, membership)
+
+    filled_values = np.where(np.isnan(values), 0.0, values)[..., np.newaxis]
+
+    n_values = weights.sum(axis=-2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (weights*filled_values).sum(axis=-2)/n_values
+        deviations = np.where(weights > 0, filled_values - means[..., np.newaxis, :], 0.0)
+        variances = (weights*deviations**2).sum(axis=-2)/(n_values - 1.0)
+
+    variances[n_values < 2] = np.nan
+
+    return n_values, means, variances
+
+
+def compute_effect_sizes(n_values, means, variances, ct_power=2.0, confidence=0.95):
+    """Compute the effect sizes between all the pairs of groups from their sufficient statistics.
+
+    For a pair of groups (a, b), Cohen's d is (mean_a - mean_b)/pooled_std and Hedges' g is Cohen's d corrected for
+    small samples bias. The CP fold change of a relative to b is ct_power**(mean_b - mean_a) and its confidence
+    interval is obtained by propagating the standard error sqrt(var_a/n_a + var_b/n_b) of the CP difference with the
+    quantile of a t distribution whose degrees of freedom are given by the Welch-Satterthwaite equation. As the CP values
+    are not normalized by any reference gene, this is a delta-CT fold change and not a delta-delta-CT one.
+
+    Args:
+        n_values (numpy.ndarray): the (..., n groups) number of values
+        means (numpy.ndarray): the (..., n groups) mean CT values
+        variances (numpy.ndarray): the (..., n groups) variances
+        ct_power (float or numpy.ndarray): the base of the fold change. It must be broadcastable to means[..., 0].
+        confidence (float): the confidence level of the fold change interval
+
+    Returns:
+        collections.OrderedDict: the (..., n groups, n groups) effect sizes for each entry of EFFECT_SIZES
+    """
+
+    import scipy.stats as stats
+
+    n_a, n_b = n_values[..., :, np.newaxis], n_values[..., np.newaxis, :]
+    v_a, v_b = variances[..., :, np.newaxis], variances[..., np.newaxis, :]
+
+    ct_power = np.asarray(ct_power, dtype=np.float64)[..., np.newaxis, np.newaxis]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        differences = means[..., :, np.newaxis] - means[..., np.newaxis, :]
+
+        dofs = n_a + n_b - 2.0
+        pooled_stds = np.sqrt(((n_a - 1.0)*v_a + (n_b - 1.0)*v_b)/dofs)
+
+        cohen_d = differences/pooled_stds
+        hedges_g = cohen_d*(1.0 - 3.0/(4.0*dofs - 1.0))
+
+        e_a, e_b = v_a/n_a, v_b/n_b
+        standard_errors = np.sqrt(e_a + e_b)
+        welch_dofs = (e_a + e_b)**2/(e_a**2/(n_a - 1.0) + e_b**2/(n_b - 1.0))
+
+    margins = stats.t.ppf(0.5*(1.0 + confidence), welch_dofs)*standard_errors
+
+    effect_sizes = collections.OrderedDict()
+    effect_sizes["cohen's d"] = cohen_d
+    effect_sizes["hedges' g"] = hedges_g
+    effect_sizes['cp fold change'] = ct_power**(-differences)
+    effect_sizes['cp fold change lower bound'] = ct_power**(-differences - margins)
+    effect_sizes['cp fold change upper bound'] = ct_power**(-differences + margins)
+
+    return effect_sizes
+
+
+def pairwise_t_tests(n_values, means, variances, equal_var=True):
+    """Perform the two-sided t-tests between all the pairs of groups.
+
+    Args:
+        n_values (numpy.ndarray): the (..., n groups) number of values
+        means (numpy.ndarray): the (..., n groups) means
+        variances (numpy.ndarray): the (..., n groups) variances
+        equal_var (bool): if True, perform the Student t-test with pooled variance, otherwise the Welch t-test
+
+    Returns:
+        2-tuple of numpy.ndarray: the (..., n groups, n groups) t statistics and p-values
+    """
+
+    import scipy.stats as stats
+
+    n_a, n_b = n_values[..., :, np.newaxis], n_values[..., np.newaxis, :]
+    v_a, v_b = variances[..., :, np.newaxis], variances[..., np.newaxis, :]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if equal_var:
+            dofs = n_a + n_b - 2.0
+            pooled_variances = ((n_a - 1.0)*v_a + (n_b - 1.0)*v_b)/dofs
+            standard_errors = np.sqrt(pooled_variances*(1.0/n_a + 1.0/n_b))
+        else:
+            e_a, e_b = v_a/n_a, v_b/n_b
+            dofs = (e_a + e_b)**2/(e_a**2/(n_a - 1.0) + e_b**2/(n_b - 1.0))
+            standard_errors = np.sqrt(e_a + e_b)
+
+        t_statistics = (means[..., :, np.newaxis] - means[..., np.newaxis, :])/standard_errors
+
+    p_values = 2.0*stats.t.sf(np.abs(t_statistics), dofs)
+
+    return t_statistics, p_values
+
+
+def one_way_anova(n_values, means, variances):
+    """Perform the one-way ANOVA over the groups and the Fisher LSD pairwise t-tests based on its residual variance.
+
+    The empty groups are skipped.
+
+    Args:
+        n_values (numpy.ndarray): the (..., n groups) number of values
+        means (numpy.ndarray): the (..., n groups) means
+        variances (numpy.ndarray): the (..., n groups) variances
+
+    Returns:
+        3-tuple of numpy.ndarray: the (...) F statistics, the (...) p-values and the (..., n groups, n groups)
+            pairwise p-values
+    """
+
+    import scipy.stats as stats
+
+    non_empty = n_values > 0
+
+    n_groups = non_empty.sum(axis=-1)
+    n_total = n_values.sum(axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        filled_means = np.where(non_empty, means, 0.0)
+        grand_means = (n_values*filled_means).sum(axis=-1)/n_total
+
+        between = (n_values*(filled_means - grand_means[..., np.newaxis])**2).sum(axis=-1)
+        within = np.where(n_values > 1, (n_values - 1.0)*np.where(np.isnan(variances), 0.0, variances), 0.0).sum(axis=-1)
+
+        residual_dofs = n_total - n_groups
+        residual_variances = within/residual_dofs
+
+        f_statistics = (between/(n_groups - 1.0))/residual_variances
+
+        f_statistics[(n_groups < 2) | (residual_dofs < 1)] = np.nan
+
+        n_a, n_b = n_values[..., :, np.newaxis], n_values[..., np.newaxis, :]
+        standard_errors = np.sqrt(residual_variances[..., np.newaxis, np.newaxis]*(1.0/n_a + 1.0/n_b))
+        t_statistics = (means[..., :, np.newaxis] - means[..., np.newaxis, :])/standard_errors
+
+    p_values = stats.f.sf(f_statistics, n_groups - 1.0, residual_dofs)
+
+    pairwise_p_values = 2.0*stats.t.sf(np.abs(t_statistics), residual_dofs[..., np.newaxis, np.newaxis])
+
+    return f_statistics, p_values, pairwise_p_values
+
+
+def mann_whitney_u_tests(values, membership):
+    """Perform the two-sided Mann-Whitney U tests between all the pairs of groups.
+
+    The p-values are computed from the normal approximation with tie and continuity corrections.
+
+    Args:
+        values (numpy.ndarray): the (..., n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+
+    Returns:
+        2-tuple of numpy.ndarray: the (..., n groups, n groups) U statistics and p-values
+    """
+
+    import scipy.stats as stats
+
+    values = np.asarray(values, dtype=np.float64)
+
+    weights = _get_weights(values, membership)
+
+    n_values = weights.sum(axis=-2)
+
+    flat_values = values.reshape(-1, values.shape[-1])
+    flat_weights = weights.reshape((-1,) + weights.shape[-2:])
+
+    u_statistics = np.empty(flat_weights.shape[:1] + 2*flat_weights.shape[-1:], dtype=np.float64)
+    tie_sums = np.empty_like(u_statistics)
+
+    # The families are processed by chunks to bound the size of the (n samples, n samples) comparison matrices
+    chunk_size = max(1, 2**22//max(1, flat_values.shape[-1]**2))
+    for start in range(0, flat_values.shape[0], chunk_size):
+        x = flat_values[start:start + chunk_size]
+        w = flat_weights[start:start + chunk_size]
+
+        greater = x[:, :, np.newaxis] > x[:, np.newaxis, :]
+        equal = (x[:, :, np.newaxis] == x[:, np.newaxis, :]).astype(np.float64)
+        comparisons = greater + 0.5*equal
+
+        u_statistics[start:start + chunk_size] = np.swapaxes(w, 1, 2) @ (comparisons @ w)
+
+        # The number of values of each pair of groups tied with each value: the tie correction is sum(t^3 - t) over
+        # the tied sets which is also the sum of the squared tie counts over the values minus the number of values
+        ties = equal @ w
+        pair_ties = ties[:, :, :, np.newaxis] + ties[:, :, np.newaxis, :]
+        pair_weights = w[:, :, :, np.newaxis] + w[:, :, np.newaxis, :]
+        tie_sums[start:start + chunk_size] = (pair_weights*pair_ties**2).sum(axis=1)
+
+    u_statistics = u_statistics.reshape(n_values.shape + n_values.shape[-1:])
+
+    n_a, n_b = n_values[..., :, np.newaxis], n_values[..., np.newaxis, :]
+    n_total = n_a + n_b
+
+    tie_sums = tie_sums.reshape(u_statistics.shape) - n_total
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = 0.5*n_a*n_b
+        variances = n_a*n_b/12.0*((n_total + 1.0) - tie_sums/(n_total*(n_total - 1.0)))
+        z_scores = (np.abs(u_statistics - means) - 0.5)/np.sqrt(variances)
+
+    z_scores = np.where((n_a > 0) & (n_b > 0), np.maximum(z_scores, 0.0), np.nan)
+
+    p_values = np.minimum(2.0*stats.norm.sf(z_scores), 1.0)
+
+    return u_statistics, p_values
+
+
+def kruskal_wallis_tests(values, membership):
+    """Perform the Kruskal-Wallis H test over the groups and the Dunn pairwise post-hoc tests.
+
+    Both tests are corrected for ties. The empty groups are skipped.
+
+    Args:
+        values (numpy.ndarray): the (..., n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+
+    Returns:
+        3-tuple of numpy.ndarray: the (...) H statistics, the (...) p-values and the (..., n groups, n groups) Dunn
+            pairwise p-values
+    """
+
+    import scipy.stats as stats
+
+    values = np.asarray(values, dtype=np.float64)
+
+    weights = _get_weights(values, membership)
+
+    n_values = weights.sum(axis=-2)
+
+    flat_values = values.reshape(-1, values.shape[-1])
+    flat_weights = weights.reshape((-1,) + weights.shape[-2:])
+
+    rank_sums = np.empty(flat_weights.shape[:1] + flat_weights.shape[-1:], dtype=np.float64)
+    tie_sums = np.empty(flat_weights.shape[:1], dtype=np.float64)
+
+    chunk_size = max(1, 2**22//max(1, flat_values.shape[-1]**2))
+    for start in range(0, flat_values.shape[0], chunk_size):
+        x = flat_values[start:start + chunk_size]
+        w = flat_weights[start:start + chunk_size]
+
+        # The multiplicity of each value in the pooled groups
+        pooled_weights = w.sum(axis=-1)
+
+        lower = (x[:, :, np.newaxis] > x[:, np.newaxis, :]).astype(np.float64)
+        equal = (x[:, :, np.newaxis] == x[:, np.newaxis, :]).astype(np.float64)
+
+        ties = (equal @ pooled_weights[:, :, np.newaxis])[:, :, 0]
+
+        # The mid-rank of each value in the pooled groups
+        ranks = (lower @ pooled_weights[:, :, np.newaxis])[:, :, 0] + 0.5*(ties + 1.0)
+
+        rank_sums[start:start + chunk_size] = np.einsum('fs,fsk->fk', np.where(pooled_weights > 0, ranks, 0.0), w)
+        tie_sums[start:start + chunk_size] = (pooled_weights*ties**2).sum(axis=-1) - pooled_weights.sum(axis=-1)
+
+    rank_sums = rank_sums.reshape(n_values.shape)
+    tie_sums = tie_sums.reshape(n_values.shape[:-1])
+
+    n_groups = (n_values > 0).sum(axis=-1)
+    n_total = n_values.sum(axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_ranks = rank_sums/n_values
+
+        h_statistics = 12.0/(n_total*(n_total + 1.0))*np.where(n_values > 0, rank_sums*mean_ranks, 0.0).sum(axis=-1) - 3.0*(n_total + 1.0)
+        h_statistics /= 1.0 - tie_sums/(n_total**3 - n_total)
+
+        h_statistics[n_groups < 2] = np.nan
+
+        rank_variances = n_total*(n_total + 1.0)/12.0 - tie_sums/(12.0*(n_total - 1.0))
+
+        n_a, n_b = n_values[..., :, np.newaxis], n_values[..., np.newaxis, :]
+        z_scores = (mean_ranks[..., :, np.newaxis] - mean_ranks[..., np.newaxis, :]) / \
+            np.sqrt(rank_variances[..., np.newaxis, np.newaxis]*(1.0/n_a + 1.0/n_b))
+
+    p_values = stats.chi2.sf(h_statistics, n_groups - 1.0)
+
+    pairwise_p_values = 2.0*stats.norm.sf(np.abs(z_scores))
+
+    return h_statistics, p_values, pairwise_p_values
+
+
+def run_group_tests(values, membership, test='student t', p_adjust='holm', statistics=None):
+    """Perform a group test over a set of families of groups.
+
+    For the omnibus tests (one-way ANOVA and Kruskal-Wallis), the pairwise p-values are the ones of their post-hoc
+    tests (resp. Fisher LSD and Dunn).
+
+    Args:
+        values (numpy.ndarray): the (..., n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+        test (str): the test. One of GROUP_TESTS.
+        p_adjust (str): the adjustment method of the pairwise p-values within each family. One of
+            lightcycler.kernel.utils.multiple_testing.ADJUSTMENT_METHODS or None.
+        statistics (3-tuple of numpy.ndarray): the number of values, means and variances of the groups as returned by
+            compute_group_statistics. If None, they are computed from the values when needed.
+
+    Returns:
+        2-tuple of numpy.ndarray: the (..., n groups, n groups) pairwise p-values and the (...) omnibus p-values. The
+            latter is None for the pairwise tests.
+    """
+
+    if test not in GROUP_TESTS:
+        raise ValueError('Unknown group test: {}'.format(test))
+
+    values = np.asarray(values, dtype=np.float64)
+
+    omnibus_p_values = None
+
+    if test in ('student t', 'welch t', 'one-way anova'):
+        if statistics is None:
+            statistics = compute_group_statistics(values, membership)
+        n_values, means, variances = statistics
+        if test == 'one-way anova':
+            _, omnibus_p_values, p_values = one_way_anova(n_values, means, variances)
+        else:
+            _, p_values = pairwise_t_tests(n_values, means, variances, equal_var=(test == 'student t'))
+    elif test == 'mann-whitney u':
+        _, p_values = mann_whitney_u_tests(values, membership)
+    else:
+        _, omnibus_p_values, p_values = kruskal_wallis_tests(values, membership)
+
+    p_values = adjust_pairwise_p_values(p_values, p_adjust)
+
+    return p_values, omnibus_p_values
@@ -0,0 +1,242 @@
+"""This module implements the following classes and functions:
+    - analyze_melt_curves
+    - compute_negative_derivatives
+    - MeltCurvesStore
+    - read_melt_curves_file
+"""
+
+import os
+
+import numpy as np
+
+import pandas as pd
+
+
+from lightcycler.kernel.utils.amplification_curves import AmplificationCurvesStore, build_curves_index, read_curves_table
+
+# The default temperature grid (in Celsius) onto which the melt curves are interpolated
+DEFAULT_TEMPERATURES = np.round(np.arange(60.0, 95.05, 0.1), 1)
+
+
+def read_melt_curves_file(curves_file, temperatures=DEFAULT_TEMPERATURES, program=None):
+    """Read a lightcycler melt curves export file.
+
+    The fluorescence of each well is linearly interpolated onto a common temperature grid. The grid temperatures
+    outside of the acquired range of a well are set to NaN.
+
+    Args:
+        curves_file (str): the melt curves file
+        temperatures (numpy.ndarray): the temperature grid
+        program (int): the program from which the acquisitions are read. If None, the program with the widest range of
+            temperatures is used.
+
+    Returns:
+        2-tuple: the index of the curves (pandas.DataFrame with Date, Gene, RT, Pos, Name and File columns) and the
+            (n wells, n temperatures) fluorescence
+    """
+
+    metadata, names, acquisitions_per_program = read_curves_table(curves_file)
+
+    def _temperature_range(acquisitions_per_well):
+        temperatures = np.array([a[1] for acquisitions in acquisitions_per_well.values() for a in acquisitions])
+        return np.nanmax(temperatures) - np.nanmin(temperatures) if np.any(~np.isnan(temperatures)) else -np.inf
+
+    if program is None:
+        # The melting program is the one which spans the widest range of temperatures
+        program = max(acquisitions_per_program, key=lambda p: _temperature_range(acquisitions_per_program[p]))
+    else:
+        program = str(program)
+
+    if program not in acquisitions_per_program:
+        raise IOError('Invalid melt curves file {}: no program {}'.format(curves_file, program))
+
+    acquisitions_per_well = acquisitions_per_program[program]
+
+    positions = list(acquisitions_per_well.keys())
+
+    fluorescence = np.full((len(positions), len(temperatures)), np.nan, dtype=np.float32)
+    for i, pos in enumerate(positions):
+        acquisitions = np.array([a[1:] for a in acquisitions_per_well[pos]], dtype=np.float64)
+        acquisitions = acquisitions[~np.isnan(acquisitions).any(axis=1)]
+        if len(acquisitions) < 2:
+            continue
+        acquisitions = acquisitions[np.argsort(acquisitions[:, 0])]
+        fluorescence[i, :] = np.interp(temperatures, acquisitions[:, 0], acquisitions[:, 1], left=np.nan, right=np.nan)
+
+    return build_curves_index(metadata, names, positions), fluorescence
+
+
+def compute_negative_derivatives(fluorescence, temperatures, smoothing_window=7):
+    """Compute the smoothed -dF/dT of a set of melt curves.
+
+    The derivative of all the curves is computed at once by a Savitzky-Golay filter along the temperature axis. The
+    temperatures which are NaN for a well (outside of its acquired range) are NaN in its derivative.
+
+    Args:
+        fluorescence (numpy.ndarray): the (n wells, n temperatures) fluorescence
+        temperatures (numpy.ndarray): the regularly spaced temperature grid
+        smoothing_window (int): the number of grid points of the smoothing window
+
+    Returns:
+        numpy.ndarray: the (n wells, n temperatures) -dF/dT
+    """
+
+    fluorescence = np.asarray(fluorescence, dtype=np.float64)
+
+    n_temperatures = fluorescence.shape[1]
+
+    # The window must be odd, larger than the polynomial order and not larger than the grid
+    smoothing_window = min(max(int(smoothing_window), 3), n_temperatures)
+    if smoothing_window % 2 == 0:
+        smoothing_window -= 1
+    if smoothing_window < 3:
+        return np.full(fluorescence.shape, np.nan)
+
+    missing = np.isnan(fluorescence)
+
+    # The missing values are filled with the nearest acquired value so that they do not spread over the whole curve
+    filled = pd.DataFrame(fluorescence.T).ffill().bfill().to_numpy().T
+    filled = np.where(np.isnan(filled), 0.0, filled)
+
+    step = temperatures[1] - temperatures[0]
+
+    from scipy.signal import savgol_filter
+
+    derivatives = -savgol_filter(filled, smoothing_window, 2, deriv=1, delta=step, axis=1)
+
+    return np.where(missing, np.nan, derivatives)
+
+
+def analyze_melt_curves(fluorescence, temperatures, genes=None, smoothing_window=7, min_height=None, secondary_ratio=0.2,
+                        min_separation=2.0, tm_tolerance=1.5):
+    """Detect the Tm peaks of a set of melt curves and flag the wells failing the quality control.
+
+    The peaks are the local maxima of -dF/dT. The Tm is the temperature of the highest peak, refined by fitting a
+    parabola through the peak and its two neighbours. A secondary peak is a peak at least min_separation Celsius away
+    from the Tm whose height exceeds secondary_ratio times the height of the main peak. A well fails the quality
+    control if it has no peak, a secondary peak or, when the genes are given, a Tm further than tm_tolerance from the
+    median Tm of its gene.
+
+    Args:
+        fluorescence (numpy.ndarray): the (n wells, n temperatures) fluorescence
+        temperatures (numpy.ndarray): the regularly spaced temperature grid
+        genes (list of str): the gene of each well
+        smoothing_window (int): the number of grid points of the smoothing window
+        min_height (float): the minimum height of a peak. If None, 10 times the median absolute -dF/dT of all the wells.
+        secondary_ratio (float): the ratio to the main peak height above which a secondary peak is flagged
+        min_separation (float): the minimum distance in Celsius between the main and a secondary peak
+        tm_tolerance (float): the maximum distance in Celsius between the Tm of a well and the median Tm of its gene
+
+    Returns:
+        pandas.DataFrame: the Tm, the peak height, the number of peaks, the secondary peak flag, the Tm outlier flag
+            and the quality control status of each well
+    """
+
+    columns = ['Tm', 'Peak height', 'N peaks', 'Secondary peak', 'Tm outlier', 'QC passed']
+
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+
+    n_wells = fluorescence.shape[0]
+    if n_wells == 0:
+        return pd.DataFrame(columns=columns)
+
+    derivatives = compute_negative_derivatives(fluorescence, temperatures, smoothing_window)
+
+    if min_height is None:
+        min_height = 10.0*np.nanmedian(np.abs(derivatives)) if np.any(~np.isnan(derivatives)) else 0.0
+
+    values = np.where(np.isnan(derivatives), -np.inf, derivatives)
+
+    # The local maxima of the derivatives above the minimum height
+    peaks = np.zeros(values.shape, dtype=bool)
+    peaks[:, 1:-1] = (values[:, 1:-1] > values[:, :-2]) & (values[:, 1:-1] >= values[:, 2:]) & (values[:, 1:-1] > min_height)
+
+    has_peak = peaks.any(axis=1)
+
+    rows = np.arange(n_wells)
+
+    # The main peak
+    maxima = np.argmax(np.where(peaks, values, -np.inf), axis=1)
+    heights = values[rows, maxima]
+
+    previous = values[rows, np.clip(maxima - 1, 0, None)]
+    following = values[rows, np.clip(maxima + 1, None, values.shape[1] - 1)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offsets = 0.5*(previous - following)/(previous - 2.0*heights + following)
+    offsets = np.where(np.isfinite(offsets), np.clip(offsets, -0.5, 0.5), 0.0)
+
+    step = temperatures[1] - temperatures[0]
+    tms = np.where(has_peak, temperatures[maxima] + offsets*step, np.nan)
+    heights = np.where(has_peak, heights, np.nan)
+
+    # The secondary peaks
+    with np.errstate(invalid='ignore'):
+        secondary_peaks = peaks & \
+            (np.abs(temperatures[np.newaxis, :] - tms[:, np.newaxis]) >= min_separation) & \
+            (values >= secondary_ratio*heights[:, np.newaxis])
+    has_secondary_peak = secondary_peaks.any(axis=1)
+
+    # The wells whose Tm is too far from the median Tm of their gene
+    if genes is not None:
+        median_tms = pd.Series(tms).groupby(np.asarray(genes)).transform('median').to_numpy()
+        with np.errstate(invalid='ignore'):
+            tm_outliers = np.abs(tms - median_tms) > tm_tolerance
+    else:
+        tm_outliers = np.zeros(n_wells, dtype=bool)
+
+    return pd.DataFrame({'Tm': tms,
+                         'Peak height': heights,
+                         'N peaks': peaks.sum(axis=1),
+                         'Secondary peak': has_secondary_peak,
+                         'Tm outlier': tm_outliers,
+                         'QC passed': has_peak & ~has_secondary_peak & ~tm_outliers},
+                        columns=columns)
+
+
+class MeltCurvesStore(AmplificationCurvesStore):
+    """This class implements an on-disk store of melt curves interpolated onto a common temperature grid.
+    """
+
+    def __init__(self, directory, temperatures=DEFAULT_TEMPERATURES):
+        """Constructor.
+
+        If the directory already contains a store, it is reopened with its temperature grid.
+
+        Args:
+            directory (str): the directory of the store
+            temperatures (numpy.ndarray): the temperature grid
+        """
+
+        temperatures_file = os.path.join(directory, 'temperatures.npy')
+        if os.path.exists(temperatures_file):
+            temperatures = np.load(temperatures_file)
+
+        super(MeltCurvesStore, self).__init__(directory, n_cycles=len(temperatures))
+
+        self._temperatures = np.asarray(temperatures, dtype=np.float64)
+
+        if not os.path.exists(temperatures_file):
+            np.save(temperatures_file, self._temperatures)
+
+    def _read_file(self, curves_file, program):
+        """Read a melt curves file.
+
+        Args:
+            curves_file (str): the melt curves file
+            program (int): the program from which the acquisitions are read
+
+        Returns:
+            2-tuple: the index of the curves and the (n wells, n temperatures) fluorescence
+        """
+
+        return read_melt_curves_file(curves_file, temperatures=self._temperatures, program=program)
+
+    @property
+    def temperatures(self):
+        """Return the temperature grid of the store.
+
+        Returns:
+            numpy.ndarray: the temperatures
+        """
+
+        return self._temperatures
@@ -0,0 +1,61 @@
+"""This module implements the following functions:
+    - adjust_p_values
+"""
+
+import numpy as np
+
+# The available p-values adjustment methods
+ADJUSTMENT_METHODS = ['benjamini-hochberg', 'bonferroni', 'holm']
+
+
+def adjust_p_values(p_values, method='holm', axis=-1):
+    """Adjust a set of families of p-values for multiple testing.
+
+    All the families are adjusted at once by a single sort along the family axis. The NaN values are skipped and left
+    unchanged.
+
+    Args:
+        p_values (numpy.ndarray): the p-values
+        method (str): the adjustment method. One of ADJUSTMENT_METHODS.
+        axis (int): the axis running over the p-values of a family. If None, the whole array is a single family.
+
+    Returns:
+        numpy.ndarray: the adjusted p-values
+    """
+
+    if method not in ADJUSTMENT_METHODS:
+        raise ValueError('Unknown p-values adjustment method: {}'.format(method))
+
+    p_values = np.asarray(p_values, dtype=np.float64)
+
+    if axis is None:
+        return adjust_p_values(p_values.ravel(), method, axis=-1).reshape(p_values.shape)
+
+    p_values = np.moveaxis(p_values, axis, -1)
+
+    missing = np.isnan(p_values)
+
+    n_tests = (~missing).sum(axis=-1, keepdims=True)
+
+    if method == 'bonferroni':
+        adjusted = np.minimum(n_tests*p_values, 1.0)
+    else:
+        # The NaN values are sorted last hence do not interfere with the ranks of the valid ones
+        order = np.argsort(p_values, axis=-1)
+        sorted_p_values = np.take_along_axis(p_values, order, axis=-1)
+
+        ranks = np.arange(1, p_values.shape[-1] + 1)
+
+        if method == 'holm':
+            sorted_adjusted = np.fmax.accumulate((n_tests - ranks + 1)*sorted_p_values, axis=-1)
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                scaled = n_tests*sorted_p_values/ranks
+            sorted_adjusted = np.flip(np.fmin.accumulate(np.flip(scaled, axis=-1), axis=-1), axis=-1)
+
+        adjusted = np.empty_like(sorted_adjusted)
+        np.put_along_axis(adjusted, order, np.minimum(sorted_adjusted, 1.0), axis=-1)
+
+    adjusted[missing] = np.nan
+
+    return np.moveaxis(adjusted, -1, axis)
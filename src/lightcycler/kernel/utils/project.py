@@ -0,0 +1,137 @@
+"""This module implements the following classes and functions:
+    - load_project
+    - ProjectError
+    - save_project
+    - to_storable
+
+A project is a zip archive storing the raw data as a Parquet table and the settings of the session (groups, group
+control, reference and interest genes, ct powers ...) as JSON. Unlike the excel export, the raw data are stored with
+their types hence they are loaded as they were saved without any parsing.
+"""
+
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+import pandas as pd
+
+# The version of the project format
+PROJECT_VERSION = 1
+
+_RAWDATA_ENTRY = 'rawdata.parquet'
+
+_SETTINGS_ENTRY = 'project.json'
+
+
+class ProjectError(Exception):
+    """Exception raised for project files related errors.
+    """
+
+
+def to_storable(rawdata):
+    """Convert the object columns of the raw data whose values have heterogeneous types to strings.
+
+    Parquet columns have a single type whereas pandas object columns may mix types (e.g. integer and string positions).
+
+    Args:
+        rawdata (pandas.DataFrame): the raw data
+
+    Returns:
+        pandas.DataFrame: the storable raw data
+    """
+
+    rawdata = rawdata.copy()
+
+    for column in rawdata.columns:
+        if rawdata[column].dtype != object:
+            continue
+
+        types = set([type(v) for v in rawdata[column].dropna()])
+        if len(types) > 1:
+            rawdata[column] = rawdata[column].map(lambda v: v if pd.isna(v) else str(v))
+
+    return rawdata
+
+
+def _to_json(value):
+    """Convert a value which is not JSON-serializable (e.g. a numpy scalar) to a python one.
+
+    Args:
+        value (object): the value
+
+    Returns:
+        object: the converted value
+    """
+
+    if hasattr(value, 'item'):
+        return value.item()
+
+    return str(value)
+
+
+def save_project(filename, rawdata, settings):
+    """Save a project.
+
+    The project is written to a temporary file of the destination directory which is then renamed to the destination
+    file so that a failed save never leaves a partially written project.
+
+    Args:
+        filename (str): the project file
+        rawdata (pandas.DataFrame): the raw data
+        settings (dict): the JSON-serializable settings of the session
+    """
+
+    buffer = io.BytesIO()
+    to_storable(rawdata).to_parquet(buffer)
+
+    contents = dict(settings)
+    contents['version'] = PROJECT_VERSION
+
+    directory, basename = os.path.split(os.path.abspath(filename))
+
+    fd, temp_filename = tempfile.mkstemp(prefix='.{}.'.format(basename), dir=directory)
+    os.close(fd)
+
+    try:
+        # The Parquet table is already compressed
+        with zipfile.ZipFile(temp_filename, 'w', compression=zipfile.ZIP_STORED) as archive:
+            archive.writestr(_RAWDATA_ENTRY, buffer.getvalue())
+            archive.writestr(_SETTINGS_ENTRY, json.dumps(contents, indent=2, default=_to_json))
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def load_project(filename):
+    """Load a project.
+
+    Args:
+        filename (str): the project file
+
+    Returns:
+        2-tuple: the raw data (pandas.DataFrame) and the settings (dict) of the session
+
+    Raises:
+        ProjectError: if the file is not a valid project file
+    """
+
+    try:
+        with zipfile.ZipFile(filename, 'r') as archive:
+            names = archive.namelist()
+            if _RAWDATA_ENTRY not in names or _SETTINGS_ENTRY not in names:
+                raise ProjectError('Invalid project file {}: missing {} and/or {} entries'.format(filename, _RAWDATA_ENTRY, _SETTINGS_ENTRY))
+
+            settings = json.loads(archive.read(_SETTINGS_ENTRY).decode('utf-8'))
+            rawdata = pd.read_parquet(io.BytesIO(archive.read(_RAWDATA_ENTRY)))
+    except zipfile.BadZipFile:
+        raise ProjectError('Invalid project file {}'.format(filename))
+
+    version = settings.pop('version', None)
+    if version != PROJECT_VERSION:
+        raise ProjectError('Unsupported version {} of project file {}'.format(version, filename))
+
+    return rawdata, settings
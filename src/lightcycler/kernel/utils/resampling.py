@@ -0,0 +1,239 @@
+"""This module implements the following functions:
+    - bootstrap_mean_differences
+    - permutation_tests
+    - run_resampling
+
+The resampling is performed for a set of families of groups (typically all the genes x zones of the dynamic matrices)
+from a (n genes, n zones, n samples) array of per-sample values and a (n samples, n groups) membership matrix. The NaN
+values are skipped. All the replicates of a family are drawn at once as a single index matrix. The random stream of
+each gene is derived from the seed so that the results do not depend on the number of worker processes.
+"""
+
+import collections
+import concurrent.futures
+import multiprocessing
+
+import numpy as np
+
+# The results of the resampling
+RESAMPLING_RESULTS = ['mean difference', 'mean difference lower bound', 'mean difference upper bound', 'permutation p-value']
+
+
+def _percentiles(replicates, fractions):
+    """Compute the percentiles of a set of replicates with linear interpolation.
+
+    Args:
+        replicates (numpy.ndarray): the (n replicates, n statistics) replicates
+        fractions (list of float): the fractions of the percentiles
+
+    Returns:
+        list of numpy.ndarray: the (n statistics) percentiles for each fraction
+    """
+
+    # A full sort is cheaper than a partition per fraction for the short columns of replicates
+    sorted_replicates = np.sort(replicates, axis=0)
+
+    n_replicates = sorted_replicates.shape[0]
+
+    percentiles = []
+    for fraction in fractions:
+        position = fraction*(n_replicates - 1)
+        below = int(np.floor(position))
+        above = min(below + 1, n_replicates - 1)
+        weight = position - below
+        percentiles.append((1.0 - weight)*sorted_replicates[below] + weight*sorted_replicates[above])
+
+    return percentiles
+
+
+def bootstrap_mean_differences(values, weights, n_resamples, confidence, rng):
+    """Compute the bootstrap confidence intervals of the mean differences between all the pairs of groups of a family.
+
+    The values of each group are resampled with replacement within the group. The confidence intervals are the
+    percentile intervals of the replicated differences.
+
+    Args:
+        values (numpy.ndarray): the (n samples) values
+        weights (numpy.ndarray): the (n samples, n groups) membership of the non-NaN values to the groups
+        n_resamples (int): the number of bootstrap replicates
+        confidence (float): the confidence level of the intervals
+        rng (numpy.random.Generator): the random generator
+
+    Returns:
+        2-tuple of numpy.ndarray: the (n groups, n groups) lower and upper bounds of mean_a - mean_b
+    """
+
+    n_groups = weights.shape[1]
+
+    members = [np.flatnonzero(weights[:, k]) for k in range(n_groups)]
+    n_values = np.array([len(m) for m in members])
+
+    lower = np.full((n_groups, n_groups), np.nan)
+    upper = np.full((n_groups, n_groups), np.nan)
+
+    rows, columns = np.triu_indices(n_groups, k=1)
+    valid = (n_values[rows] > 0) & (n_values[columns] > 0)
+    if not np.any(valid):
+        return lower, upper
+    rows, columns = rows[valid], columns[valid]
+
+    # The slots of all the groups concatenated, each slot being redrawn among the members of its group
+    slots = np.concatenate(members)
+    slot_groups = np.repeat(np.arange(n_groups), n_values)
+    offsets = np.concatenate([[0], np.cumsum(n_values)[:-1]])
+
+    # The draws are made in single precision which is much faster and is clipped against the rounding up to n values
+    slot_sizes = n_values[slot_groups]
+    draws = (rng.random((n_resamples, len(slots)), dtype=np.float32)*slot_sizes.astype(np.float32)).astype(np.int32)
+    draws = np.minimum(draws, slot_sizes - 1) + offsets[slot_groups]
+
+    blocks = np.zeros((len(slots), n_groups), dtype=np.float64)
+    blocks[np.arange(len(slots)), slot_groups] = 1.0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (values[slots][draws] @ blocks)/n_values
+
+    # Only the distinct pairs are resampled, the bounds of mean_b - mean_a being the opposite of the ones of mean_a - mean_b
+    alpha = 0.5*(1.0 - confidence)
+    pair_lower, pair_upper = _percentiles(means[:, rows] - means[:, columns], [alpha, 1.0 - alpha])
+
+    lower[rows, columns], upper[rows, columns] = pair_lower, pair_upper
+    lower[columns, rows], upper[columns, rows] = -pair_upper, -pair_lower
+
+    return lower, upper
+
+
+def permutation_tests(values, weights, n_resamples, rng):
+    """Perform the two-sided permutation tests of the mean differences between all the pairs of groups of a family.
+
+    The values of all the groups are pooled and the group labels are permuted, each replicate being a permutation of
+    the pool. The p-values are (1 + number of replicated differences at least as extreme as the observed one)/(1 + number
+    of replicates).
+
+    Args:
+        values (numpy.ndarray): the (n samples) values
+        weights (numpy.ndarray): the (n samples, n groups) membership of the non-NaN values to the groups
+        n_resamples (int): the number of permutations
+        rng (numpy.random.Generator): the random generator
+
+    Returns:
+        numpy.ndarray: the (n groups, n groups) p-values whose diagonal is 1
+    """
+
+    n_groups = weights.shape[1]
+
+    n_values = weights.sum(axis=0)
+
+    p_values = np.full((n_groups, n_groups), np.nan)
+    np.fill_diagonal(p_values, 1.0)
+
+    rows, columns = np.triu_indices(n_groups, k=1)
+    valid = (n_values[rows] > 0) & (n_values[columns] > 0)
+    if not np.any(valid):
+        return p_values
+    rows, columns = rows[valid], columns[valid]
+
+    pool = np.flatnonzero(weights.any(axis=1))
+
+    pool_values = values[pool]
+    pool_weights = weights[pool]
+
+    # Each row of the index matrix is a random permutation of the pool
+    permutations = np.argsort(rng.random((n_resamples, len(pool)), dtype=np.float32), axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        observed = (pool_values @ pool_weights)/n_values
+        means = (pool_values[permutations] @ pool_weights)/n_values
+
+    observed = np.abs(observed[rows] - observed[columns])
+
+    # The tolerance prevents the rounding errors from hiding the replicates equal to the observed difference
+    differences = np.abs(means[:, rows] - means[:, columns])
+    n_extremes = (differences >= observed - 1.0e-12*np.maximum(1.0, observed)).sum(axis=0)
+
+    p_values[rows, columns] = p_values[columns, rows] = (1.0 + n_extremes)/(1.0 + n_resamples)
+
+    return p_values
+
+
+def _resample_genes(values, membership, n_resamples, confidence, seed_sequences):
+    """Resample all the zones of a set of genes.
+
+    Args:
+        values (numpy.ndarray): the (n genes, n zones, n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+        n_resamples (int): the number of replicates
+        confidence (float): the confidence level of the bootstrap intervals
+        seed_sequences (list of numpy.random.SeedSequence): the seed sequence of each gene
+
+    Returns:
+        numpy.ndarray: the (n genes, n zones, 4, n groups, n groups) results for each entry of RESAMPLING_RESULTS
+    """
+
+    n_genes, n_zones, _ = values.shape
+    n_groups = membership.shape[1]
+
+    results = np.empty((n_genes, n_zones, len(RESAMPLING_RESULTS), n_groups, n_groups), dtype=np.float64)
+
+    for i in range(n_genes):
+
+        rng = np.random.default_rng(seed_sequences[i])
+
+        for j in range(n_zones):
+
+            x = values[i, j]
+
+            weights = (~np.isnan(x))[:, np.newaxis]*membership
+            x = np.where(np.isnan(x), 0.0, x)
+
+            n_values = weights.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = (x @ weights)/n_values
+
+            results[i, j, 0] = means[:, np.newaxis] - means[np.newaxis, :]
+            results[i, j, 1], results[i, j, 2] = bootstrap_mean_differences(x, weights, n_resamples, confidence, rng)
+            results[i, j, 3] = permutation_tests(x, weights, n_resamples, rng)
+
+    return results
+
+
+def run_resampling(values, membership, n_resamples=10000, confidence=0.95, seed=None, n_workers=None):
+    """Compute the bootstrap confidence intervals and the permutation p-values of the mean differences between all the
+    pairs of groups of a set of families.
+
+    Args:
+        values (numpy.ndarray): the (n genes, n zones, n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+        n_resamples (int): the number of bootstrap and permutation replicates
+        confidence (float): the confidence level of the bootstrap intervals
+        seed (int): the seed of the random generator. If None, the results are not reproducible.
+        n_workers (int): the number of worker processes over which the genes are spread. If None or 1, the resampling
+            is performed in the current process.
+
+    Returns:
+        collections.OrderedDict: the (n genes, n zones, n groups, n groups) results for each entry of RESAMPLING_RESULTS
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    membership = np.asarray(membership, dtype=np.float64)
+
+    n_genes = values.shape[0]
+
+    seed_sequences = np.random.SeedSequence(seed).spawn(n_genes)
+
+    if n_workers is None or n_workers <= 1 or n_genes <= 1:
+        results = _resample_genes(values, membership, n_resamples, confidence, seed_sequences)
+    else:
+        chunks = np.array_split(np.arange(n_genes), min(n_workers, n_genes))
+        # The workers are spawned rather than forked as the calling process may run threads (e.g. a Qt event loop)
+        context = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as executor:
+            futures = [executor.submit(_resample_genes,
+                                       values[chunk],
+                                       membership,
+                                       n_resamples,
+                                       confidence,
+                                       [seed_sequences[i] for i in chunk]) for chunk in chunks]
+            results = np.concatenate([future.result() for future in futures], axis=0)
+
+    return collections.OrderedDict([(name, results[:, :, i]) for i, name in enumerate(RESAMPLING_RESULTS)])
@@ -0,0 +1,64 @@
+"""This module implements the following classes and functions:
+    - ResultsCache
+"""
+
+import collections
+
+
+class ResultsCache:
+    """This class implements a cache of computed results shared between the GUI and the export.
+
+    The results are stored per key and computed only on the first request of a key. The cache must be cleared each time
+    the data the results derive from change. When the cache is full, the least recently requested results are dropped.
+    """
+
+    def __init__(self, max_size=128):
+        """Constructor.
+
+        Args:
+            max_size (int): the maximum number of results stored. If None, the number of results is not bounded.
+        """
+
+        self._max_size = max_size
+
+        self._results = collections.OrderedDict()
+
+    def __contains__(self, key):
+
+        return key in self._results
+
+    def __len__(self):
+
+        return len(self._results)
+
+    def clear(self):
+        """Drop all the results.
+        """
+
+        self._results.clear()
+
+    def get(self, key, compute, *args, **kwargs):
+        """Return the results stored for a key, computing them if they are missing.
+
+        Args:
+            key (hashable): the key of the results
+            compute (callable): the function which computes the results
+            args (list): the positional arguments of the function
+            kwargs (dict): the keyword arguments of the function
+
+        Returns:
+            object: the results
+        """
+
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        results = compute(*args, **kwargs)
+
+        self._results[key] = results
+
+        if self._max_size is not None and len(self._results) > self._max_size:
+            self._results.popitem(last=False)
+
+        return results
@@ -0,0 +1,37 @@
+"""This module implements the following functions:
+    - segment_statistics
+"""
+
+import numpy as np
+
+
+def segment_statistics(values, counts):
+    """Compute the mean, the standard deviation and the max - min range of consecutive segments of values.
+
+    The segments of the same length are stacked and reduced together, hence the results are the same as applying
+    numpy.mean, numpy.std, numpy.max and numpy.min to each segment separately.
+
+    Args:
+        values (numpy.ndarray): the values of all the segments concatenated
+        counts (numpy.ndarray): the length of each segment
+
+    Returns:
+        3-tuple: the means, standard deviations and ranges of each segment. They are NaN for the empty segments.
+    """
+
+    counts = np.asarray(counts, dtype=np.int64)
+
+    means = np.full(len(counts), np.nan)
+    stds = np.full(len(counts), np.nan)
+    ranges = np.full(len(counts), np.nan)
+
+    starts = np.cumsum(counts) - counts
+
+    for n in np.unique(counts[counts > 0]):
+        segments = np.flatnonzero(counts == n)
+        block = values[starts[segments, np.newaxis] + np.arange(n)]
+        means[segments] = block.mean(axis=1)
+        stds[segments] = block.std(axis=1)
+        ranges[segments] = block.max(axis=1) - block.min(axis=1)
+
+    return means, stds, ranges
@@ -0,0 +1,163 @@
+"""This module implements the following functions:
+    - genorm
+    - normfinder
+"""
+
+import numpy as np
+
+
+def nan_std(values, axis=-1):
+    """Compute the sample standard deviation of an array along a given axis skipping the NaN values.
+
+    The standard deviation is NaN where less than two values are available.
+
+    Args:
+        values (numpy.ndarray): the values
+        axis (int): the axis along which the standard deviation is computed
+
+    Returns:
+        numpy.ndarray: the standard deviation
+    """
+
+    valid = ~np.isnan(values)
+    n_values = valid.sum(axis=axis)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(valid, values, 0.0).sum(axis=axis)/n_values
+        deviations = np.where(valid, values - np.expand_dims(means, axis), 0.0)
+        stds = np.sqrt((deviations**2).sum(axis=axis)/(n_values - 1))
+
+    return np.where(n_values > 1, stds, np.nan)
+
+
+def genorm(log_quantities):
+    """Compute the geNorm expression stability of a set of genes.
+
+    The M value of a gene is the average of the standard deviations over the samples of its log ratios with each of
+    the other genes. The least stable gene, i.e. the one with the highest M value, is eliminated and the M values are
+    recomputed over the remaining genes until two genes are left. The pairwise variation V(n/n+1) is the standard
+    deviation of the log ratio of the normalization factors built from the n and n+1 most stable genes.
+
+    Args:
+        log_quantities (numpy.ndarray): the (n genes, n samples) log2 relative quantities. The NaN values are skipped.
+
+    Returns:
+        4-tuple: the M values computed over all the genes, the M values of the genes when they were eliminated, the
+            indexes of the genes sorted from the most to the least stable and the pairwise variations V(n/n+1)
+            for n from 2 to n genes - 1
+    """
+
+    n_genes = log_quantities.shape[0]
+
+    # The standard deviation of the log ratio for each pair of genes
+    log_ratios = log_quantities[:, np.newaxis, :] - log_quantities[np.newaxis, :, :]
+    pairwise_stds = nan_std(log_ratios, axis=2)
+    np.fill_diagonal(pairwise_stds, np.nan)
+
+    valid = ~np.isnan(pairwise_stds)
+    pairwise_stds = np.where(valid, pairwise_stds, 0.0)
+
+    # The M values are the running averages of the pairwise standard deviations over the remaining genes. When a
+    # gene is eliminated, its contribution is simply removed from the running sums.
+    sums = pairwise_stds.sum(axis=1)
+    counts = valid.sum(axis=1).astype(np.float64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        m_values = sums/counts
+
+    elimination_m_values = np.full(n_genes, np.nan)
+    remaining = np.ones(n_genes, dtype=bool)
+    eliminated = []
+
+    while remaining.sum() > 2:
+        remaining_indexes = np.flatnonzero(remaining)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            current_m_values = sums[remaining_indexes]/counts[remaining_indexes]
+        # The genes whose M value is undefined are eliminated last
+        worst = remaining_indexes[np.argmax(np.where(np.isnan(current_m_values), -np.inf, current_m_values))]
+        elimination_m_values[worst] = sums[worst]/counts[worst] if counts[worst] > 0 else np.nan
+        remaining[worst] = False
+        eliminated.append(worst)
+        sums -= pairwise_stds[:, worst]
+        counts -= valid[:, worst]
+
+    last_genes = np.flatnonzero(remaining).tolist()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        elimination_m_values[last_genes] = (sums/counts)[last_genes]
+
+    ranking = np.array(last_genes + eliminated[::-1], dtype=np.int64)
+
+    # The log2 normalization factors built from the n most stable genes for n from 1 to n genes
+    sorted_log_quantities = log_quantities[ranking]
+    sorted_valid = ~np.isnan(sorted_log_quantities)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_normalization_factors = np.cumsum(np.where(sorted_valid, sorted_log_quantities, 0.0), axis=0)/np.cumsum(sorted_valid, axis=0)
+
+    pairwise_variations = nan_std(log_normalization_factors[1:-1] - log_normalization_factors[2:], axis=1)
+
+    return m_values, elimination_m_values, ranking, pairwise_variations
+
+
+def normfinder(log_quantities, group_indexes):
+    """Compute the NormFinder expression stability of a set of genes.
+
+    The stability combines the intragroup variance of each gene, corrected for the bias introduced by the other
+    genes, with its intergroup variation, shrunk towards zero by an empirical Bayes estimate of the intergroup
+    variance. Only the samples which belong to a group and have a value for every gene are used.
+
+    Args:
+        log_quantities (numpy.ndarray): the (n genes, n samples) log2 relative quantities
+        group_indexes (numpy.ndarray): the index of the group of each sample. Samples with a negative index are skipped.
+
+    Returns:
+        numpy.ndarray: the stability value of each gene. The lower the value, the more stable the gene.
+    """
+
+    n_genes = log_quantities.shape[0]
+
+    if n_genes < 3:
+        return np.full(n_genes, np.nan)
+
+    group_indexes = np.asarray(group_indexes)
+
+    keep = (group_indexes >= 0) & ~np.isnan(log_quantities).any(axis=0)
+
+    # Keep only the groups with at least two samples
+    groups, n_per_group = np.unique(group_indexes[keep], return_counts=True)
+    keep &= np.isin(group_indexes, groups[n_per_group >= 2])
+
+    groups, group_indexes, n_per_group = np.unique(group_indexes[keep], return_inverse=True, return_counts=True)
+
+    n_groups = len(groups)
+    if n_groups == 0:
+        return np.full(n_genes, np.nan)
+
+    values = log_quantities[:, keep]
+
+    membership = np.zeros((values.shape[1], n_groups), dtype=np.float64)
+    membership[np.arange(values.shape[1]), group_indexes] = 1.0
+
+    # The average over the samples of each group for each gene, over the genes for each sample and over both for each group
+    gene_group_means = (values @ membership)/n_per_group
+    sample_means = values.mean(axis=0)
+    group_means = gene_group_means.mean(axis=0)
+
+    # The intragroup variances
+    residuals = values - gene_group_means[:, group_indexes] - sample_means + group_means[group_indexes]
+    s2 = ((residuals**2) @ membership)/((n_per_group - 1)*(1.0 - 2.0/n_genes))
+    intragroup_variances = np.clip(s2 - s2.sum(axis=0)/(n_genes*(n_genes - 1)), 0.0, None)
+
+    if n_groups == 1:
+        return np.sqrt(intragroup_variances[:, 0])
+
+    # The intergroup differences and their shrinkage
+    differences = gene_group_means - gene_group_means.mean(axis=1, keepdims=True) - group_means + group_means.mean()
+    variances_of_means = intragroup_variances/n_per_group
+    gamma2 = max((differences**2).sum()/((n_groups - 1)*(n_genes - 1)) - variances_of_means.sum()/(n_groups*n_genes), 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shrinkage = np.where(gamma2 + variances_of_means > 0.0, gamma2/(gamma2 + variances_of_means), 0.0)
+
+    stabilities = np.abs(shrinkage*differences) + np.sqrt(variances_of_means + shrinkage*variances_of_means)
+
+    return stabilities.mean(axis=1)
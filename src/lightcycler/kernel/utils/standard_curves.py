@@ -0,0 +1,184 @@
+"""This module implements the following functions:
+    - compute_copies
+    - fit_standard_curves
+    - get_concentrations_from_names
+    - read_concentrations
+"""
+
+import os
+import re
+
+import numpy as np
+
+import pandas as pd
+
+# The default naming rule for the samples of a dilution series, e.g. STD1000 or STD_0.5
+DEFAULT_NAMING_RULE = r'^STD_?(?P<concentration>\d+(\.\d*)?)$'
+
+
+def get_concentrations_from_names(samples, naming_rule=DEFAULT_NAMING_RULE):
+    """Return the concentrations of the samples of a dilution series from their names.
+
+    Args:
+        samples (list of str): the sample names
+        naming_rule (str): the regular expression matching the samples of the dilution series. It must define a
+            named group "concentration".
+
+    Returns:
+        dict: the concentration of each matching sample
+    """
+
+    pattern = re.compile(naming_rule)
+
+    if 'concentration' not in pattern.groupindex:
+        raise ValueError('The naming rule must define a "concentration" named group')
+
+    concentrations = {}
+    for sample in samples:
+        match = pattern.match(str(sample))
+        if match is None:
+            continue
+        concentrations[sample] = float(match.group('concentration'))
+
+    return concentrations
+
+
+def read_concentrations(filename):
+    """Read the concentrations of the samples of a dilution series from a mapping table.
+
+    The table (csv or excel) must have a "Name" and a "Concentration" columns.
+
+    Args:
+        filename (str): the mapping table file
+
+    Returns:
+        dict: the concentration of each sample
+    """
+
+    _, ext = os.path.splitext(filename)
+
+    if ext.lower() in ['.xls', '.xlsx']:
+        table = pd.read_excel(filename)
+    else:
+        table = pd.read_csv(filename, sep=None, engine='python')
+
+    if 'Name' not in table.columns or 'Concentration' not in table.columns:
+        raise IOError('Invalid mapping table: missing "Name" and/or "Concentration" columns')
+
+    table = table.dropna(subset=['Name', 'Concentration'])
+
+    return dict(zip(table['Name'].astype(str), table['Concentration'].astype(float)))
+
+
+def fit_standard_curves(rawdata, concentrations, by=('Gene',), cp_column='CP'):
+    """Fit the standard curves CP = slope * log10(concentration) + intercept of the dilution series.
+
+    All the curves are fitted at once by computing the least squares sufficient statistics of each curve with a
+    single pass over the data.
+
+    Args:
+        rawdata (pandas.DataFrame): the raw data
+        concentrations (dict): the concentration of each sample of the dilution series
+        by (tuple of str): the raw data columns defining a curve
+        cp_column (str): the raw data column from which the CP values are read
+
+    Returns:
+        pandas.DataFrame: the slope, intercept, R², efficiency (in %), ct power (10^(-1/slope)) and number of
+            points of each curve
+    """
+
+    columns = ['slope', 'intercept', 'R2', 'efficiency', 'ct power', 'n']
+
+    if rawdata.empty or not concentrations:
+        return pd.DataFrame(columns=columns)
+
+    names = rawdata['Name'].astype(str)
+    concentration_per_row = names.map(dict([(str(k), v) for k, v in concentrations.items()]))
+
+    selection = concentration_per_row.notna() & (concentration_per_row > 0) & rawdata[cp_column].notna()
+    if not selection.any():
+        return pd.DataFrame(columns=columns)
+
+    x = np.log10(concentration_per_row[selection].to_numpy(dtype=np.float64))
+    y = rawdata[cp_column][selection].to_numpy(dtype=np.float64)
+
+    keys = rawdata.loc[selection, list(by)]
+    curve_indexes, curves = pd.MultiIndex.from_frame(keys).factorize()
+    curves = curves.set_names(list(by))
+    n_curves = len(curves)
+
+    def _sum(weights):
+        return np.bincount(curve_indexes, weights=weights, minlength=n_curves)
+
+    n = _sum(None)
+    sx = _sum(x)
+    sy = _sum(y)
+    sxx = _sum(x*x)
+    sxy = _sum(x*y)
+    syy = _sum(y*y)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sxx_centered = sxx - sx*sx/n
+        sxy_centered = sxy - sx*sy/n
+        syy_centered = syy - sy*sy/n
+        slopes = sxy_centered/sxx_centered
+        intercepts = (sy - slopes*sx)/n
+        r2 = sxy_centered**2/(sxx_centered*syy_centered)
+        ct_powers = np.power(10.0, -1.0/slopes)
+
+    # A curve needs at least two distinct concentrations
+    invalid = (n < 2) | ~(sxx_centered > 1.0e-9)
+    slopes[invalid] = intercepts[invalid] = r2[invalid] = ct_powers[invalid] = np.nan
+
+    index = curves if len(by) > 1 else curves.get_level_values(0)
+
+    return pd.DataFrame({'slope': slopes,
+                         'intercept': intercepts,
+                         'R2': r2,
+                         'efficiency': 100.0*(ct_powers - 1.0),
+                         'ct power': ct_powers,
+                         'n': n.astype(np.int64)},
+                        index=index,
+                        columns=columns)
+
+
+def compute_copies(rawdata, standard_curves, by=('Gene',), fallback_curves=None, fallback_by=('Gene',), cp_column='CP'):
+    """Convert the CP values of the raw data to copy numbers using the standard curves.
+
+    The copies are 10^((CP - intercept)/slope) where the slope and the intercept are those of the curve of each raw
+    data row. All the rows are converted at once.
+
+    Args:
+        rawdata (pandas.DataFrame): the raw data
+        standard_curves (pandas.DataFrame): the standard curves as returned by fit_standard_curves
+        by (tuple of str): the raw data columns defining a curve of standard_curves
+        fallback_curves (pandas.DataFrame): the standard curves used for the rows which have no valid curve in standard_curves
+        fallback_by (tuple of str): the raw data columns defining a curve of fallback_curves
+        cp_column (str): the raw data column from which the CP values are read
+
+    Returns:
+        numpy.ndarray: the copies of each row. NaN for the rows with no valid curve.
+    """
+
+    def _get_coefficients(curves, columns):
+        if rawdata.empty or curves.empty:
+            return np.full(len(rawdata.index), np.nan), np.full(len(rawdata.index), np.nan)
+        if len(columns) > 1:
+            keys = pd.MultiIndex.from_frame(rawdata[list(columns)])
+        else:
+            keys = pd.Index(rawdata[columns[0]])
+        coefficients = curves[['slope', 'intercept']].reindex(keys)
+        return np.array(coefficients['slope'], dtype=np.float64), np.array(coefficients['intercept'], dtype=np.float64)
+
+    slopes, intercepts = _get_coefficients(standard_curves, by)
+
+    if fallback_curves is not None:
+        fallback_slopes, fallback_intercepts = _get_coefficients(fallback_curves, fallback_by)
+        missing = np.isnan(slopes)
+        slopes[missing] = fallback_slopes[missing]
+        intercepts[missing] = fallback_intercepts[missing]
+
+    cps = rawdata[cp_column].to_numpy(dtype=np.float64) if not rawdata.empty else np.empty(0)
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        return np.power(10.0, (cps - intercepts)/slopes)
@@ -0,0 +1,280 @@
+"""This module implements the following classes and functions:
+    - BUNDLE_FORMATS
+    - save_bundle
+    - tidy_column
+    - TidyBundle
+    - to_long_form
+
+A tidy bundle is a zip archive storing long-form tables, one row per observation and one column per variable, as CSV or
+Parquet files. Unlike the excel export whose sheets are laid out for reading, the tables of a bundle are meant to be
+loaded as they are by downstream R or pandas pipelines.
+"""
+
+import collections
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+
+import pandas as pd
+
+from lightcycler.kernel.utils.excel_writer import ExportCancelledError
+from lightcycler.kernel.utils.project import to_storable
+
+BUNDLE_FORMATS = ['csv', 'parquet']
+
+
+def tidy_column(name):
+    """Convert a name to a lower case snake case column name.
+
+    Example:
+        tidy_column("cohen's d") --> 'cohens_d'
+
+    Args:
+        name (str): the name
+
+    Returns:
+        str: the column name
+    """
+
+    return re.sub(r'[^0-9a-z]+', '_', str(name).lower().replace("'", '')).strip('_')
+
+
+def to_long_form(coordinates, values):
+    """Convert arrays sharing the same axes to a long-form table with one row per element.
+
+    Args:
+        coordinates (list of 2-tuples): the column name and the labels of each axis
+        values (list of 2-tuples): the column name and the array of each value. The shape of the arrays is given by the
+            number of labels of each axis.
+
+    Returns:
+        pandas.DataFrame: the table
+    """
+
+    shape = tuple([len(labels) for _, labels in coordinates])
+
+    indexes = np.indices(shape).reshape(len(shape), -1)
+
+    data = collections.OrderedDict()
+    for (name, labels), index in zip(coordinates, indexes):
+        data[name] = np.asarray(list(labels), dtype=object)[index]
+
+    for name, array in values:
+        data[name] = np.asarray(array).reshape(-1)
+
+    return pd.DataFrame(data)
+
+
+class TidyBundle:
+    """This class implements a zip bundle of long-form tables whose export can be cancelled from another thread.
+
+    The tables are streamed chunk by chunk to an anonymous temporary file which is only copied to its destination by
+    save_bundle. Hence, a cancelled or failed export never leaves a partially written bundle.
+    """
+
+    def __init__(self, file_format='csv', chunk_size=100000):
+        """Constructor.
+
+        Args:
+            file_format (str): the format of the tables. One of BUNDLE_FORMATS.
+            chunk_size (int): the maximum number of rows written at once
+
+        Raises:
+            ValueError: if the format is unknown
+        """
+
+        if file_format not in BUNDLE_FORMATS:
+            raise ValueError('Unknown bundle format {}'.format(file_format))
+
+        self._file_format = file_format
+
+        self._chunk_size = chunk_size
+
+        self._cancelled = threading.Event()
+
+        self._tables = []
+
+        self._file = tempfile.TemporaryFile()
+
+        # The Parquet tables are already compressed
+        compression = zipfile.ZIP_DEFLATED if file_format == 'csv' else zipfile.ZIP_STORED
+        self._archive = zipfile.ZipFile(self._file, 'w', compression=compression)
+
+    def _iter_chunks(self, tables, convert=None):
+        """Split a table or a sequence of tables in chunks of at most chunk_size rows.
+
+        Args:
+            tables (pandas.DataFrame or iterable of pandas.DataFrame): the tables
+            convert (callable): the conversion applied to each table before splitting it
+
+        Returns:
+            generator: the chunks
+        """
+
+        if isinstance(tables, pd.DataFrame):
+            tables = [tables]
+
+        for table in tables:
+            if convert is not None:
+                table = convert(table)
+            for start in range(0, max(len(table), 1), self._chunk_size):
+                self.check_cancelled()
+                yield table.iloc[start:start + self._chunk_size]
+
+    def _write_csv(self, stream, tables):
+        """Write the chunks of a table to a CSV stream.
+
+        Args:
+            stream (file): the binary stream
+            tables (pandas.DataFrame or iterable of pandas.DataFrame): the table chunks
+        """
+
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+        header = True
+        for chunk in self._iter_chunks(tables):
+            chunk.to_csv(text_stream, index=False, header=header)
+            header = False
+
+        text_stream.flush()
+        text_stream.detach()
+
+    def _write_parquet(self, stream, tables):
+        """Write the chunks of a table to a Parquet stream, one row group per chunk.
+
+        Args:
+            stream (file): the binary stream
+            tables (pandas.DataFrame or iterable of pandas.DataFrame): the table chunks
+        """
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            # The tables are converted as a whole so that all their chunks share the same column types
+            for chunk in self._iter_chunks(tables, convert=to_storable):
+                if writer is None:
+                    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                    writer = pq.ParquetWriter(stream, schema, compression='zstd')
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def cancel(self):
+        """Request the cancellation of the export.
+        """
+
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """Return whether the cancellation of the export has been requested.
+
+        Returns:
+            bool: True if the export has been cancelled
+        """
+
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """Raise if the cancellation of the export has been requested.
+
+        Raises:
+            ExportCancelledError: if the export has been cancelled
+        """
+
+        if self._cancelled.is_set():
+            raise ExportCancelledError('The export has been cancelled')
+
+    def close(self):
+        """Close the bundle and return its temporary file.
+
+        Returns:
+            file: the temporary file rewound to its beginning
+        """
+
+        self._archive.close()
+
+        self._file.seek(0)
+
+        return self._file
+
+    @property
+    def file_format(self):
+        """Return the format of the tables.
+
+        Returns:
+            str: the format
+        """
+
+        return self._file_format
+
+    @property
+    def tables(self):
+        """Return the names of the tables written so far.
+
+        Returns:
+            list of str: the names
+        """
+
+        return list(self._tables)
+
+    def write_table(self, name, tables):
+        """Write a table to the bundle.
+
+        The table can be given as a sequence of chunks (e.g. one per gene) sharing the same columns so that it is never
+        built as a whole in memory.
+
+        Args:
+            name (str): the name of the table
+            tables (pandas.DataFrame or iterable of pandas.DataFrame): the table or its chunks
+
+        Raises:
+            ExportCancelledError: if the export has been cancelled
+            ValueError: if a table with the same name has already been written
+        """
+
+        if name in self._tables:
+            raise ValueError('Table {} already written'.format(name))
+
+        self.check_cancelled()
+
+        with self._archive.open('{}.{}'.format(name, self._file_format), 'w', force_zip64=True) as stream:
+            if self._file_format == 'csv':
+                self._write_csv(stream, tables)
+            else:
+                self._write_parquet(stream, tables)
+
+        self._tables.append(name)
+
+
+def save_bundle(bundle, filename):
+    """Save a bundle atomically.
+
+    The bundle is copied to a temporary file of the destination directory which is then renamed to the destination file.
+
+    Args:
+        bundle (lightcycler.kernel.utils.tidy_export.TidyBundle): the bundle
+        filename (str): the destination file
+    """
+
+    directory, basename = os.path.split(os.path.abspath(filename))
+
+    fd, temp_filename = tempfile.mkstemp(prefix='.{}.'.format(basename), dir=directory)
+
+    try:
+        with os.fdopen(fd, 'wb') as fout:
+            shutil.copyfileobj(bundle.close(), fout)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
@@ -0,0 +1,9 @@
+"""Test configuration.
+
+The lightcycler package is imported from the source tree so that the tests can be run without installing it.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,105 @@
+"""Tests of the inter-run calibration.
+
+The raw data are built from known calibrator levels and run offsets which must be recovered by the calibration.
+"""
+
+import numpy as np
+
+import pandas as pd
+
+from lightcycler.kernel.utils.calibration import RUN_COLUMNS, apply_run_offsets, estimate_run_offsets
+
+# The calibrator samples and their CP level for each gene
+LEVELS = {'gene1': {'C1': 20.0, 'C2': 24.0, 'C3': 28.0},
+          'gene2': {'C1': 22.5, 'C2': 26.5, 'C3': 30.5}}
+
+# The offset of each (gene, date, RT) run. They sum up to zero over the runs of each gene.
+OFFSETS = {('gene1', '2020-01-01', 'RT1'): 0.8,
+           ('gene1', '2020-01-02', 'RT1'): -0.3,
+           ('gene1', '2020-01-02', 'RT2'): -0.5,
+           ('gene2', '2020-01-01', 'RT1'): -1.2,
+           ('gene2', '2020-01-03', 'RT1'): 1.2}
+
+
+def _rawdata(missing=None):
+    """Return the raw data of the calibrators and of one sample for each run.
+
+    Args:
+        missing (tuple): the (gene, date, RT, calibrator) entry to skip
+
+    Returns:
+        pandas.DataFrame: the raw data
+    """
+
+    rows = []
+    for (gene, date, rt), offset in OFFSETS.items():
+        for name, level in LEVELS[gene].items():
+            if (gene, date, rt, name) == missing:
+                continue
+            rows.append((pd.Timestamp(date), gene, rt, name, level + offset))
+        rows.append((pd.Timestamp(date), gene, rt, 'S1', 25.0 + offset))
+
+    return pd.DataFrame(rows, columns=['Date', 'Gene', 'RT', 'Name', 'CP'])
+
+
+def _expected_offsets():
+    """Return the expected offsets.
+
+    Returns:
+        pandas.Series: the offset of each (Gene, Date, RT) run
+    """
+
+    index = pd.MultiIndex.from_tuples([(gene, pd.Timestamp(date), rt) for gene, date, rt in OFFSETS], names=RUN_COLUMNS)
+
+    return pd.Series(list(OFFSETS.values()), index=index)
+
+
+def test_run_offsets_are_recovered():
+
+    offsets = estimate_run_offsets(_rawdata(), list(LEVELS['gene1']))
+
+    pd.testing.assert_series_equal(offsets.sort_index(), _expected_offsets().sort_index(), check_exact=False, atol=1.0e-8)
+
+
+def test_run_offsets_with_missing_calibrator():
+
+    offsets = estimate_run_offsets(_rawdata(missing=('gene1', '2020-01-02', 'RT2', 'C1')), list(LEVELS['gene1']))
+
+    pd.testing.assert_series_equal(offsets.sort_index(), _expected_offsets().sort_index(), check_exact=False, atol=1.0e-8)
+
+
+def test_calibrated_values():
+
+    rawdata = _rawdata()
+
+    calibrated = apply_run_offsets(rawdata, estimate_run_offsets(rawdata, ['C1', 'C2', 'C3']))
+
+    # Once calibrated, the CP values of each sample do not depend on the run any more
+    spreads = calibrated.groupby([rawdata['Gene'], rawdata['Name']]).agg(np.ptp)
+
+    np.testing.assert_allclose(spreads.to_numpy(), 0.0, atol=1.0e-8)
+
+
+def test_runs_without_calibrators_are_left_unchanged():
+
+    rawdata = _rawdata()
+
+    offsets = estimate_run_offsets(rawdata, ['C1', 'C2', 'C3'])
+
+    extra_run = pd.DataFrame([(pd.Timestamp('2020-01-04'), 'gene1', 'RT1', 'S1', 27.0)], columns=rawdata.columns)
+    rawdata = pd.concat([rawdata, extra_run], ignore_index=True)
+
+    calibrated = apply_run_offsets(rawdata, offsets)
+
+    assert calibrated.iloc[-1] == 27.0
+
+
+def test_no_calibrators():
+
+    rawdata = _rawdata()
+
+    offsets = estimate_run_offsets(rawdata, [])
+
+    assert offsets.empty
+
+    pd.testing.assert_series_equal(apply_run_offsets(rawdata, offsets), rawdata['CP'])
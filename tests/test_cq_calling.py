@@ -0,0 +1,100 @@
+"""Tests of the Cq calling on synthetic amplification curves.
+
+The curves are logistic sigmoids on top of a drifting baseline whose second derivative maximum is known analytically.
+"""
+
+import numpy as np
+
+import pytest
+
+from lightcycler.kernel.utils.cq_calling import CQ_METHODS, call_cq, fit_points
+
+# The number of cycles of the synthetic runs
+N_CYCLES = 45
+
+# The distance between the midpoint of a logistic sigmoid and the maximum of its second derivative in units of its scale
+SECOND_DERIVATIVE_SHIFT = np.log(2.0 + np.sqrt(3.0))
+
+
+def _sigmoids(midpoints, scale=1.5, amplitude=1000.0, noise=0.0, seed=0):
+    """Return logistic amplification curves.
+
+    Args:
+        midpoints (list of float): the midpoint cycle of each curve
+        scale (float): the scale (in cycles) of the sigmoids
+        amplitude (float): the plateau of the sigmoids
+        noise (float): the standard deviation of the gaussian noise
+        seed (int): the seed of the random generator
+
+    Returns:
+        numpy.ndarray: the (n curves, N_CYCLES) fluorescence
+    """
+
+    rng = np.random.default_rng(seed)
+
+    cycles = np.arange(1, N_CYCLES + 1, dtype=np.float64)
+    midpoints = np.asarray(midpoints, dtype=np.float64)[:, np.newaxis]
+
+    baselines = 50.0 + 0.5*cycles
+
+    curves = baselines + amplitude/(1.0 + np.exp(-(cycles - midpoints)/scale))
+
+    return curves + rng.normal(0.0, noise, curves.shape)
+
+
+def test_second_derivative_maximum():
+
+    midpoints = np.array([24.0, 26.3, 29.1, 32.6])
+
+    cq = call_cq(_sigmoids(midpoints, noise=0.05), method='second derivative maximum')
+
+    np.testing.assert_allclose(cq, midpoints - 1.5*SECOND_DERIVATIVE_SHIFT, atol=0.2)
+
+
+def test_fit_points():
+
+    midpoints = np.array([24.0, 26.3, 29.1, 32.6])
+
+    cq = call_cq(_sigmoids(midpoints, noise=0.05), method='fit points', threshold=50.0)
+
+    # The baseline subtracted sigmoids cross the threshold at midpoint - scale*log(amplitude/threshold - 1)
+    np.testing.assert_allclose(cq, midpoints - 1.5*np.log(1000.0/50.0 - 1.0), atol=0.1)
+
+
+@pytest.mark.parametrize('method', CQ_METHODS)
+def test_cq_follows_the_curve_shifts(method):
+
+    midpoints = np.array([24.0, 26.3, 29.1, 32.6])
+
+    for seed in range(5):
+        cq = call_cq(_sigmoids(midpoints, noise=0.05, seed=seed), method=method, threshold=50.0)
+        np.testing.assert_allclose(cq - cq[0], midpoints - midpoints[0], atol=0.1)
+
+
+@pytest.mark.parametrize('method', CQ_METHODS)
+def test_flat_curves_are_not_amplified(method):
+
+    fluorescence = np.vstack([_sigmoids([24.0], noise=1.0), _sigmoids([24.0], amplitude=0.0, noise=1.0, seed=1)])
+
+    cq = call_cq(fluorescence, method=method)
+
+    assert not np.isnan(cq[0])
+    assert np.isnan(cq[1])
+
+
+def test_fit_points_on_exponential_curves():
+
+    cycles = np.arange(1, N_CYCLES + 1, dtype=np.float64)
+
+    # A perfect doubling at each cycle crosses the threshold at log2(threshold) - log2(initial quantity)
+    fluorescence = np.vstack([2.0**(cycles - 10.0), 2.0**(cycles - 15.0)])
+
+    cq = fit_points(fluorescence, threshold=100.0, n_points=3)
+
+    np.testing.assert_allclose(cq, np.log2(100.0) + np.array([10.0, 15.0]))
+
+
+def test_unknown_method():
+
+    with pytest.raises(ValueError):
+        call_cq(_sigmoids([20.0]), method='threshold')
@@ -0,0 +1,134 @@
+"""Tests of the batched group tests against their scipy counterparts.
+
+Each family of the batch (e.g. gene and zone) is compared to the scipy test run on its groups alone. Some values are
+missing so that the groups have different sizes from a family to another.
+"""
+
+import itertools
+
+import numpy as np
+
+import pytest
+
+import scipy.stats as stats
+
+from lightcycler.kernel.utils.group_tests import compute_group_statistics, run_group_tests
+
+# The number of groups of the synthetic data
+N_GROUPS = 4
+
+
+def _data(seed=0):
+    """Return a batch of families of values and the membership of the samples to the groups.
+
+    Args:
+        seed (int): the seed of the random generator
+
+    Returns:
+        2-tuple of numpy.ndarray: the (n families, n samples) values and the (n samples, n groups) membership matrix
+    """
+
+    rng = np.random.default_rng(seed)
+
+    n_families, n_samples = 5, 24
+
+    group_indexes = np.arange(n_samples) % N_GROUPS
+
+    values = rng.normal(25.0, 1.0, (n_families, n_samples)) + 0.5*group_indexes
+
+    # Round the values to get some ties for the rank tests
+    values = np.round(values, 1)
+
+    values[rng.random(values.shape) < 0.1] = np.nan
+
+    membership = np.zeros((n_samples, N_GROUPS), dtype=np.float64)
+    membership[np.arange(n_samples), group_indexes] = 1.0
+
+    return values, membership
+
+
+def _groups(values, membership):
+    """Split the values of a family over the groups.
+
+    Args:
+        values (numpy.ndarray): the (n samples) values
+        membership (numpy.ndarray): the (n samples, n groups) membership matrix
+
+    Returns:
+        list of numpy.ndarray: the values of each group skipping the NaN values
+    """
+
+    return [values[(membership[:, j] > 0) & ~np.isnan(values)] for j in range(membership.shape[1])]
+
+
+def test_group_statistics():
+
+    values, membership = _data()
+
+    n_values, means, variances = compute_group_statistics(values, membership)
+
+    for i, family in enumerate(values):
+        groups = _groups(family, membership)
+        np.testing.assert_array_equal(n_values[i], [len(group) for group in groups])
+        np.testing.assert_allclose(means[i], [np.mean(group) for group in groups])
+        np.testing.assert_allclose(variances[i], [np.var(group, ddof=1) for group in groups])
+
+
+@pytest.mark.parametrize('test, equal_var', [('student t', True), ('welch t', False)])
+def test_t_tests(test, equal_var):
+
+    values, membership = _data()
+
+    p_values, omnibus_p_values = run_group_tests(values, membership, test=test, p_adjust=None)
+
+    assert omnibus_p_values is None
+
+    for i, family in enumerate(values):
+        groups = _groups(family, membership)
+        for a, b in itertools.combinations(range(N_GROUPS), 2):
+            expected = stats.ttest_ind(groups[a], groups[b], equal_var=equal_var).pvalue
+            np.testing.assert_allclose(p_values[i, a, b], expected)
+            np.testing.assert_allclose(p_values[i, b, a], expected)
+
+
+def test_mann_whitney_u_tests():
+
+    values, membership = _data()
+
+    p_values, _ = run_group_tests(values, membership, test='mann-whitney u', p_adjust=None)
+
+    for i, family in enumerate(values):
+        groups = _groups(family, membership)
+        for a, b in itertools.combinations(range(N_GROUPS), 2):
+            expected = stats.mannwhitneyu(groups[a], groups[b], use_continuity=True, alternative='two-sided', method='asymptotic').pvalue
+            np.testing.assert_allclose(p_values[i, a, b], expected)
+
+
+def test_one_way_anova():
+
+    values, membership = _data()
+
+    _, omnibus_p_values = run_group_tests(values, membership, test='one-way anova', p_adjust=None)
+
+    expected = [stats.f_oneway(*_groups(family, membership)).pvalue for family in values]
+
+    np.testing.assert_allclose(omnibus_p_values, expected)
+
+
+def test_kruskal_wallis():
+
+    values, membership = _data()
+
+    _, omnibus_p_values = run_group_tests(values, membership, test='kruskal-wallis', p_adjust=None)
+
+    expected = [stats.kruskal(*_groups(family, membership)).pvalue for family in values]
+
+    np.testing.assert_allclose(omnibus_p_values, expected)
+
+
+def test_unknown_test():
+
+    values, membership = _data()
+
+    with pytest.raises(ValueError):
+        run_group_tests(values, membership, test='z test')
@@ -0,0 +1,62 @@
+"""Import-time budget of the main window.
+
+The heavy dependencies (scipy, matplotlib, openpyxl, tabula, outliers) are only needed by specific actions hence they
+must be loaded at first use and not when the application starts.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# The maximum time in seconds for importing the main window in a fresh interpreter
+IMPORT_TIME_BUDGET = 2.0
+
+# The modules which must not be loaded when the main window is imported
+LAZY_MODULES = ['matplotlib', 'openpyxl', 'outliers', 'scipy', 'tabula']
+
+_SCRIPT = '''
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import lightcycler.gui.main_windows.main_window
+elapsed = time.perf_counter() - start
+
+print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))
+'''
+
+
+def _import_main_window():
+    """Import the main window in a fresh interpreter.
+
+    Returns:
+        2-tuple: the import time in seconds and the names of the loaded modules
+    """
+
+    env = dict(os.environ)
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    env['PYTHONPATH'] = os.pathsep.join([src_dir, env['PYTHONPATH']]) if env.get('PYTHONPATH') else src_dir
+
+    output = subprocess.check_output([sys.executable, '-c', _SCRIPT], env=env)
+
+    results = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+    return results['elapsed'], results['modules']
+
+
+def test_heavy_dependencies_are_not_imported():
+
+    _, modules = _import_main_window()
+
+    loaded = [module for module in LAZY_MODULES if any([m == module or m.startswith(module + '.') for m in modules])]
+
+    assert not loaded, 'Modules loaded when importing the main window: {}'.format(', '.join(loaded))
+
+
+def test_import_time_budget():
+
+    elapsed, _ = _import_main_window()
+
+    assert elapsed < IMPORT_TIME_BUDGET, 'Importing the main window took {:.2f} s (budget: {:.2f} s)'.format(elapsed, IMPORT_TIME_BUDGET)
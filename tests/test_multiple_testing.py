@@ -0,0 +1,132 @@
+"""Tests of the p-values adjustment for multiple testing.
+
+The Benjamini-Hochberg adjustment is compared to scipy and the Holm and Bonferroni ones to a direct implementation of
+their definition.
+"""
+
+import numpy as np
+
+import pytest
+
+import scipy.stats as stats
+
+from lightcycler.kernel.utils.group_tests import adjust_pairwise_p_values
+from lightcycler.kernel.utils.multiple_testing import adjust_p_values
+
+
+def _reference_adjustment(p_values, method):
+    """Adjust a family of p-values.
+
+    Args:
+        p_values (numpy.ndarray): the p-values
+        method (str): the adjustment method
+
+    Returns:
+        numpy.ndarray: the adjusted p-values
+    """
+
+    n_tests = len(p_values)
+
+    if method == 'benjamini-hochberg':
+        return stats.false_discovery_control(p_values, method='bh')
+
+    if method == 'bonferroni':
+        return np.minimum(n_tests*p_values, 1.0)
+
+    order = np.argsort(p_values)
+
+    adjusted = np.empty(n_tests)
+    running_max = 0.0
+    for rank, index in enumerate(order):
+        running_max = max(running_max, (n_tests - rank)*p_values[index])
+        adjusted[index] = min(running_max, 1.0)
+
+    return adjusted
+
+
+def _p_values(shape, seed=0):
+    """Return random p-values with a few small ones.
+
+    Args:
+        shape (tuple): the shape of the p-values
+        seed (int): the seed of the random generator
+
+    Returns:
+        numpy.ndarray: the p-values
+    """
+
+    rng = np.random.default_rng(seed)
+
+    return rng.random(shape)**3
+
+
+@pytest.mark.parametrize('method', ['benjamini-hochberg', 'bonferroni', 'holm'])
+def test_adjust_p_values(method):
+
+    p_values = _p_values((6, 10))
+
+    adjusted = adjust_p_values(p_values, method)
+
+    for family, adjusted_family in zip(p_values, adjusted):
+        np.testing.assert_allclose(adjusted_family, _reference_adjustment(family, method))
+
+
+@pytest.mark.parametrize('method', ['benjamini-hochberg', 'bonferroni', 'holm'])
+def test_adjust_p_values_along_axis(method):
+
+    p_values = _p_values((10, 6))
+
+    np.testing.assert_allclose(adjust_p_values(p_values, method, axis=0), adjust_p_values(p_values.T, method).T)
+
+
+@pytest.mark.parametrize('method', ['benjamini-hochberg', 'bonferroni', 'holm'])
+def test_adjust_p_values_skips_missing_values(method):
+
+    p_values = _p_values((10,))
+    p_values[[2, 7]] = np.nan
+
+    adjusted = adjust_p_values(p_values, method)
+
+    valid = ~np.isnan(p_values)
+
+    assert np.isnan(adjusted[~valid]).all()
+    np.testing.assert_allclose(adjusted[valid], _reference_adjustment(p_values[valid], method))
+
+
+@pytest.mark.parametrize('method', ['benjamini-hochberg', 'bonferroni', 'holm'])
+def test_family_wide_adjustment(method):
+
+    p_values = _p_values((3, 4, 5))
+
+    adjusted = adjust_p_values(p_values, method, axis=None)
+
+    np.testing.assert_allclose(adjusted.ravel(), _reference_adjustment(p_values.ravel(), method))
+
+
+def test_adjust_pairwise_p_values():
+
+    n_groups = 4
+
+    pairs = _p_values((5, n_groups*(n_groups - 1)//2))
+
+    rows, columns = np.triu_indices(n_groups, k=1)
+
+    p_values = np.ones((5, n_groups, n_groups))
+    p_values[:, rows, columns] = pairs
+    p_values[:, columns, rows] = pairs
+
+    adjusted = adjust_pairwise_p_values(p_values, 'holm')
+
+    np.testing.assert_allclose(adjusted[:, rows, columns], adjust_p_values(pairs, 'holm'))
+    np.testing.assert_allclose(adjusted, np.swapaxes(adjusted, 1, 2))
+    np.testing.assert_array_equal(np.diagonal(adjusted, axis1=1, axis2=2), 1.0)
+
+    adjusted = adjust_pairwise_p_values(p_values, 'holm', family_wide=True)
+
+    np.testing.assert_allclose(adjusted[:, rows, columns], adjust_p_values(pairs, 'holm', axis=None))
+
+
+def test_unknown_method():
+
+    with pytest.raises(ValueError):
+        adjust_p_values(_p_values((10,)), 'sidak')
@@ -0,0 +1,122 @@
+"""Tests of the project files.
+
+A saved project must be loaded with the same raw data, including their types, and the same settings.
+"""
+
+import json
+import os
+import zipfile
+
+import numpy as np
+
+import pandas as pd
+
+import pytest
+
+from lightcycler.kernel.utils.project import ProjectError, load_project, save_project
+
+
+def _rawdata():
+    """Return raw data as read from lightcycler data files.
+
+    Returns:
+        pandas.DataFrame: the raw data
+    """
+
+    rows = [(pd.Timestamp('2020-01-01'), 'gene1', 'RT1', 'A1', '1', 'A', 25.3, '2020-01-01 plate RT1_gene1'),
+            (pd.Timestamp('2020-01-01'), 'gene1', 'RT1', 'A2', '1', 'B', np.nan, '2020-01-01 plate RT1_gene1'),
+            (pd.Timestamp('2020-01-02'), 'gene2', 'RT2', 'B1', 'RT', 'P', 31.25, '2020-01-02 plate RT2_gene2')]
+
+    data_frame = pd.DataFrame(rows, columns=['Date', 'Gene', 'RT', 'Pos', 'Name', 'Zone', 'CP', 'File'])
+
+    # The positions of some readers are integers
+    data_frame['Pos'] = pd.Series(['A1', 2, 'B1'], dtype=object)
+
+    return data_frame
+
+
+def _settings():
+    """Return the settings of a session.
+
+    Returns:
+        dict: the settings
+    """
+
+    return {'groups': [{'name': 'control', 'samples': ['1'], 'selected': True},
+                       {'name': 'treated', 'samples': ['RT'], 'selected': False}],
+            'group control': 'control',
+            'reference genes': ['gene1'],
+            'interest genes': ['gene2'],
+            'ct powers': {'gene1': np.float64(1.95), 'gene2': 2.0}}
+
+
+def test_round_trip(tmp_path):
+
+    filename = str(tmp_path / 'session.lcp')
+
+    rawdata = _rawdata()
+
+    save_project(filename, rawdata, _settings())
+
+    loaded_rawdata, loaded_settings = load_project(filename)
+
+    expected = rawdata.copy()
+    expected['Pos'] = expected['Pos'].astype(str)
+
+    pd.testing.assert_frame_equal(loaded_rawdata, expected)
+
+    assert loaded_settings == json.loads(json.dumps(_settings(), default=float))
+
+    # No temporary file is left next to the project
+    assert os.listdir(str(tmp_path)) == ['session.lcp']
+
+
+def test_save_overwrites_project(tmp_path):
+
+    filename = str(tmp_path / 'session.lcp')
+
+    save_project(filename, _rawdata(), _settings())
+    save_project(filename, _rawdata().iloc[:1], {'group control': None})
+
+    rawdata, settings = load_project(filename)
+
+    assert len(rawdata.index) == 1
+    assert settings == {'group control': None}
+
+
+def test_invalid_project_file(tmp_path):
+
+    filename = str(tmp_path / 'session.lcp')
+
+    with open(filename, 'w') as fout:
+        fout.write('not a project')
+
+    with pytest.raises(ProjectError):
+        load_project(filename)
+
+    with zipfile.ZipFile(filename, 'w') as archive:
+        archive.writestr('project.json', json.dumps({'version': 1}))
+
+    with pytest.raises(ProjectError):
+        load_project(filename)
+
+
+def test_unsupported_version(tmp_path):
+
+    filename = str(tmp_path / 'session.lcp')
+
+    save_project(filename, _rawdata(), _settings())
+
+    with zipfile.ZipFile(filename, 'r') as archive:
+        entries = dict([(name, archive.read(name)) for name in archive.namelist()])
+
+    settings = json.loads(entries['project.json'].decode('utf-8'))
+    settings['version'] = 1000
+    entries['project.json'] = json.dumps(settings)
+
+    with zipfile.ZipFile(filename, 'w') as archive:
+        for name, contents in entries.items():
+            archive.writestr(name, contents)
+
+    with pytest.raises(ProjectError):
+        load_project(filename)
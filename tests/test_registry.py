@@ -0,0 +1,122 @@
+"""Tests of the raw data readers registry.
+
+The readers are selected by the extension and the basename of the data files and their module is only imported when
+a file is read.
+"""
+
+import pandas as pd
+
+import pytest
+
+from lightcycler.kernel.readers import registry
+from lightcycler.kernel.readers.registry import CANONICAL_COLUMNS, ReaderError, get_extensions, get_reader, read_data_file, register_reader
+
+
+def read_tsv_file(data_file):
+    """Read a tab separated file already in the canonical schema.
+
+    Args:
+        data_file (str): the data file
+
+    Returns:
+        pandas.DataFrame: the raw data
+    """
+
+    return pd.read_csv(data_file, sep='\t')
+
+
+def read_invalid_file(data_file):
+    """Read a file whose raw data are not in the canonical schema.
+
+    Args:
+        data_file (str): the data file
+
+    Returns:
+        pandas.DataFrame: the raw data
+    """
+
+    return pd.DataFrame({'Gene': ['gene1'], 'CP': [25.0]})
+
+
+@pytest.fixture
+def readers():
+    """Restore the registered readers after the test.
+    """
+
+    saved_readers = registry._readers.copy()
+
+    yield
+
+    registry._readers.clear()
+    registry._readers.update(saved_readers)
+
+
+@pytest.mark.parametrize('data_file, name', [('2020-01-01 plate RT1_gene1.pdf', 'lightcycler pdf'),
+                                             ('/data/2020-01-01 plate RT1_gene1.PDF', 'lightcycler pdf'),
+                                             ('2020-01-01 plate RT1_gene1.txt', 'lightcycler csv'),
+                                             ('2020-01-01 plate RT2-1.csv', 'lightcycler csv')])
+def test_builtin_readers(data_file, name):
+
+    assert get_reader(data_file).name == name
+
+
+@pytest.mark.parametrize('data_file', ['2020-01-01 plate RT1_gene1.xlsx', 'notes.txt', 'plate RT1_gene1.pdf'])
+def test_no_reader(data_file):
+
+    with pytest.raises(ReaderError):
+        get_reader(data_file)
+
+
+def test_registered_reader_takes_precedence(readers):
+
+    register_reader('tsv', ['.tsv', '.txt'], 'test_registry:read_tsv_file', patterns=['*_tsv.*'])
+
+    assert get_reader('2020-01-01 plate RT1_tsv.txt').name == 'tsv'
+    assert get_reader('2020-01-01 plate RT1_gene1.txt').name == 'lightcycler csv'
+    assert get_reader('export_tsv.tsv').name == 'tsv'
+
+    assert '.tsv' in get_extensions()
+
+
+def test_reader_replacement(readers):
+
+    register_reader('lightcycler pdf', ['.pdf'], 'test_registry:read_tsv_file')
+
+    reader = get_reader('report.pdf')
+
+    assert reader.name == 'lightcycler pdf'
+    assert reader.target == 'test_registry:read_tsv_file'
+
+
+def test_reader_module_is_imported_at_first_use(readers):
+
+    register_reader('missing', ['.missing'], 'lightcycler_missing_module:read')
+
+    reader = get_reader('data.missing')
+
+    with pytest.raises(ImportError):
+        reader.function
+
+
+def test_read_data_file(readers, tmp_path):
+
+    register_reader('tsv', ['.tsv'], 'test_registry:read_tsv_file')
+
+    data_file = str(tmp_path / 'data.tsv')
+
+    data_frame = pd.DataFrame([('2020-01-01', 'gene1', 'RT1', 'A1', '1', 'A', 25, 'data')], columns=CANONICAL_COLUMNS)
+    data_frame.to_csv(data_file, sep='\t', index=False)
+
+    rawdata = read_data_file(data_file)
+
+    assert list(rawdata.columns) == CANONICAL_COLUMNS
+    assert pd.api.types.is_datetime64_any_dtype(rawdata['Date'])
+    assert pd.api.types.is_float_dtype(rawdata['CP'])
+
+
+def test_read_invalid_data_file(readers):
+
+    register_reader('invalid', ['.invalid'], 'test_registry:read_invalid_file')
+
+    with pytest.raises(ReaderError):
+        read_data_file('data.invalid')
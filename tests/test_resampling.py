@@ -0,0 +1,94 @@
+"""Tests of the bootstrap and permutation engine.
+
+The random stream of each gene is derived from the seed, hence the results must not depend on the number of workers.
+"""
+
+import numpy as np
+
+from lightcycler.kernel.utils.resampling import RESAMPLING_RESULTS, run_resampling
+
+# The number of replicates used by the tests
+N_RESAMPLES = 2000
+
+
+def _data(seed=0):
+    """Return a set of families of values and the membership of the samples to the groups.
+
+    The second group is shifted by 3 standard deviations from the first one and the third group is the same as the
+    first one.
+
+    Args:
+        seed (int): the seed of the random generator
+
+    Returns:
+        2-tuple of numpy.ndarray: the (n genes, n zones, n samples) values and the (n samples, n groups) membership matrix
+    """
+
+    rng = np.random.default_rng(seed)
+
+    n_genes, n_zones, n_samples, n_groups = 5, 2, 18, 3
+
+    group_indexes = np.arange(n_samples) % n_groups
+
+    values = rng.normal(25.0, 1.0, (n_genes, n_zones, n_samples)) + 3.0*(group_indexes == 1)
+    values[rng.random(values.shape) < 0.1] = np.nan
+
+    membership = np.zeros((n_samples, n_groups), dtype=np.float64)
+    membership[np.arange(n_samples), group_indexes] = 1.0
+
+    return values, membership
+
+
+def test_results_do_not_depend_on_the_number_of_workers():
+
+    values, membership = _data()
+
+    serial = run_resampling(values, membership, n_resamples=N_RESAMPLES, seed=1234, n_workers=1)
+    parallel = run_resampling(values, membership, n_resamples=N_RESAMPLES, seed=1234, n_workers=3)
+
+    assert list(serial) == RESAMPLING_RESULTS
+
+    for name in RESAMPLING_RESULTS:
+        np.testing.assert_array_equal(serial[name], parallel[name])
+
+
+def test_results_depend_on_the_seed():
+
+    values, membership = _data()
+
+    results = run_resampling(values, membership, n_resamples=N_RESAMPLES, seed=1234)
+    same_seed_results = run_resampling(values, membership, n_resamples=N_RESAMPLES, seed=1234)
+    other_seed_results = run_resampling(values, membership, n_resamples=N_RESAMPLES, seed=4321)
+
+    np.testing.assert_array_equal(results['permutation p-value'], same_seed_results['permutation p-value'])
+    assert not np.array_equal(results['permutation p-value'], other_seed_results['permutation p-value'])
+
+
+def test_results():
+
+    values, membership = _data()
+
+    results = run_resampling(values, membership, n_resamples=N_RESAMPLES, seed=1234)
+
+    for i, j in np.ndindex(values.shape[:2]):
+        means = [np.nanmean(values[i, j, membership[:, k] > 0]) for k in range(membership.shape[1])]
+        np.testing.assert_allclose(results['mean difference'][i, j], np.subtract.outer(means, means))
+
+    differences = results['mean difference']
+    lower = results['mean difference lower bound']
+    upper = results['mean difference upper bound']
+    p_values = results['permutation p-value']
+
+    off_diagonal = ~np.eye(membership.shape[1], dtype=bool)
+
+    # The bootstrap intervals contain the observed differences and are antisymmetric
+    assert np.all((lower <= differences)[..., off_diagonal])
+    assert np.all((differences <= upper)[..., off_diagonal])
+    np.testing.assert_allclose(lower, -np.swapaxes(upper, -1, -2))
+
+    # The permutation p-values are symmetric and the shifted group differs from the others
+    np.testing.assert_array_equal(p_values, np.swapaxes(p_values, -1, -2))
+    assert np.all(p_values[..., 0, 1] < 0.05)
+    assert np.all(p_values[..., 1, 2] < 0.05)
+    assert np.all(p_values >= 1.0/(N_RESAMPLES + 1.0))
+    assert np.all(p_values <= 1.0)
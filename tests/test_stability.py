@@ -0,0 +1,97 @@
+"""Tests of the geNorm expression stability.
+
+The M values are checked against a direct implementation of their definition.
+"""
+
+import numpy as np
+
+from lightcycler.kernel.utils.stability import genorm
+
+
+def _reference_m_values(log_quantities):
+    """Compute the geNorm M values from their definition.
+
+    Args:
+        log_quantities (numpy.ndarray): the (n genes, n samples) log2 relative quantities
+
+    Returns:
+        numpy.ndarray: the M value of each gene
+    """
+
+    n_genes = log_quantities.shape[0]
+
+    m_values = np.empty(n_genes)
+    for i in range(n_genes):
+        stds = [np.std(log_quantities[i] - log_quantities[j], ddof=1) for j in range(n_genes) if j != i]
+        m_values[i] = np.mean(stds)
+
+    return m_values
+
+
+def _log_quantities(n_genes=6, n_samples=20, seed=0):
+    """Return log2 quantities whose noise increases with the gene index.
+
+    Args:
+        n_genes (int): the number of genes
+        n_samples (int): the number of samples
+        seed (int): the seed of the random generator
+
+    Returns:
+        numpy.ndarray: the (n genes, n samples) log2 quantities
+    """
+
+    rng = np.random.default_rng(seed)
+
+    noise_levels = np.linspace(0.1, 1.0, n_genes)[:, np.newaxis]
+
+    return rng.normal(0.0, 1.0, n_samples) + noise_levels*rng.normal(0.0, 1.0, (n_genes, n_samples))
+
+
+def test_genorm_m_values():
+
+    log_quantities = _log_quantities()
+
+    m_values, _, _, _ = genorm(log_quantities)
+
+    np.testing.assert_allclose(m_values, _reference_m_values(log_quantities))
+
+
+def test_genorm_elimination():
+
+    log_quantities = _log_quantities()
+
+    _, elimination_m_values, ranking, pairwise_variations = genorm(log_quantities)
+
+    # The least stable gene is eliminated first and the M values are recomputed over the remaining genes
+    remaining = list(range(log_quantities.shape[0]))
+    eliminated = []
+    while len(remaining) > 2:
+        m_values = _reference_m_values(log_quantities[remaining])
+        worst = remaining[int(np.argmax(m_values))]
+        np.testing.assert_allclose(elimination_m_values[worst], m_values.max())
+        remaining.remove(worst)
+        eliminated.append(worst)
+
+    np.testing.assert_allclose(elimination_m_values[remaining], _reference_m_values(log_quantities[remaining]))
+
+    assert ranking.tolist() == remaining + eliminated[::-1]
+
+    # The genes are ranked by their noise level
+    assert sorted(ranking[:2].tolist()) == [0, 1]
+    assert ranking[2:].tolist() == [2, 3, 4, 5]
+
+    assert pairwise_variations.shape == (log_quantities.shape[0] - 2,)
+
+
+def test_genorm_skips_missing_values():
+
+    log_quantities = _log_quantities()
+    log_quantities[3, 5] = np.nan
+
+    m_values, _, _, _ = genorm(log_quantities)
+
+    valid = ~np.isnan(log_quantities).any(axis=0)
+
+    # Only the pairs involving the gene with a missing value lose a sample
+    np.testing.assert_allclose(m_values[3], _reference_m_values(log_quantities[:, valid])[3])
+    assert not np.isnan(m_values).any()